@@ -27,6 +27,10 @@ uwsgi --chdir=/kanikervanaf/src/website \
     --post-buffering=16384 \
     --max-requests=5000 \
     --thunder-lock \
+    --attach-daemon="./manage.py run_deregister_worker" \
+    --attach-daemon="./manage.py run_outbox_worker" \
+    --cron="-5 -1 -1 -1 -1 ./manage.py remove_expired" \
+    --cron="-5 -1 -1 -1 -1 ./manage.py rollup_deregistrations" \
     --vacuum \
     --logfile-chown \
     --logto2=/kanikervanaf/log/uwsgi.log \
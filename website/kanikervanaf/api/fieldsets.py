@@ -0,0 +1,171 @@
+from typing import List, Optional
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+FIELDS_QUERY_PARAM = "fields"
+OMIT_QUERY_PARAM = "omit"
+
+
+def _split(value: str) -> List[str]:
+    return [x.strip() for x in value.split(",") if x.strip() != ""]
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    Serializer mixin serializing only the fields selected with the fields and omit query parameters.
+
+    The fields parameter is a comma separated list of field names and names of presets (defined in the field_presets
+    dictionary of the Meta class), the omit parameter is a comma separated list of field names to leave out. Without
+    these parameters all fields are serialized.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initialize the serializer and remove the fields that are not selected in the request of the context.
+
+        :param args: arguments
+        :param kwargs: keyword arguments
+        """
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        selected = None if request is None else self.get_selected_fields(request)
+        if selected is not None:
+            for name in list(self.fields):
+                if name not in selected:
+                    self.fields.pop(name)
+
+    @classmethod
+    def get_selected_fields(cls, request) -> Optional[List[str]]:
+        """
+        Get the fields selected in a request.
+
+        :param request: the request
+        :return: a list with the selected field names in the order of Meta.fields, None if no fields were selected
+        """
+        fields = request.query_params.get(FIELDS_QUERY_PARAM)
+        omit = request.query_params.get(OMIT_QUERY_PARAM)
+        if fields is None and omit is None:
+            return None
+
+        all_fields = list(cls.Meta.fields)
+        presets = getattr(cls.Meta, "field_presets", {})
+        selected = set(all_fields)
+        if fields is not None:
+            selected = set()
+            for name in _split(fields):
+                if name in presets:
+                    selected.update(presets[name])
+                elif name in all_fields:
+                    selected.add(name)
+                else:
+                    raise ValidationError(
+                        {FIELDS_QUERY_PARAM: "Unknown field or preset: {}".format(name)}
+                    )
+        if omit is not None:
+            for name in _split(omit):
+                if name not in all_fields:
+                    raise ValidationError(
+                        {OMIT_QUERY_PARAM: "Unknown field: {}".format(name)}
+                    )
+                selected.discard(name)
+        return [name for name in all_fields if name in selected]
+
+    @classmethod
+    def get_model_fields(cls, request) -> Optional[List[str]]:
+        """
+        Get the names of the model fields needed to serialize the fields selected in a request.
+
+        :param request: the request
+        :return: a list with model field names, None if all model fields are needed
+        """
+        selected = cls.get_selected_fields(request)
+        if selected is None:
+            return None
+        model = cls.Meta.model
+        serializer_fields = cls().fields
+        model_fields = [model._meta.pk.name]
+        for name in selected:
+            try:
+                field = model._meta.get_field(serializer_fields[name].source)
+            except FieldDoesNotExist:
+                # Fields with another source (like method fields) might need any model field
+                return None
+            if not field.concrete or field.many_to_many:
+                return None
+            model_fields.append(field.name)
+        return model_fields
+
+    @classmethod
+    def narrow_queryset(cls, queryset, request):
+        """
+        Load only the model fields needed to serialize the fields selected in a request.
+
+        The fields the queryset is ordered on are loaded as well, these are used by cursor pagination.
+        :param queryset: the queryset to narrow
+        :param request: the request
+        :return: the queryset loading only the needed fields
+        """
+        model_fields = cls.get_model_fields(request)
+        if model_fields is None:
+            return queryset
+        for name in queryset.query.order_by or queryset.model._meta.ordering:
+            if isinstance(name, str):
+                try:
+                    model_fields.append(
+                        queryset.model._meta.get_field(name.lstrip("-")).name
+                    )
+                except FieldDoesNotExist:
+                    # Annotations and lookups spanning relations are not deferred
+                    pass
+        return queryset.only(*dict.fromkeys(model_fields))
+
+
+class SparseFieldsetFilter(BaseFilterBackend):
+    """
+    Filter loading only the model fields needed for the fields selected with the fields and omit query parameters.
+
+    The serializer class of the view should use the SparseFieldsetSerializerMixin. Put this filter after the filters
+    that order the queryset so the ordering fields are loaded as well.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        """
+        Narrow the queryset to the selected fields.
+
+        :param request: the request
+        :param queryset: the queryset
+        :param view: the view
+        :return: the queryset loading only the needed fields
+        """
+        return view.get_serializer_class().narrow_queryset(queryset, request)
+
+    def get_schema_operation_parameters(self, view):
+        """
+        Get the schema of the fields and omit parameters.
+
+        :param view: the view
+        :return: a list with the schema of the parameters
+        """
+        presets = ", ".join(
+            getattr(view.get_serializer_class().Meta, "field_presets", {}).keys()
+        )
+        return [
+            {
+                "name": FIELDS_QUERY_PARAM,
+                "required": False,
+                "in": "query",
+                "description": "A comma separated list of fields and presets ({}) to include.".format(
+                    presets
+                ),
+                "schema": {"type": "string"},
+            },
+            {
+                "name": OMIT_QUERY_PARAM,
+                "required": False,
+                "in": "query",
+                "description": "A comma separated list of fields to leave out.",
+                "schema": {"type": "string"},
+            },
+        ]
@@ -0,0 +1,255 @@
+import base64
+import binascii
+import datetime
+import json
+from collections import OrderedDict
+from functools import reduce
+from operator import or_
+from typing import List, Optional, Tuple
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """JSON encoder for the positions in cursors, keeping the microseconds of times (DjangoJSONEncoder drops these)."""
+
+    def default(self, o):
+        """
+        Convert an object to a JSON serializable value.
+
+        :param o: the object
+        :return: the ISO format of times, the value of DjangoJSONEncoder for other objects
+        """
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class CursorOptInPagination(PageNumberPagination):
+    """
+    Page number pagination with an opt-in keyset (cursor) mode.
+
+    Requests with a cursor parameter (empty for the first page) are paginated on the ordering of the queryset with the
+    primary key as tie breaker: every page is fetched with a WHERE clause on the sort values of the previous page
+    instead of an OFFSET, and no total count is queried. Responses in this mode contain the next and previous links
+    (with opaque cursors) and the results only. Requests without a cursor parameter are paginated by page number.
+    """
+
+    cursor_query_param = "cursor"
+    cursor_query_description = (
+        "Use keyset pagination without a total count, empty for the first page, a cursor from the next or previous "
+        "link for the other pages."
+    )
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Paginate a queryset by page number or by cursor.
+
+        :param queryset: the queryset to paginate
+        :param request: the request
+        :param view: the view
+        :return: a list with the objects of the page
+        """
+        self.use_cursor = self.cursor_query_param in request.query_params
+        if not self.use_cursor:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        position, reverse = self.decode_cursor(request)
+
+        queryset = queryset.order_by(
+            *[
+                ("-" if descending != reverse else "") + field
+                for field, descending in self.ordering
+            ]
+        )
+        if position is not None:
+            try:
+                queryset = queryset.filter(self.get_keyset_filter(position, reverse))
+            except (TypeError, ValueError, ValidationError):
+                # The values of the cursor do not fit the fields of the ordering
+                raise NotFound(self.invalid_cursor_message)
+        results = list(queryset[: page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+
+        has_next = True if reverse else has_more
+        has_previous = has_more if reverse else position is not None
+        self.next_position = (
+            self.get_position(results[-1]) if has_next and results else None
+        )
+        self.previous_position = (
+            self.get_position(results[0]) if has_previous and results else None
+        )
+        return results
+
+    def get_ordering(self, queryset) -> List[Tuple[str, bool]]:
+        """
+        Get the ordering of a queryset with the primary key as last field.
+
+        :param queryset: the queryset
+        :return: a list of (field name, descending) tuples
+        """
+        ordering = []
+        for field in queryset.query.order_by or queryset.model._meta.ordering:
+            if not isinstance(field, str):
+                raise ValueError(
+                    "Cursor pagination only supports ordering on field names."
+                )
+            descending = field.startswith("-")
+            field = field.lstrip("-")
+            if field == "pk":
+                field = queryset.model._meta.pk.name
+            ordering.append((field, descending))
+            if field == queryset.model._meta.pk.name:
+                return ordering
+        ordering.append((queryset.model._meta.pk.name, False))
+        return ordering
+
+    def get_ordering_names(self) -> List[str]:
+        """
+        Get the ordering as a list of field names.
+
+        :return: a list of field names, prefixed with - if descending
+        """
+        return [
+            ("-" if descending else "") + field for field, descending in self.ordering
+        ]
+
+    def get_position(self, instance) -> list:
+        """
+        Get the sort values of an object.
+
+        :param instance: the object or a named row
+        :return: a list with the values of the ordering fields of the object
+        """
+        position = []
+        for field, _ in self.ordering:
+            try:
+                # Use the raw value of foreign keys instead of the related object
+                field = instance._meta.get_field(field).attname
+            except (AttributeError, FieldDoesNotExist):
+                # Rows of values_list(named=True) querysets have no _meta
+                pass
+            position.append(getattr(instance, field))
+        return position
+
+    def get_keyset_filter(self, position: list, reverse: bool) -> Q:
+        """
+        Get the filter selecting the objects after (or before) a position.
+
+        :param position: the sort values of the last object of the previous page
+        :param reverse: whether to select the objects before instead of after the position
+        :return: a Q object
+        """
+        conditions = []
+        equal = Q()
+        for (field, descending), value in zip(self.ordering, position):
+            lookup = "lt" if descending != reverse else "gt"
+            conditions.append(equal & Q(**{"{}__{}".format(field, lookup): value}))
+            equal &= Q(**{field: value})
+        return reduce(or_, conditions)
+
+    def encode_cursor(self, position: list, reverse: bool) -> str:
+        """
+        Encode a position into an opaque cursor.
+
+        :param position: the sort values of an object
+        :param reverse: whether the cursor selects the objects before instead of after the position
+        :return: the cursor
+        """
+        cursor = {
+            "o": self.get_ordering_names(),
+            "p": position,
+            "r": reverse,
+        }
+        return base64.urlsafe_b64encode(
+            json.dumps(cursor, cls=CursorEncoder).encode("utf-8")
+        ).decode("ascii")
+
+    def decode_cursor(self, request) -> Tuple[Optional[list], bool]:
+        """
+        Decode the cursor of a request.
+
+        :param request: the request
+        :return: a tuple with the position (None for the first page) and whether to select the objects before instead
+        of after the position
+        """
+        encoded = request.query_params.get(self.cursor_query_param, "")
+        if encoded == "":
+            return None, False
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            # A cursor of another ordering (for example of another ordering parameter) can not be used
+            if cursor["o"] != self.get_ordering_names() or len(cursor["p"]) != len(
+                self.ordering
+            ):
+                raise ValueError
+            if not all(isinstance(x, (str, int, float)) for x in cursor["p"]):
+                raise ValueError
+            return cursor["p"], bool(cursor["r"])
+        except (TypeError, KeyError, ValueError, UnicodeEncodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_cursor_link(self, position: Optional[list], reverse: bool) -> Optional[str]:
+        """
+        Get the link to the page after (or before) a position.
+
+        :param position: the sort values of an object, None if there is no such page
+        :param reverse: whether to link to the page before instead of after the position
+        :return: the absolute URL of the page or None
+        """
+        if position is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(position, reverse),
+        )
+
+    def get_paginated_response(self, data):
+        """
+        Get the response with a page.
+
+        :param data: the serialized objects of the page
+        :return: the response
+        """
+        if not self.use_cursor:
+            return super().get_paginated_response(data)
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_cursor_link(self.next_position, False)),
+                    ("previous", self.get_cursor_link(self.previous_position, True)),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_schema_operation_parameters(self, view):
+        """
+        Get the schema of the pagination parameters.
+
+        :param view: the view
+        :return: a list with the schema of the page, page size and cursor parameters
+        """
+        return super().get_schema_operation_parameters(view) + [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": self.cursor_query_description,
+                "schema": {"type": "string"},
+            }
+        ]
@@ -0,0 +1,46 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer writing bytes with orjson.
+
+    The output is the same as that of the JSONRenderer of Django REST framework: compact, UTF-8 and with U+2028 and
+    U+2029 escaped. Types orjson does not know (and datetimes, which orjson formats differently) are converted by the
+    encoder of Django REST framework. Floats in exponent notation are written without a plus sign and leading zeros in
+    the exponent, floats are not used by the endpoints using this renderer. The JSONRenderer is used when indented
+    output is requested and when orjson can not encode the data (for example integers larger than 64 bits).
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """
+        Render data into JSON.
+
+        :param data: the data to render
+        :param accepted_media_type: the accepted media type
+        :param renderer_context: the renderer context
+        :return: a bytestring with the JSON
+        """
+        if (
+            data is None
+            or self.ensure_ascii
+            or not self.compact
+            or not self.strict
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=encoders.JSONEncoder().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME
+                | orjson.OPT_PASSTHROUGH_DATACLASS,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escape U+2028 and U+2029 like the JSONRenderer, so the output is valid JavaScript
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
@@ -0,0 +1,176 @@
+import functools
+from typing import Callable, List, Optional, Tuple
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import fields as serializer_fields, relations
+from rest_framework.response import Response
+
+# Fields of which to_representation() returns database values (of the matching model fields) unchanged
+IDENTITY_FIELDS = (
+    serializer_fields.CharField,
+    serializer_fields.IntegerField,
+    serializer_fields.BooleanField,
+)
+
+
+class ValuesSerializer:
+    """
+    Serializer building the representation of objects straight from values_list() rows.
+
+    A ValuesSerializer is compiled from the fields of a ModelSerializer: every field gets the values() lookup of its
+    model field and a converter, the to_representation() method of the field or None for fields that represent
+    database values unchanged. Fields that are not backed by a model field can get a lookup with the values_sources
+    dictionary of the Meta class of the serializer, the value of the lookup is used unchanged. The output is the same
+    as that of the ModelSerializer.
+    """
+
+    def __init__(
+        self,
+        names: Tuple[str, ...],
+        sources: Tuple[str, ...],
+        converters: Tuple[Optional[Callable], ...],
+    ):
+        """
+        Initialize the serializer.
+
+        :param names: the names of the fields in the output
+        :param sources: the values() lookups of the fields
+        :param converters: the converters of the fields, None for fields of which the value is used unchanged
+        """
+        self.names = names
+        self.sources = sources
+        self.converted = [
+            (index, converter)
+            for index, converter in enumerate(converters)
+            if converter is not None
+        ]
+
+    def get_rows(self, queryset):
+        """
+        Get the rows to serialize from a queryset.
+
+        The rows contain the values of the fields followed by the values of the fields the queryset is ordered on and the
+        primary key, rows are named tuples so cursor pagination can read these.
+        :param queryset: the queryset
+        :return: a values_list() queryset with named rows
+        """
+        lookups = list(self.sources)
+        for name in [
+            *(queryset.query.order_by or queryset.model._meta.ordering),
+            queryset.model._meta.pk.name,
+        ]:
+            if isinstance(name, str) and name.lstrip("-") not in lookups:
+                lookups.append(name.lstrip("-"))
+        return queryset.values_list(*lookups, named=True)
+
+    def serialize(self, rows) -> List[dict]:
+        """
+        Serialize rows.
+
+        :param rows: an iterable of rows of get_rows()
+        :return: a list of dictionaries with the representation of the rows
+        """
+        names = self.names
+        size = len(names)
+        converted = self.converted
+        if len(converted) == 0:
+            return [dict(zip(names, row[:size])) for row in rows]
+        data = []
+        for row in rows:
+            values = list(row[:size])
+            for index, converter in converted:
+                # Like Serializer.to_representation(), None is not converted
+                if values[index] is not None:
+                    values[index] = converter(values[index])
+            data.append(dict(zip(names, values)))
+        return data
+
+
+def _get_converter(field) -> Optional[Callable]:
+    if isinstance(field, relations.PrimaryKeyRelatedField) and field.pk_field is None:
+        # values() gives the primary key instead of the related object
+        return None
+    for identity_field in IDENTITY_FIELDS:
+        if (
+            isinstance(field, identity_field)
+            and type(field).to_representation is identity_field.to_representation
+        ):
+            return None
+    return field.to_representation
+
+
+@functools.lru_cache(maxsize=128)
+def get_values_serializer(serializer_class, names: Tuple[str, ...]) -> ValuesSerializer:
+    """
+    Compile a ValuesSerializer for fields of a ModelSerializer.
+
+    :param serializer_class: the ModelSerializer class
+    :param names: the names of the fields to serialize
+    :return: the ValuesSerializer
+    :raises ValueError: if a field is not backed by a model field and has no lookup in Meta.values_sources
+    """
+    model = serializer_class.Meta.model
+    values_sources = getattr(serializer_class.Meta, "values_sources", {})
+    fields = serializer_class().fields
+    sources = []
+    converters = []
+    for name in names:
+        if name in values_sources:
+            sources.append(values_sources[name])
+            converters.append(None)
+            continue
+        field = fields[name]
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            raise ValueError("The field {} has no values() lookup.".format(name))
+        if not model_field.concrete or model_field.many_to_many:
+            raise ValueError("The field {} has no values() lookup.".format(name))
+        sources.append(model_field.name)
+        converters.append(_get_converter(field))
+    return ValuesSerializer(tuple(names), tuple(sources), tuple(converters))
+
+
+class ValuesListModelMixin:
+    """
+    List view mixin serializing the queryset with a ValuesSerializer instead of model instances.
+
+    The ValuesSerializer is compiled from the readable fields of the serializer of the view (after the fields are
+    selected with SparseFieldsetSerializerMixin, if used). Views with fields a ValuesSerializer does not support fall
+    back to the serializer.
+    """
+
+    def get_values_serializer(self) -> Optional[ValuesSerializer]:
+        """
+        Get the ValuesSerializer of the view.
+
+        :return: the ValuesSerializer or None if the fields of the serializer are not supported
+        """
+        names = tuple(
+            name
+            for name, field in self.get_serializer().fields.items()
+            if not field.write_only
+        )
+        try:
+            return get_values_serializer(self.get_serializer_class(), names)
+        except ValueError:
+            return None
+
+    def list(self, request, *args, **kwargs):
+        """
+        List the objects.
+
+        :param request: the request
+        :param args: arguments
+        :param kwargs: keyword arguments
+        :return: the (paginated) response
+        """
+        values_serializer = self.get_values_serializer()
+        if values_serializer is None:
+            return super().list(request, *args, **kwargs)
+
+        rows = values_serializer.get_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(values_serializer.serialize(page))
+        return Response(values_serializer.serialize(rows))
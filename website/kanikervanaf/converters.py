@@ -0,0 +1,240 @@
+import copy
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Marker for lookups of objects that do not exist, so repeated requests for them are cached as well
+MISSING = "missing"
+
+
+class LRUCache:
+    """Thread-safe least recently used cache with a maximum size and a timeout per entry."""
+
+    def __init__(self, max_size: int):
+        """
+        Initialize the cache.
+
+        :param max_size: the maximum amount of entries
+        """
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, timeout: float):
+        """
+        Get an entry from the cache.
+
+        :param key: the key of the entry
+        :param timeout: the maximum age of the entry in seconds
+        :return: the value of the entry or None if there is no (fresh) entry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, stored = entry
+            if time.monotonic() - stored > timeout:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """
+        Store an entry in the cache, evicting the least recently used entry if the cache is full.
+
+        :param key: the key of the entry
+        :param value: the value of the entry
+        :return: None
+        """
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove all entries from the cache.
+
+        :return: None
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+_local_cache = LRUCache(settings.CONVERTER_CACHE_SIZE)
+
+
+def get_model_label(model) -> str:
+    """
+    Get the label of a model used in cache keys.
+
+    :param model: the model class
+    :return: the label of the model, for example subscriptions.subscription
+    """
+    return model._meta.label_lower
+
+
+def get_model_version(model) -> int:
+    """
+    Get the version of the cached lookups of a model.
+
+    :param model: the model class
+    :return: the version stored in the converter cache, 0 if there is none
+    """
+    return caches[settings.CONVERTER_CACHE].get(
+        "converter-version:{}".format(get_model_label(model)), 0
+    )
+
+
+def model_changed(model):
+    """
+    Give the cached lookups of a model a new version, invalidating all of them.
+
+    Connect this to the post_save and post_delete signals of models that have cached converters. Processes that do not
+    share the converter cache only notice the new version after CONVERTER_CACHE_TIMEOUT seconds.
+    :param model: the model class
+    :return: None
+    """
+    caches[settings.CONVERTER_CACHE].set(
+        "converter-version:{}".format(get_model_label(model)),
+        secrets.randbits(62) + 1,
+        None,
+    )
+
+
+class ModelConverterMixin:
+    """
+    Mixin for URL converters that convert a URL parameter to a model instance with a query.
+
+    Use this instead of CachedModelConverterMixin for routes that save the instance, cached instances can be stale.
+    """
+
+    model = None
+    lookup_field = "pk"
+
+    def to_python(self, value):
+        """
+        Convert a URL parameter to a model instance.
+
+        :param value: the URL parameter
+        :return: the model instance or ValueError if it does not exist
+        """
+        if self.lookup_field == "pk":
+            value = int(value)
+        instance = self.model.objects.filter(**{self.lookup_field: value}).first()
+        if instance is None:
+            raise ValueError
+        return instance
+
+    def to_url(self, obj):
+        """
+        Convert a model instance to a URL parameter.
+
+        :param obj: the model instance
+        :return: the lookup field of the instance in string format
+        """
+        return str(getattr(obj, self.lookup_field))
+
+
+class CachedModelConverterMixin(ModelConverterMixin):
+    """
+    Mixin for URL converters that convert a URL parameter to a model instance.
+
+    Lookups (slug to primary key and primary key to instance) are cached in a per-process LRU cache backed by the
+    CONVERTER_CACHE Django cache, so resolving a URL usually does not cost a query. Cache keys contain the version of the
+    model (see get_version()), so changing the version invalidates all cached lookups. Every call to to_python() returns
+    a copy of the cached instance, so views can change the instance they get. The cached instance may be stale, do not
+    save it.
+    """
+
+    def get_version(self) -> int:
+        """
+        Get the version of the cached lookups.
+
+        :return: the version of the model, see model_changed()
+        """
+        return get_model_version(self.model)
+
+    def _cached(self, key: str, lookup):
+        value = _local_cache.get(key, settings.CONVERTER_CACHE_TIMEOUT)
+        if value is not None:
+            return value
+        cache = caches[settings.CONVERTER_CACHE]
+        value = cache.get(key)
+        if value is None:
+            value = lookup()
+            cache.set(key, value, settings.CONVERTER_CACHE_TIMEOUT)
+        _local_cache.set(key, value)
+        return value
+
+    def _get_key(self, version: int, field: str, value) -> str:
+        return "converter:{}:{}:{}:{}".format(
+            get_model_label(self.model), version, field, value
+        )
+
+    def get_pk(self, value, version: int):
+        """
+        Get the primary key of the instance a URL parameter refers to.
+
+        :param value: the URL parameter
+        :param version: the version of the cached lookups
+        :return: the primary key or MISSING if there is no such instance
+        """
+        if self.lookup_field == "pk":
+            return value
+
+        def lookup():
+            pk = (
+                self.model.objects.filter(**{self.lookup_field: value})
+                .values_list("pk", flat=True)
+                .first()
+            )
+            return MISSING if pk is None else pk
+
+        return self._cached(self._get_key(version, self.lookup_field, value), lookup)
+
+    def get_instance(self, pk, version: int):
+        """
+        Get a cached instance by its primary key.
+
+        :param pk: the primary key
+        :param version: the version of the cached lookups
+        :return: the cached instance (do not change it) or MISSING if it does not exist
+        """
+
+        def lookup():
+            instance = self.model.objects.filter(pk=pk).first()
+            return MISSING if instance is None else instance
+
+        return self._cached(self._get_key(version, "pk", pk), lookup)
+
+    def to_python(self, value):
+        """
+        Convert a URL parameter to a model instance.
+
+        :param value: the URL parameter
+        :return: a copy of the model instance or ValueError if it does not exist
+        """
+        if self.lookup_field == "pk":
+            value = int(value)
+        version = self.get_version()
+        pk = self.get_pk(value, version)
+        instance = MISSING if pk == MISSING else self.get_instance(pk, version)
+        if instance == MISSING:
+            raise ValueError
+        return copy.deepcopy(instance)
+
+
+def clear_converter_cache():
+    """
+    Clear the per-process converter cache.
+
+    :return: None
+    """
+    _local_cache.clear()
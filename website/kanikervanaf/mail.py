@@ -0,0 +1,100 @@
+import logging
+from smtplib import SMTPException, SMTPServerDisconnected
+from typing import Iterable, List
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+logger = logging.getLogger(__name__)
+
+# Errors after which the connection is reopened and the message is sent again
+CONNECTION_ERRORS = (SMTPServerDisconnected, ConnectionError)
+
+
+class MailDispatcher:
+    """
+    Send email messages over one reused connection.
+
+    Sending a message with EmailMessage.send() opens (and closes) a new connection for every message. The dispatcher
+    opens one connection and sends all messages over it. The connection is recycled after EMAIL_BATCH_SIZE messages as
+    most SMTP servers limit the amount of messages per session, and it is reopened when the server drops it.
+    Use the dispatcher as a context manager to close the connection afterwards.
+    """
+
+    def __init__(self, connection=None):
+        """
+        Initialize the dispatcher.
+
+        :param connection: the email backend to send messages with, defaults to the backend in EMAIL_BACKEND
+        """
+        self.connection = connection if connection is not None else get_connection()
+        self._sent_in_batch = 0
+        self._open = False
+        self.last_error = None
+
+    def __enter__(self):
+        """Open the connection."""
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the connection."""
+        self.close()
+
+    def open(self):
+        """Open the connection if it is not open already."""
+        if not self._open:
+            self.connection.open()
+            self._open = True
+            self._sent_in_batch = 0
+
+    def close(self):
+        """Close the connection, errors while closing are ignored."""
+        if self._open:
+            self._open = False
+            try:
+                self.connection.close()
+            except Exception as e:
+                logger.warning("Closing the mail connection failed: {}".format(e))
+
+    def _send(self, message: EmailMessage) -> bool:
+        if self._sent_in_batch >= settings.EMAIL_BATCH_SIZE:
+            self.close()
+        self.open()
+        message.connection = self.connection
+        sent = self.connection.send_messages([message]) == 1
+        self._sent_in_batch += 1
+        return sent
+
+    def send(self, message: EmailMessage) -> bool:
+        """
+        Send a message.
+
+        If the connection turns out to be dropped, the connection is reopened and the message is sent once more.
+        :param message: the message to send
+        :return: True if the message was sent, False otherwise, the error is stored in last_error
+        This function captures SMTPExceptions and connection errors and logs them.
+        """
+        self.last_error = None
+        try:
+            try:
+                return self._send(message)
+            except CONNECTION_ERRORS as e:
+                logger.warning("Mail connection lost, reconnecting: {}".format(e))
+                self.close()
+                return self._send(message)
+        except (SMTPException, OSError) as e:
+            logger.error(e)
+            self.last_error = str(e) or e.__class__.__name__
+            # The state of the SMTP session is unknown after an error, start a new one for the next message
+            self.close()
+            return False
+
+    def send_messages(self, messages: Iterable[EmailMessage]) -> List[bool]:
+        """
+        Send messages.
+
+        :param messages: the messages to send
+        :return: a list with for every message whether it was sent
+        """
+        return [self.send(message) for message in messages]
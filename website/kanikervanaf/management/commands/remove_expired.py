@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from outbox.models import OutboxMessage
+from subscriptions.models import QueuedMailList, DeregisterJob
+from users.models import PasswordReset, EmailUpdate
+
+
+class Command(BaseCommand):
+    """Remove expired mail lists, deregister jobs, password resets, email updates and outbox messages."""
+
+    help = (
+        "Remove expired mail lists, deregister jobs, password resets, email updates and outbox messages, run this "
+        "periodically."
+    )
+
+    def handle(self, *args, **options):
+        """Remove expired objects."""
+        for model in [
+            QueuedMailList,
+            DeregisterJob,
+            PasswordReset,
+            EmailUpdate,
+            OutboxMessage,
+        ]:
+            removed = model.remove_expired()
+            if removed > 0:
+                self.stdout.write(
+                    "Removed {} expired {}.".format(
+                        removed, model._meta.verbose_name_plural
+                    )
+                )
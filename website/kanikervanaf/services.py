@@ -1,7 +1,7 @@
-from smtplib import SMTPException
 from django.conf import settings
 from django.contrib.sites.models import Site
 from django.core.mail import EmailMultiAlternatives
+from outbox.services import queue_email
 import logging
 from django.template.loader import get_template
 
@@ -16,7 +16,7 @@ def send_contact_email(name: str, email_address: str, title: str, message: str):
     :param email_address: the email-address of the person sending the contact email
     :param title: the title of the contact email
     :param message: the message of the contact email
-    :return: True if the sending succeeded, False otherwise
+    :return: True if the mail was queued in the outbox
     """
     template = get_template("email/contact_mail.html")
     template_text = get_template("email/contact_mail.txt")
@@ -42,10 +42,5 @@ def send_contact_email(name: str, email_address: str, title: str, message: str):
     )
     msg.attach_alternative(html_content, "text/html")
 
-    try:
-        msg.send()
-    except SMTPException as e:
-        logger.error(e)
-        return False
-
+    queue_email(msg)
     return True
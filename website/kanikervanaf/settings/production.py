@@ -56,6 +56,43 @@ LOGGING = {
 if os.environ.get("GOOGLE_ANALYTICS_KEY"):
     GOOGLE_ANALYTICS_KEY = os.environ.get("GOOGLE_ANALYTICS_KEY")
 
+CACHES["rendered_artifacts"] = {
+    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+    "LOCATION": os.environ.get(
+        "DJANGO_RENDERED_ARTIFACT_CACHE_DIRECTORY",
+        "/kanikervanaf/cache/rendered-artifacts",
+    ),
+    "TIMEOUT": 24 * 60 * 60,
+    "OPTIONS": {
+        "MAX_ENTRIES": int(
+            os.environ.get("DJANGO_RENDERED_ARTIFACT_CACHE_ENTRIES", 2000)
+        )
+    },
+}
+
+CACHES["catalog_pages"] = {
+    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+    "LOCATION": os.environ.get(
+        "DJANGO_CATALOG_PAGE_CACHE_DIRECTORY", "/kanikervanaf/cache/catalog-pages"
+    ),
+    "OPTIONS": {
+        "MAX_ENTRIES": int(os.environ.get("DJANGO_CATALOG_PAGE_CACHE_ENTRIES", 5000))
+    },
+}
+
+CACHES["shared"] = {
+    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+    "LOCATION": os.environ.get(
+        "DJANGO_SHARED_CACHE_DIRECTORY", "/kanikervanaf/cache/shared"
+    ),
+    "OPTIONS": {
+        "MAX_ENTRIES": int(os.environ.get("DJANGO_SHARED_CACHE_ENTRIES", 5000))
+    },
+}
+
+PDF_RENDER_BACKEND = os.environ.get("DJANGO_PDF_RENDER_BACKEND", "pool")
+PDF_RENDER_WORKERS = int(os.environ.get("DJANGO_PDF_RENDER_WORKERS", 4))
+
 if os.environ.get("DJANGO_EMAIL_HOST"):
     EMAIL_HOST = os.environ["DJANGO_EMAIL_HOST"]
     EMAIL_PORT = os.environ["DJANGO_EMAIL_PORT"]
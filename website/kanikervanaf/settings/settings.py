@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.0/ref/settings/
 """
 
+import datetime
 import os
 
 # SECURITY WARNING: keep the secret key used in production secret!
@@ -34,6 +35,7 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "django.contrib.sitemaps",
     "django.contrib.sites",
+    "django.contrib.postgres",
     "django_cleanup.apps.CleanupConfig",
     "admin_auto_filters",
     "import_export",
@@ -48,6 +50,7 @@ INSTALLED_APPS = [
     "subscriptions",
     "users",
     "posts",
+    "outbox",
 ]
 
 AUTH_USER_MODEL = "users.User"
@@ -169,3 +172,125 @@ DEFAULT_TEMPLATE_PARAMETERS = {
 }
 
 CUSTOMER_SERVICE_EMAIL = "klantenservice@kanikervanaf.nl"
+
+# Deregister jobs (handled by ./manage.py run_deregister_worker)
+DEREGISTER_JOB_MAX_ATTEMPTS = 3
+# Delay in seconds before the first retry of a failed job, doubled on every next attempt
+DEREGISTER_JOB_RETRY_DELAY = 60
+# Time in seconds after which a running job is considered abandoned by its worker
+DEREGISTER_JOB_TIMEOUT = 10 * 60
+# Finished jobs are removed by ./manage.py remove_expired after DEREGISTER_JOB_RETENTION
+DEREGISTER_JOB_RETENTION = datetime.timedelta(days=7)
+
+# Backend for rendering PDF documents and batches of letters, either "serial" (render in the current process) or "pool" (fan out over a pool of
+# PDF_RENDER_WORKERS processes)
+PDF_RENDER_BACKEND = "serial"
+PDF_RENDER_WORKERS = 4
+
+# Maximum number of compiled letter and email templates kept in memory per process
+COMPILED_TEMPLATE_CACHE_SIZE = 128
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "rendered_artifacts": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "rendered-artifacts",
+        "TIMEOUT": 24 * 60 * 60,
+        "OPTIONS": {"MAX_ENTRIES": 500},
+    },
+    "catalog_pages": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "catalog-pages",
+        "OPTIONS": {"MAX_ENTRIES": 2000},
+    },
+    "shared": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "shared",
+    },
+}
+
+# Cache alias, maximum number of entries per process and timeout in seconds of the lookups of cached URL converters, the
+# cache should be shared between processes as the versions of the cached lookups of posts are kept in it
+CONVERTER_CACHE = "shared"
+CONVERTER_CACHE_SIZE = 1024
+CONVERTER_CACHE_TIMEOUT = 60
+
+# Cache alias and timeout in seconds of the catalog pages and fragments (see subscriptions.page_cache), the cache should
+# be shared between processes as changes to the catalog are purged in the cache of the process making the change only
+CATALOG_PAGE_CACHE = "catalog_pages"
+CATALOG_PAGE_CACHE_TIMEOUT = 10 * 60
+
+# Cache alias, maximum number of entries and timeout in seconds of the leaderboards of most popular subscriptions, the
+# cache should be shared between processes as the leaderboards are updated by ./manage.py rollup_deregistrations
+LEADERBOARD_CACHE = "shared"
+LEADERBOARD_SIZE = 100
+LEADERBOARD_TIMEOUT = 60
+
+# Deregistrations are rolled up (see subscriptions/rollups.py) from the last rolled up hour, going back at least
+# DEREGISTRATION_ROLLUP_LOOKBACK to include late commits, deregistration events and hourly rollups are kept for
+# DEREGISTRATION_EVENT_RETENTION
+DEREGISTRATION_ROLLUP_LOOKBACK = datetime.timedelta(hours=1)
+DEREGISTRATION_EVENT_RETENTION = datetime.timedelta(days=14)
+
+# Number of days (including today) of the ranking of trending subscriptions
+TRENDING_DAYS = 7
+
+# Cache alias used for rendered letters and emails, artifacts larger than RENDERED_ARTIFACT_MAX_SIZE bytes are not cached
+RENDERED_ARTIFACT_CACHE = "rendered_artifacts"
+RENDERED_ARTIFACT_MAX_SIZE = 2 * 1024 * 1024
+
+# Directory for scratch files when converting PDF documents to Word documents, defaults to /dev/shm if available
+DOCX_SCRATCH_DIRECTORY = None
+
+# Maximum number of subscriptions in one request to the render-letters API endpoint
+RENDER_LETTERS_MAX_BATCH_SIZE = 50
+
+# Maximum number of emails sent over one SMTP connection before it is reopened
+EMAIL_BATCH_SIZE = 100
+
+# Outbox (sent by ./manage.py run_outbox_worker)
+OUTBOX_MAX_ATTEMPTS = 5
+# Delay in seconds before the first retry of a failed message, doubled on every next attempt
+OUTBOX_RETRY_DELAY = 60
+# Time in seconds after which a message that is being sent is considered abandoned by its worker
+OUTBOX_SENDING_TIMEOUT = 10 * 60
+# At most OUTBOX_DOMAIN_RATE_LIMIT messages are sent to one domain per OUTBOX_DOMAIN_RATE_PERIOD seconds
+OUTBOX_DOMAIN_RATE_LIMIT = 30
+OUTBOX_DOMAIN_RATE_PERIOD = 60
+# Sent and dead messages are removed by ./manage.py remove_expired after OUTBOX_RETENTION
+OUTBOX_RETENTION = datetime.timedelta(days=7)
+
+# Maximum number of subscriptions in one deregister request
+MAX_SUBSCRIPTIONS_PER_REQUEST = 100
+
+# Text search configuration used for the subscription search vectors on PostgreSQL
+SEARCH_CONFIG = "simple"
+
+# Weight of the popularity (amount_used) of a subscription in the search ranking, relative to the text relevance
+SEARCH_POPULARITY_WEIGHT = 0.05
+
+# Maximum number of full text matches that are ranked in a subscription search on SQLite
+SEARCH_MAX_RESULTS = 500
+
+# Maximum number of results of a fuzzy subscription search
+FUZZY_SEARCH_RESULTS = 5
+
+# Minimum trigram similarity (between 0 and 1) of a fuzzy search result
+FUZZY_SEARCH_THRESHOLD = 0.3
+
+# Maximum number of seconds to spend on a fuzzy search
+FUZZY_SEARCH_BUDGET = 0.05
+
+# Maximum number of results of an autocompletion
+AUTOCOMPLETE_RESULTS = 8
+
+# Number of seconds clients may cache an autocompletion
+AUTOCOMPLETE_MAX_AGE = 60
+
+# Number of seconds a process serves its catalog snapshot before checking whether the catalog changed
+CATALOG_VERSION_CHECK_INTERVAL = 5
+
+# Number of seconds after which a catalog snapshot is rebuilt to pick up changed popularity (amount_used)
+CATALOG_SNAPSHOT_MAX_AGE = 600
@@ -0,0 +1,26 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from freezegun import freeze_time
+
+from users.models import User, PasswordReset, EmailUpdate
+
+
+class KanikervanafCommands(TestCase):
+    def test_remove_expired(self):
+        user = User.objects.create_user("test", "test@test.com", "password")
+        with freeze_time("2022-01-01 11:00"):
+            PasswordReset.generate(user)
+            EmailUpdate.generate(user, "new@test.com")
+        with freeze_time("2022-01-01 12:30"):
+            reset = PasswordReset.generate(user)
+            update = EmailUpdate.generate(user, "new@test.com")
+            self.assertCountEqual(PasswordReset.unexpired(), [reset])
+
+            output = StringIO()
+            call_command("remove_expired", stdout=output)
+        self.assertIn("Removed 1 expired password resets.", output.getvalue())
+        self.assertIn("Removed 1 expired email updates.", output.getvalue())
+        self.assertCountEqual(PasswordReset.objects.all(), [reset])
+        self.assertCountEqual(EmailUpdate.objects.all(), [update])
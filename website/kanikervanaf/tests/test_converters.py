@@ -0,0 +1,112 @@
+from django.core.cache import caches
+from django.test import TestCase
+from freezegun import freeze_time
+
+from kanikervanaf.converters import clear_converter_cache, LRUCache
+from posts.converters import PostConverter
+from posts.models import Post
+from subscriptions.catalog import get_catalog, recheck_catalog
+from subscriptions.converters import (
+    SubscriptionConverter,
+    SubscriptionCategoryConverter,
+    SubscriptionPkConverter,
+)
+from subscriptions.models import Subscription
+
+
+class LRUCacheTest(TestCase):
+    def test_eviction(self):
+        cache = LRUCache(2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.get("a", 60), 1)
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b", 60))
+        self.assertEqual(cache.get("a", 60), 1)
+        self.assertEqual(cache.get("c", 60), 3)
+
+    def test_timeout(self):
+        cache = LRUCache(2)
+        with freeze_time("2026-10-18 12:00:00"):
+            cache.set("a", 1)
+        with freeze_time("2026-10-18 12:00:30"):
+            self.assertEqual(cache.get("a", 60), 1)
+        with freeze_time("2026-10-18 12:01:01"):
+            self.assertIsNone(cache.get("a", 60))
+
+
+class ConverterTest(TestCase):
+    fixtures = ["subscriptions.json"]
+
+    def setUp(self):
+        clear_converter_cache()
+        caches["shared"].clear()
+        recheck_catalog()
+        get_catalog()
+
+    def test_subscription_converter(self):
+        converter = SubscriptionConverter()
+        with self.assertNumQueries(2):
+            subscription = converter.to_python("new-york-times")
+        self.assertEqual(subscription.id, 10)
+        with self.assertNumQueries(0):
+            cached = converter.to_python("new-york-times")
+        self.assertEqual(cached, subscription)
+        self.assertIsNot(cached, subscription)
+        self.assertEqual(converter.to_url(cached), "new-york-times")
+
+        # Changes to a returned instance do not end up in the cache
+        cached.name = "Changed"
+        self.assertEqual(converter.to_python("new-york-times").name, "New York Times")
+
+        self.assertEqual(SubscriptionPkConverter().to_python("10"), subscription)
+        self.assertEqual(
+            SubscriptionCategoryConverter().to_python("fitness").slug, "fitness"
+        )
+
+    def test_missing(self):
+        converter = SubscriptionConverter()
+        with self.assertRaises(ValueError):
+            converter.to_python("does-not-exist")
+        with self.assertNumQueries(0):
+            with self.assertRaises(ValueError):
+                converter.to_python("does-not-exist")
+        with self.assertRaises(ValueError):
+            SubscriptionPkConverter().to_python("1000")
+
+    def test_pk_converter_is_not_cached(self):
+        converter = SubscriptionPkConverter()
+        self.assertEqual(converter.to_python("10").amount_used, 6)
+        Subscription.objects.filter(id=10).update(amount_used=7)
+        with self.assertNumQueries(1):
+            self.assertEqual(converter.to_python("10").amount_used, 7)
+
+    def test_shared_cache(self):
+        converter = SubscriptionConverter()
+        converter.to_python("new-york-times")
+        clear_converter_cache()
+        with self.assertNumQueries(0):
+            self.assertEqual(converter.to_python("new-york-times").id, 10)
+
+    def test_invalidation(self):
+        converter = SubscriptionConverter()
+        converter.to_python("new-york-times")
+        subscription = Subscription.objects.get(id=10)
+        subscription.slug = "nyt"
+        subscription.save()
+        with self.assertRaises(ValueError):
+            converter.to_python("new-york-times")
+        self.assertEqual(converter.to_python("nyt").id, 10)
+
+    def test_post_converter(self):
+        post = Post.objects.create(title="Title", content="Content")
+        converter = PostConverter()
+        self.assertEqual(converter.to_python(str(post.id)).title, "Title")
+        with self.assertNumQueries(0):
+            converter.to_python(str(post.id))
+        post.title = "Changed"
+        post.save()
+        self.assertEqual(converter.to_python(str(post.id)).title, "Changed")
+        post.delete()
+        with self.assertRaises(ValueError):
+            converter.to_python(str(post.id))
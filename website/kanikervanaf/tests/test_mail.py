@@ -0,0 +1,81 @@
+from smtplib import SMTPRecipientsRefused, SMTPServerDisconnected
+
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from mock import patch
+
+from kanikervanaf.mail import MailDispatcher
+
+
+class CountingBackend(EmailBackend):
+    """Locmem backend that counts opened connections and can fail on specific sends."""
+
+    def __init__(self, *args, failures=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.opened = 0
+        self.failures = list(failures or [])
+
+    def open(self):
+        self.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        if len(self.failures) > 0:
+            failure = self.failures.pop(0)
+            if failure is not None:
+                raise failure
+        return super().send_messages(messages)
+
+
+def message(subject):
+    return EmailMessage(subject, "Body", "from@test.com", ["to@test.com"])
+
+
+class MailDispatcherTest(TestCase):
+    def test_send_messages_reuses_connection(self):
+        backend = CountingBackend()
+        with MailDispatcher(connection=backend) as dispatcher:
+            self.assertEqual(
+                dispatcher.send_messages([message("First"), message("Second")]),
+                [True, True],
+            )
+            self.assertTrue(dispatcher.send(message("Third")))
+        self.assertEqual(backend.opened, 1)
+        self.assertEqual(len(mail.outbox), 3)
+
+    @override_settings(EMAIL_BATCH_SIZE=2)
+    def test_send_messages_recycles_connection(self):
+        backend = CountingBackend()
+        with MailDispatcher(connection=backend) as dispatcher:
+            dispatcher.send_messages([message(str(i)) for i in range(5)])
+        self.assertEqual(backend.opened, 3)
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_send_reconnects(self):
+        backend = CountingBackend(failures=[SMTPServerDisconnected("Gone")])
+        with MailDispatcher(connection=backend) as dispatcher:
+            self.assertTrue(dispatcher.send(message("First")))
+        self.assertEqual(backend.opened, 2)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_send_failure(self):
+        backend = CountingBackend(
+            failures=[SMTPRecipientsRefused({}), None],
+        )
+        with MailDispatcher(connection=backend) as dispatcher:
+            self.assertEqual(
+                dispatcher.send_messages([message("First"), message("Second")]),
+                [False, True],
+            )
+        self.assertEqual([m.subject for m in mail.outbox], ["Second"])
+
+    def test_default_connection(self):
+        with patch(
+            "kanikervanaf.mail.get_connection", return_value=CountingBackend()
+        ) as get_connection:
+            with MailDispatcher() as dispatcher:
+                dispatcher.send(message("First"))
+                dispatcher.send(message("Second"))
+        get_connection.assert_called_once()
@@ -0,0 +1,140 @@
+import base64
+import datetime
+import json
+from urllib.parse import parse_qs, urlparse
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Post, STATUS_PUBLISHED
+from subscriptions.models import Subscription
+
+
+class CursorPaginationTest(TestCase):
+    fixtures = ["subscriptions.json"]
+
+    def get_all(self, url, params):
+        """Follow the next links and return the pages."""
+        pages = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.json())
+            if pages[-1]["next"] is None:
+                return pages
+            response = self.client.get(pages[-1]["next"])
+
+    def get_names(self, pages):
+        return [x["name"] for page in pages for x in page["results"]]
+
+    def test_subscriptions(self):
+        url = reverse("v1:subscription_list")
+        # The first page does not count the subscriptions
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {"cursor": "", "page_size": 5})
+        self.assertNotIn("count", response.json())
+        self.assertIsNone(response.json()["previous"])
+
+        pages = self.get_all(url, {"cursor": "", "page_size": 5})
+        self.assertEqual(
+            self.get_names(pages),
+            list(Subscription.objects.order_by("name").values_list("name", flat=True)),
+        )
+        self.assertTrue(all(len(page["results"]) <= 5 for page in pages))
+
+        # The previous link of the last page returns the page before it
+        previous = self.client.get(pages[-1]["previous"]).json()
+        self.assertEqual(previous["results"], pages[-2]["results"])
+        self.assertEqual(previous["next"], pages[-2]["next"])
+
+    def test_subscriptions_ordering(self):
+        url = reverse("v1:subscription_list")
+        pages = self.get_all(
+            url, {"cursor": "", "page_size": 3, "ordering": "-amount_used"}
+        )
+        self.assertEqual(
+            [x["id"] for page in pages for x in page["results"]],
+            list(
+                Subscription.objects.order_by("-amount_used", "id").values_list(
+                    "id", flat=True
+                )
+            ),
+        )
+        pages = self.get_all(
+            url, {"cursor": "", "page_size": 1, "q": "fit", "category": 9}
+        )
+        self.assertEqual(len(self.get_names(pages)), 3)
+
+    def test_page_numbers(self):
+        response = self.client.get(reverse("v1:subscription_list"), {"page_size": 5})
+        self.assertEqual(response.json()["count"], Subscription.objects.count())
+
+    def test_invalid_cursor(self):
+        url = reverse("v1:subscription_list")
+        self.assertEqual(self.client.get(url, {"cursor": "invalid"}).status_code, 404)
+        response = self.client.get(url, {"cursor": "", "page_size": 1})
+        # A cursor can not be used with another ordering
+        self.assertEqual(
+            self.client.get(
+                response.json()["next"] + "&ordering=amount_used"
+            ).status_code,
+            404,
+        )
+
+    def test_cursor_with_invalid_values(self):
+        for _ in range(2):
+            Post.objects.create(
+                title="Title", content="Content", status=STATUS_PUBLISHED
+            )
+        for url in [reverse("v1:subscription_list"), reverse("v1:post_list")]:
+            with self.subTest(url=url):
+                response = self.client.get(url, {"cursor": "", "page_size": 1})
+                cursor = json.loads(
+                    base64.urlsafe_b64decode(
+                        parse_qs(urlparse(response.json()["next"]).query)["cursor"][0]
+                    )
+                )
+                # Strings are not valid values of the primary key and the creation time
+                cursor["p"] = ["x" for _ in cursor["p"]]
+                response = self.client.get(
+                    url,
+                    {
+                        "cursor": base64.urlsafe_b64encode(
+                            json.dumps(cursor).encode("utf-8")
+                        ).decode("ascii"),
+                        "page_size": 1,
+                    },
+                )
+                self.assertEqual(response.status_code, 404)
+
+    def test_posts(self):
+        now = timezone.now()
+        for i in range(5):
+            post = Post.objects.create(
+                title="Post {}".format(i), content="Content", status=STATUS_PUBLISHED
+            )
+            # Posts created at the same time are ordered by their id
+            Post.objects.filter(id=post.id).update(
+                created_on=now - datetime.timedelta(days=i // 2)
+            )
+        pages = self.get_all(reverse("v1:post_list"), {"cursor": "", "page_size": 2})
+        self.assertEqual(
+            [x["title"] for page in pages for x in page["results"]],
+            ["Post 0", "Post 1", "Post 2", "Post 3", "Post 4"],
+        )
+
+    def test_posts_created_in_the_same_millisecond(self):
+        now = timezone.now().replace(microsecond=1500)
+        for i in range(2):
+            post = Post.objects.create(
+                title="Post {}".format(i), content="Content", status=STATUS_PUBLISHED
+            )
+            Post.objects.filter(id=post.id).update(
+                created_on=now - datetime.timedelta(microseconds=i)
+            )
+        pages = self.get_all(reverse("v1:post_list"), {"cursor": "", "page_size": 1})
+        self.assertEqual(
+            [x["title"] for page in pages for x in page["results"]],
+            ["Post 0", "Post 1"],
+        )
@@ -1,5 +1,6 @@
 from django.test import TestCase
 from django.core import mail
+from outbox.services import send_queued_messages
 from kanikervanaf.services import send_contact_email
 
 
@@ -9,4 +10,6 @@ class KanikervanafServices(TestCase):
             send_contact_email("Test name", "test@test.com", "Test title", "content"),
             True,
         )
+        self.assertEqual(len(mail.outbox), 0)
+        send_queued_messages()
         self.assertEqual(len(mail.outbox), 1)
@@ -0,0 +1,138 @@
+import datetime
+import decimal
+import uuid
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from mock import patch
+from rest_framework.renderers import JSONRenderer
+
+from kanikervanaf.api.renderers import FastJSONRenderer
+from posts.models import Post, STATUS_PUBLISHED
+from subscriptions.api.v1.serializers import SubscriptionSerializer
+from subscriptions.catalog import recheck_catalog
+from subscriptions.models import Subscription
+
+User = get_user_model()
+
+
+class FastJSONRendererTest(TestCase):
+    def test_same_output(self):
+        data = {
+            "string": 'Quotes " and \\ backslashes, unicode é 漢字 🎉 and   ',
+            "control": "\x00\x01\n\t\x7f",
+            "datetime": datetime.datetime(
+                2026, 10, 18, 12, 0, 0, 123456, tzinfo=datetime.timezone.utc
+            ),
+            "date": datetime.date(2026, 10, 18),
+            "decimal": decimal.Decimal("9.99"),
+            "uuid": uuid.UUID("12345678123456781234567812345678"),
+            "lazy": gettext_lazy("Lazy"),
+            "list": [1, True, False, None, 0.5, {"nested": ()}],
+            "large": 2**64,
+        }
+        for value in [data, [data], {}, []]:
+            self.assertEqual(
+                FastJSONRenderer().render(value), JSONRenderer().render(value)
+            )
+        self.assertEqual(FastJSONRenderer().render(None), b"")
+        self.assertEqual(
+            FastJSONRenderer().render(data, "application/json; indent=4"),
+            JSONRenderer().render(data, "application/json; indent=4"),
+        )
+
+    def test_line_separators_are_escaped(self):
+        self.assertEqual(
+            FastJSONRenderer().render({"a": "\u2028\u2029"}), b'{"a":"\\u2028\\u2029"}'
+        )
+
+
+class ValuesSerializationTest(TestCase):
+    fixtures = ["subscriptions.json"]
+
+    def setUp(self):
+        recheck_catalog()
+        user = User.objects.create_user("writer", "writer@test.com", "password")
+        post = Post.objects.create(
+            title="Ünïcode   title",
+            content='<p class="x">Content</p>',
+            author=user,
+            status=STATUS_PUBLISHED,
+        )
+        Post.objects.create(
+            title="Reaction",
+            content="Anonymous",
+            response_to=post,
+            status=STATUS_PUBLISHED,
+        )
+        Subscription.objects.filter(slug="new-york-times").update(
+            price=decimal.Decimal("12.5"),
+            explanation_field='<p>"Quoted" explanation</p>\n ',
+            support_email="support@nyt.com",
+        )
+
+    def get_content(self, url, params):
+        """Get the content of a response of the fast path and of the ModelSerializer and JSONRenderer."""
+        with patch(
+            "kanikervanaf.api.values.ValuesListModelMixin.get_values_serializer",
+            return_value=None,
+        ), patch.object(FastJSONRenderer, "render", JSONRenderer.render):
+            expected = self.client.get(url, params)
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, expected.status_code)
+        return response.content, expected.content
+
+    def test_subscriptions(self):
+        url = reverse("v1:subscription_list")
+        for params in [
+            {},
+            {"page_size": 5, "page": 2},
+            {"ordering": "-amount_used"},
+            {"fields": "minimal"},
+            {"omit": "explanation_field", "category": 8},
+            {"q": "fit"},
+            {"search": "data"},
+            {"cursor": "", "page_size": 3},
+        ]:
+            with self.subTest(params=params):
+                content, expected = self.get_content(url, params)
+                self.assertEqual(content, expected)
+
+    def test_categories(self):
+        content, expected = self.get_content(
+            reverse("v1:subscription_category_list"), {"page_size": 5}
+        )
+        self.assertEqual(content, expected)
+
+    def test_posts(self):
+        for params in [{"cursor": "", "page_size": 1}, {}]:
+            with self.subTest(params=params):
+                content, expected = self.get_content(reverse("v1:post_list"), params)
+                self.assertEqual(content, expected)
+        self.assertIn(b'"author":"writer"', content)
+
+    def test_unsupported_fields(self):
+        class Serializer(SubscriptionSerializer):
+            class Meta(SubscriptionSerializer.Meta):
+                values_sources = {}
+
+        with patch(
+            "subscriptions.api.v1.views.SubscriptionListAPIView.serializer_class",
+            Serializer,
+        ):
+            response = self.client.get(reverse("v1:subscription_list"))
+        self.assertEqual(response.status_code, 200)
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command(
+            "benchmark_serialization", "--sizes", "3", "30", "--repeat", "1", stdout=out
+        )
+        self.assertIn("30 rows: ModelSerializer", out.getvalue())
+        self.assertFalse(
+            Subscription.objects.filter(slug__startswith="benchmark").exists()
+        )
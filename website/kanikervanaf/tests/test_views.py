@@ -1,6 +1,7 @@
 from django.urls import reverse
 from django.test import TestCase
 from django.core import mail
+from outbox.services import send_queued_messages
 
 
 class KanikervanafViews(TestCase):
@@ -28,6 +29,7 @@ class KanikervanafViews(TestCase):
             },
         )
         self.assertEqual(response_post.status_code, 200)
+        send_queued_messages()
         self.assertEqual(len(mail.outbox), 1)
 
     def test_sitemap_view(self):
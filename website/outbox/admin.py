@@ -0,0 +1,45 @@
+from django.contrib import admin, messages
+from django.utils import timezone
+
+from .models import OutboxMessage, OutboxAttachment
+
+
+class OutboxAttachmentInline(admin.TabularInline):
+    """Inline for outbox attachments."""
+
+    model = OutboxAttachment
+    fields = ["filename", "mimetype"]
+    readonly_fields = ["filename", "mimetype"]
+    extra = 0
+    can_delete = False
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    """Admin model for outbox messages."""
+
+    list_display = ["subject", "to", "status", "attempts", "created", "sent"]
+    list_filter = ["status", "domain"]
+    search_fields = ["subject", "to"]
+    # The content of messages may contain personal data and links with tokens
+    exclude = ["body", "alternatives"]
+    readonly_fields = ["domain", "attempts", "last_error", "created", "started", "sent"]
+    inlines = [OutboxAttachmentInline]
+
+    actions = ["retry"]
+
+    def retry(self, request, queryset):
+        """
+        Put a QuerySet of dead messages back in the outbox.
+
+        :param request: the request
+        :param queryset: the queryset of outbox messages
+        :return: the request
+        """
+        messages.success(
+            request,
+            f"{queryset.filter(status=OutboxMessage.STATUS_DEAD).update(status=OutboxMessage.STATUS_PENDING, attempts=0, available_at=timezone.now())} messages were put back in the outbox",
+        )
+        return request
+
+    retry.short_description = "Retry selected dead messages"
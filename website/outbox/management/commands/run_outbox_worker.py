@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from outbox.services import send_queued_messages
+
+
+class Command(BaseCommand):
+    """Run a worker that sends the messages in the outbox."""
+
+    help = "Run a worker that sends the messages in the outbox."
+
+    def add_arguments(self, parser):
+        """Add arguments to the command."""
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Send all messages that are ready and exit afterwards.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=2.0,
+            help="Seconds to wait before checking for new messages when the outbox is empty.",
+        )
+
+    def handle(self, *args, **options):
+        """Run the worker."""
+        while True:
+            close_old_connections()
+            amount = send_queued_messages()
+            if amount > 0:
+                self.stdout.write("Handled {} outbox message(s).".format(amount))
+            if options["once"]:
+                break
+            if amount == 0:
+                time.sleep(options["sleep"])
@@ -0,0 +1,231 @@
+import datetime
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+
+def get_domain(email_address: str) -> str:
+    """
+    Get the domain of an email address.
+
+    :param email_address: the email address, optionally with a display name ("Name <name@example.com>")
+    :return: the domain in lower case or an empty string if the address has no domain
+    """
+    return email_address.rstrip(">").rpartition("@")[2].lower()
+
+
+class OutboxMessage(models.Model):
+    """Email message waiting in the outbox to be sent by the outbox worker."""
+
+    STATUS_PENDING = "pending"
+    STATUS_SENDING = "sending"
+    STATUS_SENT = "sent"
+    STATUS_DEAD = "dead"
+
+    STATUS = (
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENDING, "Sending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_DEAD, "Dead"),
+    )
+
+    subject = models.CharField(max_length=998)
+    body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254, blank=True)
+    to = models.JSONField(default=list, blank=True)
+    cc = models.JSONField(default=list, blank=True)
+    bcc = models.JSONField(default=list, blank=True)
+    reply_to = models.JSONField(default=list, blank=True)
+    alternatives = models.JSONField(
+        default=list, blank=True, help_text="A list of [content, mimetype] pairs."
+    )
+    domain = models.CharField(
+        max_length=254,
+        blank=True,
+        db_index=True,
+        help_text="The domain of the first recipient, used for rate limiting.",
+    )
+    status = models.CharField(
+        max_length=16, choices=STATUS, default=STATUS_PENDING, db_index=True
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    available_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="The message will not be picked up by a worker before this time.",
+    )
+    started = models.DateTimeField(null=True, blank=True)
+    sent = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        """Meta class."""
+
+        indexes = [
+            models.Index(fields=["status", "available_at"]),
+            models.Index(fields=["domain", "status", "sent"]),
+        ]
+
+    def __str__(self):
+        """
+        Convert this object to a string.
+
+        :return: a string with the subject, the recipients and the status
+        """
+        return "{} to {}, status: {}".format(
+            self.subject, ", ".join(self.to), self.status
+        )
+
+    def save(self, *args, **kwargs):
+        """Save the message, setting the domain from the recipients."""
+        recipients = self.to + self.cc + self.bcc
+        if len(recipients) > 0:
+            self.domain = get_domain(recipients[0])
+        super(OutboxMessage, self).save(*args, **kwargs)
+
+    @staticmethod
+    def claim_next():
+        """
+        Claim the next message that is ready to be sent.
+
+        Messages that are being sent for longer than OUTBOX_SENDING_TIMEOUT seconds are considered abandoned by their
+        worker and are claimed again.
+        :return: the claimed OutboxMessage or None if there are no messages ready to be sent
+        """
+        now = timezone.now()
+        abandoned_before = now - datetime.timedelta(
+            seconds=settings.OUTBOX_SENDING_TIMEOUT
+        )
+        with transaction.atomic():
+            message = (
+                OutboxMessage.objects.select_for_update(skip_locked=True)
+                .filter(
+                    Q(status=OutboxMessage.STATUS_PENDING, available_at__lte=now)
+                    | Q(
+                        status=OutboxMessage.STATUS_SENDING,
+                        started__lte=abandoned_before,
+                    )
+                )
+                .order_by("available_at", "id")
+                .first()
+            )
+            if message is None:
+                return None
+            message.status = OutboxMessage.STATUS_SENDING
+            message.started = now
+            message.save(update_fields=["status", "started"])
+        return message
+
+    def is_rate_limited(self) -> bool:
+        """
+        Check whether the domain of this message received the maximum amount of messages in the current period.
+
+        At most OUTBOX_DOMAIN_RATE_LIMIT messages are sent to a domain per OUTBOX_DOMAIN_RATE_PERIOD seconds.
+        :return: True if this message may not be sent yet, False otherwise
+        """
+        if self.domain == "":
+            return False
+        sent_after = timezone.now() - datetime.timedelta(
+            seconds=settings.OUTBOX_DOMAIN_RATE_PERIOD
+        )
+        return (
+            OutboxMessage.objects.filter(
+                domain=self.domain,
+                status=OutboxMessage.STATUS_SENT,
+                sent__gt=sent_after,
+            ).count()
+            >= settings.OUTBOX_DOMAIN_RATE_LIMIT
+        )
+
+    def defer(self, seconds: float):
+        """
+        Put this message back in the outbox without counting it as an attempt.
+
+        :param seconds: the amount of seconds to wait before the message may be sent
+        :return: None
+        """
+        self.status = OutboxMessage.STATUS_PENDING
+        self.available_at = timezone.now() + datetime.timedelta(seconds=seconds)
+        self.save(update_fields=["status", "available_at"])
+
+    def mark_sent(self):
+        """
+        Mark this message as sent.
+
+        The content of the message (which may contain personal data and links with tokens) is removed, the subject and
+        the recipients are kept until the message is removed by remove_expired().
+        :return: None
+        """
+        self.status = OutboxMessage.STATUS_SENT
+        self.attempts += 1
+        self.sent = timezone.now()
+        self.last_error = ""
+        self.body = ""
+        self.alternatives = []
+        with transaction.atomic():
+            self.save(
+                update_fields=[
+                    "status",
+                    "attempts",
+                    "sent",
+                    "last_error",
+                    "body",
+                    "alternatives",
+                ]
+            )
+            self.attachments.all().delete()
+
+    def mark_failed(self, error: str):
+        """
+        Mark this attempt of sending this message as failed.
+
+        The message is put back in the outbox with an exponential backoff as long as it has attempts left, otherwise it
+        is marked as dead.
+        :param error: a description of the error
+        :return: None
+        """
+        self.attempts += 1
+        self.last_error = error
+        if self.attempts < settings.OUTBOX_MAX_ATTEMPTS:
+            self.status = OutboxMessage.STATUS_PENDING
+            self.available_at = timezone.now() + datetime.timedelta(
+                seconds=settings.OUTBOX_RETRY_DELAY * 2 ** (self.attempts - 1)
+            )
+        else:
+            self.status = OutboxMessage.STATUS_DEAD
+        self.save(update_fields=["status", "attempts", "last_error", "available_at"])
+
+    @staticmethod
+    def remove_expired():
+        """
+        Remove sent and dead messages older than OUTBOX_RETENTION.
+
+        :return: the amount of removed OutboxMessage objects
+        """
+        expired_before = timezone.now() - settings.OUTBOX_RETENTION
+        _, deleted = OutboxMessage.objects.filter(
+            Q(status=OutboxMessage.STATUS_SENT, sent__lte=expired_before)
+            | Q(status=OutboxMessage.STATUS_DEAD, created__lte=expired_before)
+        ).delete()
+        return deleted.get(OutboxMessage._meta.label, 0)
+
+
+class OutboxAttachment(models.Model):
+    """Attachment of an OutboxMessage."""
+
+    message = models.ForeignKey(
+        OutboxMessage, on_delete=models.CASCADE, related_name="attachments"
+    )
+    filename = models.CharField(max_length=255)
+    content = models.BinaryField()
+    mimetype = models.CharField(max_length=255)
+
+    def __str__(self):
+        """
+        Convert this object to a string.
+
+        :return: the filename of the attachment
+        """
+        return self.filename
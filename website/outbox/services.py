@@ -0,0 +1,111 @@
+import logging
+
+from django.conf import settings
+from django.core.mail import EmailMessage, EmailMultiAlternatives
+from django.db import transaction
+
+from kanikervanaf.mail import MailDispatcher
+from .models import OutboxMessage, OutboxAttachment
+
+logger = logging.getLogger(__name__)
+
+
+def queue_email(message: EmailMessage) -> OutboxMessage:
+    """
+    Queue an email message in the outbox, it will be sent by the outbox worker.
+
+    :param message: the message to queue, attachments must be (filename, content, mimetype) tuples
+    :return: the OutboxMessage
+    """
+    with transaction.atomic():
+        outbox_message = OutboxMessage.objects.create(
+            subject=message.subject,
+            body=message.body,
+            from_email=message.from_email or "",
+            to=list(message.to),
+            cc=list(message.cc),
+            bcc=list(message.bcc),
+            reply_to=list(message.reply_to),
+            alternatives=[
+                [content, mimetype]
+                for content, mimetype in getattr(message, "alternatives", [])
+            ],
+        )
+        attachments = []
+        for attachment in message.attachments:
+            if not isinstance(attachment, tuple):
+                raise ValueError(
+                    "Only (filename, content, mimetype) attachments can be queued."
+                )
+            filename, content, mimetype = attachment
+            if isinstance(content, str):
+                content = content.encode("utf-8")
+            attachments.append(
+                OutboxAttachment(
+                    message=outbox_message,
+                    filename=filename,
+                    content=content,
+                    mimetype=mimetype,
+                )
+            )
+        OutboxAttachment.objects.bulk_create(attachments)
+    return outbox_message
+
+
+def build_email(outbox_message: OutboxMessage) -> EmailMultiAlternatives:
+    """
+    Build an email message from an OutboxMessage.
+
+    :param outbox_message: the OutboxMessage
+    :return: an EmailMultiAlternatives message
+    """
+    message = EmailMultiAlternatives(
+        outbox_message.subject,
+        outbox_message.body,
+        outbox_message.from_email or None,
+        outbox_message.to,
+        cc=outbox_message.cc,
+        bcc=outbox_message.bcc,
+        reply_to=outbox_message.reply_to,
+    )
+    for content, mimetype in outbox_message.alternatives:
+        message.attach_alternative(content, mimetype)
+    for attachment in outbox_message.attachments.all():
+        message.attach(
+            attachment.filename, bytes(attachment.content), attachment.mimetype
+        )
+    return message
+
+
+def send_queued_messages(max_messages: int = None) -> int:
+    """
+    Send the messages in the outbox that are ready to be sent.
+
+    All messages are sent over one connection. Messages to a domain that reached its rate limit are deferred, messages
+    that fail are retried with an exponential backoff until they run out of attempts and are marked as dead.
+    :param max_messages: the maximum amount of messages to handle, handles all messages that are ready if None
+    :return: the amount of messages handled (sent, failed or deferred)
+    """
+    handled = 0
+    dispatcher = None
+    try:
+        while max_messages is None or handled < max_messages:
+            outbox_message = OutboxMessage.claim_next()
+            if outbox_message is None:
+                break
+            handled += 1
+            if outbox_message.is_rate_limited():
+                outbox_message.defer(settings.OUTBOX_DOMAIN_RATE_PERIOD)
+                continue
+            if dispatcher is None:
+                dispatcher = MailDispatcher()
+            if dispatcher.send(build_email(outbox_message)):
+                outbox_message.mark_sent()
+            else:
+                outbox_message.mark_failed(dispatcher.last_error or "Sending failed")
+                if outbox_message.status == OutboxMessage.STATUS_DEAD:
+                    logger.error("Outbox message {} is dead".format(outbox_message))
+    finally:
+        if dispatcher is not None:
+            dispatcher.close()
+    return handled
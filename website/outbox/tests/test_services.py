@@ -0,0 +1,118 @@
+import datetime
+from smtplib import SMTPException
+
+from django.core import mail
+from django.core.mail import EmailMultiAlternatives
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from freezegun import freeze_time
+from mock import patch
+
+from outbox.models import OutboxMessage
+from outbox.services import queue_email, send_queued_messages
+
+
+def message(to="user@test.com"):
+    msg = EmailMultiAlternatives(
+        "Subject", "Text", "from@test.com", [to], bcc=["bcc@test.com"]
+    )
+    msg.attach_alternative("<p>HTML</p>", "text/html")
+    msg.attach("letter.pdf", b"%PDF-1.4", "application/pdf")
+    return msg
+
+
+class OutboxServices(TestCase):
+    def test_queue_email(self):
+        outbox_message = queue_email(message())
+        self.assertEqual(outbox_message.status, OutboxMessage.STATUS_PENDING)
+        self.assertEqual(outbox_message.domain, "test.com")
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.assertEqual(send_queued_messages(), 1)
+        outbox_message.refresh_from_db()
+        self.assertEqual(outbox_message.status, OutboxMessage.STATUS_SENT)
+        self.assertEqual(outbox_message.attempts, 1)
+        self.assertEqual(outbox_message.body, "")
+        self.assertEqual(outbox_message.alternatives, [])
+        self.assertFalse(outbox_message.attachments.exists())
+        self.assertEqual(len(mail.outbox), 1)
+        sent = mail.outbox[0]
+        self.assertEqual(sent.subject, "Subject")
+        self.assertEqual(sent.to, ["user@test.com"])
+        self.assertEqual(sent.bcc, ["bcc@test.com"])
+        self.assertEqual(sent.alternatives, [("<p>HTML</p>", "text/html")])
+        self.assertEqual(
+            sent.attachments, [("letter.pdf", b"%PDF-1.4", "application/pdf")]
+        )
+        self.assertEqual(send_queued_messages(), 0)
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2, OUTBOX_RETRY_DELAY=60)
+    def test_send_queued_messages_retries(self):
+        with freeze_time("2022-01-01 12:00"):
+            outbox_message = queue_email(message())
+        with patch(
+            "kanikervanaf.mail.MailDispatcher._send",
+            side_effect=SMTPException("Relay down"),
+        ):
+            with freeze_time("2022-01-01 12:00"):
+                self.assertEqual(send_queued_messages(), 1)
+                outbox_message.refresh_from_db()
+                self.assertEqual(outbox_message.status, OutboxMessage.STATUS_PENDING)
+                self.assertEqual(outbox_message.last_error, "Relay down")
+                self.assertEqual(
+                    outbox_message.available_at,
+                    timezone.now() + datetime.timedelta(seconds=60),
+                )
+                self.assertEqual(send_queued_messages(), 0)
+            with freeze_time("2022-01-01 12:01"):
+                self.assertEqual(send_queued_messages(), 1)
+        outbox_message.refresh_from_db()
+        self.assertEqual(outbox_message.status, OutboxMessage.STATUS_DEAD)
+        self.assertEqual(outbox_message.attempts, 2)
+        self.assertEqual(len(mail.outbox), 0)
+
+    @override_settings(OUTBOX_DOMAIN_RATE_LIMIT=2, OUTBOX_DOMAIN_RATE_PERIOD=60)
+    def test_send_queued_messages_rate_limit(self):
+        limited = [queue_email(message()) for _ in range(3)]
+        other = queue_email(message(to="user@other.com"))
+        self.assertEqual(send_queued_messages(), 4)
+        self.assertEqual(len(mail.outbox), 3)
+        limited[2].refresh_from_db()
+        self.assertEqual(limited[2].status, OutboxMessage.STATUS_PENDING)
+        self.assertEqual(limited[2].attempts, 0)
+        other.refresh_from_db()
+        self.assertEqual(other.status, OutboxMessage.STATUS_SENT)
+
+        with freeze_time(timezone.now() + datetime.timedelta(seconds=61)):
+            self.assertEqual(send_queued_messages(), 1)
+        self.assertEqual(len(mail.outbox), 4)
+
+    @override_settings(OUTBOX_SENDING_TIMEOUT=60)
+    def test_claim_next_reclaims_abandoned_messages(self):
+        outbox_message = queue_email(message())
+        self.assertEqual(OutboxMessage.claim_next(), outbox_message)
+        self.assertIsNone(OutboxMessage.claim_next())
+        with freeze_time(timezone.now() + datetime.timedelta(seconds=61)):
+            self.assertEqual(OutboxMessage.claim_next(), outbox_message)
+
+    @override_settings(OUTBOX_RETENTION=datetime.timedelta(days=7))
+    def test_remove_expired(self):
+        with freeze_time("2022-01-01 12:00"):
+            sent = queue_email(message())
+            send_queued_messages()
+            dead = queue_email(message())
+            dead.status = OutboxMessage.STATUS_DEAD
+            dead.save()
+            pending = queue_email(message())
+            OutboxMessage.objects.filter(pk=pending.pk).update(
+                available_at=timezone.now() + datetime.timedelta(days=30)
+            )
+        with freeze_time("2022-01-08 11:00"):
+            recent = queue_email(message())
+            send_queued_messages()
+            self.assertEqual(OutboxMessage.remove_expired(), 0)
+        with freeze_time("2022-01-08 12:00"):
+            self.assertEqual(OutboxMessage.remove_expired(), 2)
+        self.assertCountEqual(OutboxMessage.objects.all(), [pending, recent])
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, OutboxMessage.STATUS_PENDING)
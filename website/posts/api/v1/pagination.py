@@ -1,7 +1,7 @@
-from rest_framework.pagination import PageNumberPagination
+from kanikervanaf.api.pagination import CursorOptInPagination
 
 
-class StandardResultsSetPagination(PageNumberPagination):
+class StandardResultsSetPagination(CursorOptInPagination):
     """Standard Results Set Pagination."""
 
     page_size = 20
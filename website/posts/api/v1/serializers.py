@@ -27,3 +27,5 @@ class PostSerializer(serializers.ModelSerializer):
             "response_to",
             "status",
         ]
+        # The lookup giving the same value as get_author() when serializing values() rows
+        values_sources = {"author": "author__username"}
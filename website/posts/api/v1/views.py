@@ -1,11 +1,14 @@
 from rest_framework.generics import ListAPIView, RetrieveAPIView
+from rest_framework.renderers import BrowsableAPIRenderer
 
+from kanikervanaf.api.renderers import FastJSONRenderer
+from kanikervanaf.api.values import ValuesListModelMixin
 from posts.api.v1.pagination import StandardResultsSetPagination
 from posts.api.v1.serializers import PostSerializer
 from posts.models import Post, STATUS_PUBLISHED
 
 
-class PostListAPIView(ListAPIView):
+class PostListAPIView(ValuesListModelMixin, ListAPIView):
     """
     Post List API View.
 
@@ -17,6 +20,7 @@ class PostListAPIView(ListAPIView):
     serializer_class = PostSerializer
     queryset = Post.objects.filter(status=STATUS_PUBLISHED)
     pagination_class = StandardResultsSetPagination
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
 
 
 class PostRetrieveAPIView(RetrieveAPIView):
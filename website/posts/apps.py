@@ -5,3 +5,11 @@ class PostsConfig(AppConfig):
     """Config for posts app."""
 
     name = "posts"
+
+    def ready(self):
+        """
+        Ready method.
+
+        :return: None
+        """
+        from posts import signals  # noqa
@@ -1,7 +1,7 @@
 from django.template.loader import get_template
 from django.conf import settings
-from smtplib import SMTPException
 from django.core.mail import EmailMultiAlternatives
+from outbox.services import queue_email
 import posts.models as models
 from django.contrib.sites.models import Site
 
@@ -11,7 +11,7 @@ def send_post_status_update_email(post):
     Send a post update email message.
 
     :param post: the post object that has been updated
-    :return: True if the mail was sent successfully, False otherwise
+    :return: True if the mail was queued in the outbox
     """
     template = get_template("email/post_updated.html")
     template_text = get_template("email/post_updated.txt")
@@ -36,9 +36,5 @@ def send_post_status_update_email(post):
     )
     msg.attach_alternative(html_content, "text/html")
 
-    try:
-        msg.send()
-    except SMTPException:
-        return False
-
+    queue_email(msg)
     return True
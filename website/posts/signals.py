@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from kanikervanaf.converters import model_changed
+from posts.models import Post
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def update_post_converter_version(sender, **kwargs):
+    """Invalidate the cached Post lookups of the URL converter when a Post changed."""
+    model_changed(Post)
@@ -130,6 +130,15 @@ class QueuedMailListAdmin(admin.ModelAdmin):
     readonly_fields = ["created"]
 
 
+@admin.register(models.DeregisterJob)
+class DeregisterJobAdmin(admin.ModelAdmin):
+    """Admin model for deregister jobs."""
+
+    list_display = ["idempotency_key", "status", "attempts", "created", "duration"]
+    list_filter = ["status"]
+    readonly_fields = ["created", "started", "finished", "duration", "sent_items"]
+
+
 class CategoryParentFilter(AutocompleteFilter):
     """Filter for subscription categories parents."""
 
@@ -11,7 +11,7 @@ from django.http import (
 )
 
 from subscriptions.models import Subscription, SubscriptionCategory
-from subscriptions.services import get_file_contents
+from subscriptions.services import get_file_contents, clear_compiled_templates
 
 
 class SubscriptionLetterTemplateEditorView(PermissionRequiredMixin, TemplateView):
@@ -127,7 +127,11 @@ class SubscriptionLetterTemplateEditorView(PermissionRequiredMixin, TemplateView
 
     def save(self, source):
         """Save file contents."""
-        self.get_instance_obj().letter_template.save("", ContentFile(source))
+        instance = self.get_instance_obj()
+        instance.letter_template.save("", ContentFile(source), save=False)
+        # Only save the template, other fields may have changed since the instance was loaded
+        instance.save(update_fields=["letter_template"])
+        clear_compiled_templates()
 
     def get_saved_template(self):
         """Get saved template pdf."""
@@ -158,7 +162,11 @@ class SubscriptionEmailTemplateEditorView(SubscriptionLetterTemplateEditorView):
 
     def save(self, source):
         """Save file contents."""
-        self.get_instance_obj().email_template_text.save("", ContentFile(source))
+        instance = self.get_instance_obj()
+        instance.email_template_text.save("", ContentFile(source), save=False)
+        # Only save the template, other fields may have changed since the instance was loaded
+        instance.save(update_fields=["email_template_text"])
+        clear_compiled_templates()
 
 
 class SubscriptionCategoryLetterTemplateEditorView(
@@ -192,7 +200,11 @@ class SubscriptionCategoryEmailTemplateEditorView(
 
     def save(self, source):
         """Save file contents."""
-        self.get_instance_obj().email_template_text.save("", ContentFile(source))
+        instance = self.get_instance_obj()
+        instance.email_template_text.save("", ContentFile(source), save=False)
+        # Only save the template, other fields may have changed since the instance was loaded
+        instance.save(update_fields=["email_template_text"])
+        clear_compiled_templates()
 
 
 class AdminEmailTemplateView(PermissionRequiredMixin, TemplateView):
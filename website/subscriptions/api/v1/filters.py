@@ -0,0 +1,47 @@
+from rest_framework.filters import BaseFilterBackend
+
+from subscriptions.search import search_subscriptions
+
+
+class SubscriptionSearchFilter(BaseFilterBackend):
+    """
+    Full text search filter for subscriptions.
+
+    Filters the subscriptions on the search query in the q parameter and orders them by relevance, see
+    subscriptions.search.search_subscriptions(). Put this filter before the OrderingFilter so an explicit ordering takes
+    precedence over the relevance.
+    """
+
+    search_param = "q"
+
+    def filter_queryset(self, request, queryset, view):
+        """
+        Filter the queryset on the search query.
+
+        :param request: the request
+        :param queryset: the queryset with subscriptions
+        :param view: the view
+        :return: the subscriptions matching the search query ordered by relevance, or the queryset itself if there is
+        no search query
+        """
+        query = request.query_params.get(self.search_param, "").strip()
+        if query == "":
+            return queryset
+        return search_subscriptions(query, queryset)
+
+    def get_schema_operation_parameters(self, view):
+        """
+        Get the schema of the search parameter.
+
+        :param view: the view
+        :return: a list with the schema of the search parameter
+        """
+        return [
+            {
+                "name": self.search_param,
+                "required": False,
+                "in": "query",
+                "description": "A search query, results are ordered by relevance.",
+                "schema": {"type": "string"},
+            }
+        ]
@@ -1,6 +1,8 @@
 from django.utils.encoding import smart_str
 from rest_framework.renderers import BaseRenderer
 
+from subscriptions.docx_rendering import render_docx
+
 
 class PDFRenderer(BaseRenderer):
     """PDF Renderer."""
@@ -41,5 +43,26 @@ class WordDocumentRenderer(BaseRenderer):
     format = "docx"
 
     def render(self, data, accepted_media_type=None, renderer_context=None):
-        """Render docx data as is."""
+        """Render HTML data to a Word document, return already rendered docx data as is."""
+        if renderer_context is not None:
+            if (
+                "response" in renderer_context.keys()
+                and renderer_context["response"].content_type == "application/json"
+            ):
+                return
+        if isinstance(data, str):
+            return render_docx(data)
+        return data
+
+
+class ZipRenderer(BaseRenderer):
+    """ZIP archive Renderer."""
+
+    media_type = "application/zip"
+    format = "zip"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Return ZIP data as is."""
         return data
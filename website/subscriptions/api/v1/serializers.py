@@ -1,9 +1,12 @@
+from kanikervanaf.api.fieldsets import SparseFieldsetSerializerMixin
 from subscriptions.models import Subscription, SubscriptionCategory
 from rest_framework import serializers
 
 
-class SubscriptionSerializer(serializers.ModelSerializer):
-    """Subscription serializer."""
+class SubscriptionSerializer(
+    SparseFieldsetSerializerMixin, serializers.ModelSerializer
+):
+    """Subscription serializer, use the fields and omit query parameters to select fields."""
 
     class Meta:
         """Meta class."""
@@ -28,6 +31,21 @@ class SubscriptionSerializer(serializers.ModelSerializer):
             "can_generate_email",
             "explanation_field",
         ]
+        field_presets = {
+            # Search as you type
+            "minimal": ["id", "name", "slug"],
+            # Adding subscriptions to the list of subscriptions to deregister from
+            "summary": [
+                "id",
+                "name",
+                "slug",
+                "price",
+                "category",
+                "can_generate_letter",
+                "can_generate_email",
+            ],
+            "full": fields,
+        }
 
 
 class SubscriptionCategorySerializer(serializers.ModelSerializer):
@@ -1,17 +1,34 @@
 from django.urls import path
 from subscriptions.api.v1.views import (
     SubscriptionListAPIView,
+    SubscriptionFuzzySearchAPIView,
+    SubscriptionAutocompleteAPIView,
+    SubscriptionTopAPIView,
+    SubscriptionTrendingAPIView,
     SubscriptionCategoryListAPIView,
     SubscriptionRetrieveAPIView,
     SubscriptionCategoryRetrieveAPIView,
     SubscriptionRenderLetterAPIView,
     SubscriptionRenderEmailAPIView,
+    SubscriptionRenderLettersAPIView,
     TemplateAPIView,
 )
 
 
 urlpatterns = [
     path("", SubscriptionListAPIView.as_view(), name="subscription_list"),
+    path("fuzzy", SubscriptionFuzzySearchAPIView.as_view(), name="subscription_fuzzy"),
+    path(
+        "autocomplete",
+        SubscriptionAutocompleteAPIView.as_view(),
+        name="subscription_autocomplete",
+    ),
+    path("top", SubscriptionTopAPIView.as_view(), name="subscription_top"),
+    path(
+        "trending",
+        SubscriptionTrendingAPIView.as_view(),
+        name="subscription_trending",
+    ),
     path(
         "<int:pk>", SubscriptionRetrieveAPIView.as_view(), name="subscription_retrieve"
     ),
@@ -25,6 +42,11 @@ urlpatterns = [
         SubscriptionRenderEmailAPIView.as_view(),
         name="subscription_render_email",
     ),
+    path(
+        "render-letters",
+        SubscriptionRenderLettersAPIView.as_view(),
+        name="subscription_render_letters",
+    ),
     path(
         "categories",
         SubscriptionCategoryListAPIView.as_view(),
@@ -1,4 +1,5 @@
 import datetime
+import io
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import OrderingFilter, SearchFilter
 
@@ -6,16 +7,26 @@ import django.template.exceptions
 from rest_framework import status
 from rest_framework.generics import ListAPIView, RetrieveAPIView
 from rest_framework.permissions import IsAdminUser
-from rest_framework.renderers import JSONRenderer
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from kanikervanaf.api.fieldsets import SparseFieldsetFilter
 from kanikervanaf.api.openapi import CustomAutoSchema
+from kanikervanaf.api.renderers import FastJSONRenderer
+from kanikervanaf.api.values import ValuesListModelMixin
+from subscriptions.api.v1.filters import SubscriptionSearchFilter
+from subscriptions.autocomplete import autocomplete
+from subscriptions.catalog import get_catalog, TOP_SUBSCRIPTIONS
+from subscriptions.leaderboard import get_leaderboard
+from subscriptions.rollups import get_trending
+from subscriptions.fuzzy import fuzzy_search
 from subscriptions.api.v1.pagination import StandardResultsSetPagination
 from subscriptions.api.v1.renderers import (
     PDFRenderer,
     PlainTextRenderer,
     WordDocumentRenderer,
+    ZipRenderer,
 )
 from subscriptions.api.v1.serializers import (
     SubscriptionSerializer,
@@ -23,33 +34,277 @@ from subscriptions.api.v1.serializers import (
 )
 from subscriptions.models import Subscription, SubscriptionCategory
 from subscriptions.services import (
-    render_deregister_letter_pdf,
-    render_deregister_letter_docx,
-    render_deregister_email,
     render_string,
     render_string_to_pdf,
+    get_deregister_artifact_digest,
+    get_deregister_artifact,
+    ARTIFACT_FORMAT_PDF,
+    ARTIFACT_FORMAT_DOCX,
+    ARTIFACT_FORMAT_TEXT,
+    stream_deregister_letters_zip,
 )
 from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
 
 
-class SubscriptionListAPIView(ListAPIView):
+class SubscriptionListAPIView(ValuesListModelMixin, ListAPIView):
     """
     Subscription List API View.
 
     Permissions required: None
 
-    Use this endpoint to get a list of subscriptions in the database.
+    Use this endpoint to get a list of subscriptions in the database. Use the q parameter to search subscriptions by
+    their name and search terms, the results are ordered by relevance.
     """
 
     serializer_class = SubscriptionSerializer
     queryset = Subscription.objects.all()
     pagination_class = StandardResultsSetPagination
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+    filter_backends = [
+        DjangoFilterBackend,
+        SubscriptionSearchFilter,
+        SearchFilter,
+        OrderingFilter,
+        SparseFieldsetFilter,
+    ]
     filterset_fields = ["category"]
     search_fields = ["name", "subscriptionsearchterm__name"]
     ordering_fields = ["name", "amount_used"]
 
 
+class SubscriptionFuzzySearchAPIView(APIView):
+    """
+    Subscription Fuzzy Search API View.
+
+    Permissions required: None
+
+    Use this endpoint to find subscriptions with a name or search term similar to a query, for example when a search
+    with the q parameter of the list endpoint did not give results because of a typo.
+    """
+
+    schema = CustomAutoSchema(
+        manual_operations=[
+            {
+                "name": "q",
+                "in": "query",
+                "required": True,
+                "description": "The search query.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": "fields",
+                "in": "query",
+                "required": False,
+                "description": "A comma separated list of fields and presets (minimal, summary, full) to include.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": "omit",
+                "in": "query",
+                "required": False,
+                "description": "A comma separated list of fields to leave out.",
+                "schema": {"type": "string"},
+            },
+        ]
+    )
+
+    def get(self, request, **kwargs):
+        """
+        Get the subscriptions most similar to the search query.
+
+        Permission required: None
+
+        Returns at most FUZZY_SEARCH_RESULTS subscriptions, most similar first.
+        """
+        query = request.query_params.get("q", "")
+        results = fuzzy_search(query)
+        subscriptions = SubscriptionSerializer.narrow_queryset(
+            Subscription.objects.all(), request
+        ).in_bulk([subscription_id for subscription_id, _ in results])
+        return Response(
+            {
+                "results": SubscriptionSerializer(
+                    [
+                        subscriptions[subscription_id]
+                        for subscription_id, _ in results
+                        if subscription_id in subscriptions
+                    ],
+                    many=True,
+                    context={"request": request},
+                ).data
+            }
+        )
+
+
+class SubscriptionAutocompleteAPIView(APIView):
+    """
+    Subscription Autocomplete API View.
+
+    Permissions required: None
+
+    Use this endpoint to autocomplete a subscription name while the user is typing.
+    """
+
+    schema = CustomAutoSchema(
+        manual_operations=[
+            {
+                "name": "prefix",
+                "in": "query",
+                "required": True,
+                "description": "The start of a subscription name or search term.",
+                "schema": {"type": "string"},
+            }
+        ]
+    )
+
+    def get(self, request, **kwargs):
+        """
+        Get the most popular subscriptions with a name or search term starting with the prefix.
+
+        Permission required: None
+
+        Returns at most AUTOCOMPLETE_RESULTS subscriptions with only their id, name and slug. The response may be cached
+        for AUTOCOMPLETE_MAX_AGE seconds.
+        """
+        results = autocomplete(request.query_params.get("prefix", ""))
+        response = Response(
+            {
+                "results": [
+                    {"id": subscription_id, "name": name, "slug": slug}
+                    for subscription_id, name, slug in results
+                ]
+            }
+        )
+        patch_cache_control(
+            response, public=True, max_age=settings.AUTOCOMPLETE_MAX_AGE
+        )
+        return response
+
+
+class SubscriptionTopAPIView(APIView):
+    """
+    Subscription Top API View.
+
+    Permissions required: None
+
+    Use this endpoint to get the most popular subscriptions, optionally of one category (including the categories below
+    it).
+    """
+
+    schema = CustomAutoSchema(
+        manual_operations=[
+            {
+                "name": "category",
+                "in": "query",
+                "required": False,
+                "description": "The id of the category.",
+                "schema": {"type": "integer"},
+            },
+            {
+                "name": "limit",
+                "in": "query",
+                "required": False,
+                "description": "The maximum amount of subscriptions, at most LEADERBOARD_SIZE.",
+                "schema": {"type": "integer"},
+            },
+        ]
+    )
+
+    def bad_request(self, detail):
+        """Return a 400 Bad Request response with a detail message."""
+        return Response(status=status.HTTP_400_BAD_REQUEST, data={"detail": detail})
+
+    def get_results(self, category_id, limit):
+        """
+        Get the serialized subscriptions.
+
+        :param category_id: the id of the category or None for all subscriptions
+        :param limit: the maximum amount of subscriptions
+        :return: a list of dictionaries with the subscriptions
+        """
+        return [
+            {
+                "id": entry.id,
+                "name": entry.name,
+                "slug": entry.slug,
+                "category": entry.category_id,
+                "amount_used": entry.amount_used,
+            }
+            for entry in get_leaderboard(category_id).top(limit)
+        ]
+
+    def get(self, request, **kwargs):
+        """
+        Get the most popular subscriptions.
+
+        Permission required: None
+
+        Returns at most limit (default TOP_SUBSCRIPTIONS) subscriptions ordered by the amount of times they were
+        deregistered, read from the cached leaderboards.
+        """
+        try:
+            limit = int(request.query_params.get("limit", TOP_SUBSCRIPTIONS))
+            category_id = request.query_params.get("category")
+            category_id = None if category_id is None else int(category_id)
+        except ValueError:
+            return self.bad_request("The category and limit must be integers.")
+        if not 0 < limit <= settings.LEADERBOARD_SIZE:
+            return self.bad_request(
+                "The limit must be between 1 and {}.".format(settings.LEADERBOARD_SIZE)
+            )
+        if category_id is not None and category_id not in get_catalog().categories:
+            return Response(
+                status=status.HTTP_404_NOT_FOUND,
+                data={"detail": "This subscription category does not exist."},
+            )
+
+        return Response({"results": self.get_results(category_id, limit)})
+
+
+class SubscriptionTrendingAPIView(SubscriptionTopAPIView):
+    """
+    Subscription Trending API View.
+
+    Permissions required: None
+
+    Use this endpoint to get the subscriptions deregistered most often in the last TRENDING_DAYS days, optionally of
+    one category (including the categories below it).
+    """
+
+    def get_results(self, category_id, limit):
+        """
+        Get the serialized subscriptions.
+
+        :param category_id: the id of the category or None for all subscriptions
+        :param limit: the maximum amount of subscriptions
+        :return: a list of dictionaries with the subscriptions and their amount of recent deregistrations
+        """
+        return [
+            {
+                "id": entry.id,
+                "name": entry.name,
+                "slug": entry.slug,
+                "category": entry.category_id,
+                "deregistrations": entry.deregistrations,
+            }
+            for entry in get_trending(category_id, limit)
+        ]
+
+    def get(self, request, **kwargs):
+        """
+        Get the trending subscriptions.
+
+        Permission required: None
+
+        Returns at most limit (default TOP_SUBSCRIPTIONS) subscriptions ordered by the amount of times they were
+        deregistered in the last TRENDING_DAYS days, read from the daily rollups.
+        """
+        return super().get(request, **kwargs)
+
+
 class SubscriptionRetrieveAPIView(RetrieveAPIView):
     """
     Subscription Retrieve API View.
@@ -61,9 +316,10 @@ class SubscriptionRetrieveAPIView(RetrieveAPIView):
 
     serializer_class = SubscriptionSerializer
     queryset = Subscription.objects.all()
+    filter_backends = [SparseFieldsetFilter]
 
 
-class SubscriptionCategoryListAPIView(ListAPIView):
+class SubscriptionCategoryListAPIView(ValuesListModelMixin, ListAPIView):
     """
     Subscription Category List API View.
 
@@ -75,6 +331,7 @@ class SubscriptionCategoryListAPIView(ListAPIView):
     serializer_class = SubscriptionCategorySerializer
     queryset = SubscriptionCategory.objects.all()
     pagination_class = StandardResultsSetPagination
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
 
 
 class SubscriptionCategoryRetrieveAPIView(RetrieveAPIView):
@@ -90,7 +347,60 @@ class SubscriptionCategoryRetrieveAPIView(RetrieveAPIView):
     queryset = SubscriptionCategory.objects.all()
 
 
-class SubscriptionRenderLetterAPIView(APIView):
+class RenderedArtifactMixin:
+    """
+    Serve rendered deregister letters and emails from the rendered artifact cache.
+
+    Responses carry an ETag with the content address of the artifact. A matching If-None-Match header results in a
+    response without rendering or fetching the artifact: 304 Not Modified for safe methods and 412 Precondition Failed
+    for other methods (such as the POST preview endpoints), as required by RFC 9110. Clients that already have the
+    artifact for an ETag can keep using it when they receive either of these responses.
+    """
+
+    def get_artifact_response(
+        self,
+        request,
+        subscription,
+        context,
+        artifact_format,
+        content_type,
+        stream=False,
+    ):
+        """
+        Get the response for a rendered artifact.
+
+        :param request: the request
+        :param subscription: the subscription to render the artifact for
+        :param context: the template context
+        :param artifact_format: the format of the artifact
+        :param content_type: the content type of the artifact
+        :param stream: whether to stream the artifact in chunks instead of passing it through the renderer
+        :return: a Response with the artifact, a 304 Not Modified or a 412 Precondition Failed response
+        """
+        digest = get_deregister_artifact_digest(context, subscription, artifact_format)
+        etag = quote_etag(digest)
+        if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+        if etag in if_none_match or "*" in if_none_match:
+            if request.method in ("GET", "HEAD"):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                # Not a DRF Response, the renderers of the artifacts can not render an empty body
+                response = HttpResponse(status=status.HTTP_412_PRECONDITION_FAILED)
+        else:
+            artifact = get_deregister_artifact(
+                context, subscription, artifact_format, digest=digest
+            )
+            if stream:
+                response = FileResponse(io.BytesIO(artifact), content_type=content_type)
+            else:
+                response = Response(
+                    status=status.HTTP_200_OK, data=artifact, content_type=content_type
+                )
+        response["ETag"] = etag
+        return response
+
+
+class SubscriptionRenderLetterAPIView(RenderedArtifactMixin, APIView):
     """Subscription Render Letter API View."""
 
     schema = CustomAutoSchema(
@@ -125,20 +435,121 @@ class SubscriptionRenderLetterAPIView(APIView):
         context.update(settings.DEFAULT_TEMPLATE_PARAMETERS)
         context.update(request.data.get("context", {}))
         if request.accepted_renderer.format == "pdf":
-            pdf = render_deregister_letter_pdf(context, subscription)
-            return Response(
-                status=status.HTTP_200_OK, data=pdf, content_type="application/pdf"
+            return self.get_artifact_response(
+                request, subscription, context, ARTIFACT_FORMAT_PDF, "application/pdf"
             )
         else:
-            docx = render_deregister_letter_docx(context, subscription)
-            return Response(
-                status=status.HTTP_200_OK,
-                data=docx,
-                content_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            return self.get_artifact_response(
+                request,
+                subscription,
+                context,
+                ARTIFACT_FORMAT_DOCX,
+                "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                stream=True,
             )
 
 
-class SubscriptionRenderEmailAPIView(APIView):
+class SubscriptionRenderLettersAPIView(APIView):
+    """
+    Subscription Render Letters API View.
+
+    Permission required: None
+
+    Use this endpoint to render the letters of multiple Subscriptions to a ZIP archive.
+    """
+
+    schema = CustomAutoSchema(
+        request_schema={
+            "type": "object",
+            "properties": {
+                "subscriptions": {"type": "array", "items": {"type": "integer"}},
+                "context": {
+                    "type": "object",
+                    "example": {
+                        x: "string" for x in settings.DEFAULT_TEMPLATE_PARAMETERS
+                    },
+                },
+                "format": {"type": "string", "enum": ["pdf", "docx"]},
+            },
+        }
+    )
+
+    renderer_classes = [ZipRenderer, JSONRenderer]
+
+    def error_response(self, request, status_code, detail):
+        """Return an error response with a detail message rendered as JSON."""
+        request.accepted_renderer = JSONRenderer()
+        return Response(
+            status=status_code,
+            data={"detail": detail},
+            content_type="application/json",
+        )
+
+    def bad_request(self, request, detail):
+        """Return a 400 Bad Request response with a detail message."""
+        return self.error_response(request, status.HTTP_400_BAD_REQUEST, detail)
+
+    def post(self, request, **kwargs):
+        """
+        Render letters to a ZIP archive of PDF or Word documents.
+
+        Permission required: None
+
+        A list of at most RENDER_LETTERS_MAX_BATCH_SIZE subscription ids must be provided, a context dictionary may be
+        provided that includes context variables that are passed to all templates. The ZIP archive is streamed while
+        the letters are rendered. Subscriptions that do not exist or of which the letter could not be rendered get an
+        error file instead of a letter, the manifest.json file in the archive lists the status of every subscription.
+        Errors are rendered as JSON, a valid request that does not accept application/zip gets a 406 response.
+        """
+        subscription_ids = request.data.get("subscriptions")
+        if (
+            not isinstance(subscription_ids, list)
+            or len(subscription_ids) == 0
+            or any(
+                not isinstance(subscription_id, int)
+                or isinstance(subscription_id, bool)
+                for subscription_id in subscription_ids
+            )
+        ):
+            return self.bad_request(
+                request, "subscriptions must be a non-empty list of subscription ids."
+            )
+        subscription_ids = list(dict.fromkeys(subscription_ids))
+        if len(subscription_ids) > settings.RENDER_LETTERS_MAX_BATCH_SIZE:
+            return self.bad_request(
+                request,
+                "At most {} subscriptions can be rendered at once.".format(
+                    settings.RENDER_LETTERS_MAX_BATCH_SIZE
+                ),
+            )
+        artifact_format = request.data.get("format", ARTIFACT_FORMAT_PDF)
+        if artifact_format not in (ARTIFACT_FORMAT_PDF, ARTIFACT_FORMAT_DOCX):
+            return self.bad_request(request, "format must be either pdf or docx.")
+        user_context = request.data.get("context", {})
+        if not isinstance(user_context, dict):
+            return self.bad_request(request, "context must be an object.")
+        context = {}
+        context.update(settings.DEFAULT_TEMPLATE_PARAMETERS)
+        context.update(user_context)
+        if request.accepted_renderer.format != ZipRenderer.format:
+            # The letters are only available as a ZIP archive, JSON is only used for error responses
+            return self.error_response(
+                request,
+                status.HTTP_406_NOT_ACCEPTABLE,
+                "The letters can only be rendered as {}.".format(
+                    ZipRenderer.media_type
+                ),
+            )
+
+        response = StreamingHttpResponse(
+            stream_deregister_letters_zip(context, subscription_ids, artifact_format),
+            content_type="application/zip",
+        )
+        response["Content-Disposition"] = 'attachment; filename="letters.zip"'
+        return response
+
+
+class SubscriptionRenderEmailAPIView(RenderedArtifactMixin, APIView):
     """
     Subscription Render Email API View.
 
@@ -172,12 +583,8 @@ class SubscriptionRenderEmailAPIView(APIView):
         context = {}
         context.update(settings.DEFAULT_TEMPLATE_PARAMETERS)
         context.update(request.data.get("context", {}))
-        email = render_deregister_email(
-            context,
-            instance,
-        )
-        return Response(
-            status=status.HTTP_200_OK, data=email, content_type="text/plain"
+        return self.get_artifact_response(
+            request, instance, context, ARTIFACT_FORMAT_TEXT, "text/plain"
         )
 
 
@@ -0,0 +1,53 @@
+import zipfile
+from typing import Iterable, Iterator, Tuple
+
+
+class StreamBuffer:
+    """
+    Write-only buffer for writing a ZIP file to a stream.
+
+    The buffer has no tell() or seek() so zipfile writes the archive in streaming mode, the written data can be taken
+    out of the buffer after every file.
+    """
+
+    def __init__(self):
+        """Initialize the buffer."""
+        self._chunks = []
+
+    def write(self, data: bytes) -> int:
+        """
+        Write data to the buffer.
+
+        :param data: the data to write
+        :return: the amount of bytes written
+        """
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        """Flush the buffer, this does nothing as the data is taken out with pop()."""
+
+    def pop(self) -> bytes:
+        """
+        Take all data out of the buffer.
+
+        :return: the data written since the last call to pop()
+        """
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(files: Iterable[Tuple[str, bytes]]) -> Iterator[bytes]:
+    """
+    Write files to a ZIP archive while they are generated.
+
+    :param files: an iterable of (filename, content) tuples, it is consumed lazily
+    :return: an iterator with the bytes of the ZIP archive, a chunk is yielded after every file
+    """
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for filename, content in files:
+            archive.writestr(filename, content)
+            yield buffer.pop()
+    yield buffer.pop()
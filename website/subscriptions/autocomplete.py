@@ -0,0 +1,123 @@
+import bisect
+import heapq
+import threading
+from typing import Iterable, List, Tuple
+
+from django.conf import settings
+
+from subscriptions.catalog import get_catalog
+from subscriptions.fuzzy import normalize
+
+# Character that sorts after every character in a normalized key, used as the upper bound of a prefix range
+MAX_CHARACTER = "\U0010ffff"
+
+
+class PrefixIndex:
+    """
+    Sorted array of normalized names for prefix autocompletion.
+
+    Every name and search term is indexed from the start of each of its words, so "fit" completes "Basic Fit" as well.
+    The keys of the entries starting with a prefix are a contiguous range of the sorted array, found with bisect. Each
+    entry refers to its subscription by popularity rank, so the best completions are the lowest ranks in the range.
+    """
+
+    def __init__(
+        self,
+        records: Iterable[Tuple[int, str, str]],
+        search_terms: Iterable[Tuple[int, str]] = (),
+    ):
+        """
+        Build the index.
+
+        :param records: an iterable of (id, name, slug) tuples of the subscriptions, most popular first
+        :param search_terms: an iterable of (subscription id, search term) tuples
+        """
+        self._records = []
+        ranks = {}
+        entries = []
+        for record in records:
+            ranks[record[0]] = len(self._records)
+            self._records.append(record)
+            entries.extend(self._get_entries(ranks[record[0]], record[1]))
+        for subscription_id, term in search_terms:
+            if subscription_id in ranks:
+                entries.extend(self._get_entries(ranks[subscription_id], term))
+        entries.sort()
+        self._keys = [key for key, _ in entries]
+        self._ranks = [rank for _, rank in entries]
+
+    @staticmethod
+    def _get_entries(rank: int, text: str):
+        words = normalize(text).split()
+        return [(" ".join(words[i:]), rank) for i in range(len(words))]
+
+    def __len__(self):
+        """
+        Get the amount of entries in the index.
+
+        :return: the amount of entries
+        """
+        return len(self._keys)
+
+    def complete(self, prefix: str, limit: int) -> List[Tuple[int, str, str]]:
+        """
+        Get the subscriptions with a name or search term starting with a prefix.
+
+        :param prefix: the prefix
+        :param limit: the maximum amount of results
+        :return: a list of at most limit (id, name, slug) tuples, most popular first
+        """
+        prefix = normalize(prefix)
+        if prefix == "":
+            return []
+        start = bisect.bisect_left(self._keys, prefix)
+        end = bisect.bisect_right(self._keys, prefix + MAX_CHARACTER, lo=start)
+        # Entries refer to the records by their rank, the lowest ranks are the most popular subscriptions
+        return [
+            self._records[rank]
+            for rank in heapq.nsmallest(limit, set(self._ranks[start:end]))
+        ]
+
+
+_index = None
+_index_snapshot = None
+_index_lock = threading.Lock()
+
+
+def get_prefix_index() -> PrefixIndex:
+    """
+    Get the prefix index of this process.
+
+    The index is built from the catalog snapshot of this process, it is rebuilt when the snapshot changed.
+    :return: the PrefixIndex
+    """
+    global _index, _index_snapshot
+    snapshot = get_catalog()
+    with _index_lock:
+        if _index_snapshot is not snapshot:
+            _index = PrefixIndex(
+                (
+                    (record.id, record.name, record.slug)
+                    for record in snapshot.get_popular_subscriptions()
+                ),
+                (
+                    (record.id, term)
+                    for record in snapshot.get_popular_subscriptions()
+                    for term in record.search_terms
+                ),
+            )
+            _index_snapshot = snapshot
+        return _index
+
+
+def autocomplete(prefix: str, limit: int = None) -> List[Tuple[int, str, str]]:
+    """
+    Autocomplete a subscription name.
+
+    :param prefix: the prefix typed by the user
+    :param limit: the maximum amount of results, defaults to AUTOCOMPLETE_RESULTS
+    :return: a list of (id, name, slug) tuples of subscriptions with a name or search term starting with the prefix
+    """
+    if limit is None:
+        limit = settings.AUTOCOMPLETE_RESULTS
+    return get_prefix_index().complete(prefix, limit)
@@ -0,0 +1,333 @@
+import threading
+import time
+from types import MappingProxyType
+from typing import Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+from subscriptions.models import (
+    CatalogVersion,
+    Subscription,
+    SubscriptionCategory,
+    SubscriptionSearchTerm,
+)
+
+# Number of subscriptions in the lists of most popular subscriptions on the catalog pages
+TOP_SUBSCRIPTIONS = 20
+
+
+class SubscriptionRecord:
+    """Read-only record of a Subscription in a catalog snapshot."""
+
+    __slots__ = (
+        "id",
+        "name",
+        "slug",
+        "category_id",
+        "amount_used",
+        "search_terms",
+    )
+
+    def __init__(self, id, name, slug, category_id, amount_used, search_terms=()):
+        """
+        Initialize the record.
+
+        :param id: the id of the subscription
+        :param name: the name of the subscription
+        :param slug: the slug of the subscription
+        :param category_id: the id of the category of the subscription
+        :param amount_used: the amount of times the subscription was used
+        :param search_terms: a tuple with the search terms of the subscription
+        """
+        self.id = id
+        self.name = name
+        self.slug = slug
+        self.category_id = category_id
+        self.amount_used = amount_used
+        self.search_terms = search_terms
+
+    def __str__(self):
+        """
+        Convert this object to a string.
+
+        :return: the name of the subscription
+        """
+        return self.name
+
+    @property
+    def pk(self):
+        """
+        Get the primary key of the subscription.
+
+        :return: the id of the subscription
+        """
+        return self.id
+
+
+class CategoryRecord:
+    """Read-only record of a SubscriptionCategory in a catalog snapshot."""
+
+    __slots__ = ("id", "name", "slug", "parent_id", "order")
+
+    def __init__(self, id, name, slug, parent_id, order):
+        """
+        Initialize the record.
+
+        :param id: the id of the category
+        :param name: the name of the category
+        :param slug: the slug of the category
+        :param parent_id: the id of the parent category, None for a top level category
+        :param order: the order of the category within its parent
+        """
+        self.id = id
+        self.name = name
+        self.slug = slug
+        self.parent_id = parent_id
+        self.order = order
+
+    def __str__(self):
+        """
+        Convert this object to a string.
+
+        :return: the name of the category
+        """
+        return self.name
+
+    @property
+    def pk(self):
+        """
+        Get the primary key of the category.
+
+        :return: the id of the category
+        """
+        return self.id
+
+
+class CatalogSnapshot:
+    """
+    Immutable snapshot of the catalog (subscriptions, categories and search terms).
+
+    The snapshot is built with a few queries and serves reads from memory. All maps are read-only, records must not be
+    changed as the snapshot is shared between the threads of a process.
+    """
+
+    def __init__(self, version: int):
+        """
+        Build a snapshot of the current catalog.
+
+        :param version: the version of the catalog, read before building the snapshot
+        """
+        self.version = version
+        self.built = time.monotonic()
+
+        search_terms = {}
+        for subscription_id, term in (
+            SubscriptionSearchTerm.subscription.through.objects.values_list(
+                "subscription_id", "subscriptionsearchterm__name"
+            )
+            .order_by("subscriptionsearchterm__name")
+            .iterator()
+        ):
+            search_terms.setdefault(subscription_id, []).append(term)
+
+        subscriptions = {}
+        subscription_slugs = {}
+        category_subscriptions = {}
+        for subscription_id, name, slug, category_id, amount_used in (
+            Subscription.objects.values_list(
+                "id", "name", "slug", "category_id", "amount_used"
+            )
+            .order_by("id")
+            .iterator()
+        ):
+            subscriptions[subscription_id] = SubscriptionRecord(
+                subscription_id,
+                name,
+                slug,
+                category_id,
+                amount_used,
+                tuple(search_terms.get(subscription_id, ())),
+            )
+            subscription_slugs.setdefault(slug, subscription_id)
+            category_subscriptions.setdefault(category_id, []).append(subscription_id)
+
+        categories = {}
+        category_slugs = {}
+        category_children = {}
+        for (
+            category_id,
+            name,
+            slug,
+            parent_id,
+            order,
+        ) in SubscriptionCategory.objects.values_list(
+            "id", "name", "slug", "category_id", "order"
+        ).order_by(
+            "order", "id"
+        ):
+            categories[category_id] = CategoryRecord(
+                category_id, name, slug, parent_id, order
+            )
+            category_slugs.setdefault(slug, category_id)
+            category_children.setdefault(parent_id, []).append(category_id)
+
+        self.subscriptions = MappingProxyType(subscriptions)
+        self.subscription_slugs = MappingProxyType(subscription_slugs)
+        self.categories = MappingProxyType(categories)
+        self.category_slugs = MappingProxyType(category_slugs)
+        self.category_children = MappingProxyType(
+            {key: tuple(value) for key, value in category_children.items()}
+        )
+        self.category_subscriptions = MappingProxyType(
+            {key: tuple(value) for key, value in category_subscriptions.items()}
+        )
+        self._popular = tuple(
+            sorted(
+                subscriptions.values(),
+                key=lambda record: (-record.amount_used, record.name, record.id),
+            )
+        )
+
+    def get_subscription_by_slug(self, slug: str) -> Optional[SubscriptionRecord]:
+        """
+        Get a subscription by its slug.
+
+        :param slug: the slug
+        :return: the SubscriptionRecord with the lowest id with that slug or None if it does not exist
+        """
+        subscription_id = self.subscription_slugs.get(slug)
+        return None if subscription_id is None else self.subscriptions[subscription_id]
+
+    def get_category_by_slug(self, slug: str) -> Optional[CategoryRecord]:
+        """
+        Get a category by its slug.
+
+        :param slug: the slug
+        :return: the CategoryRecord with the lowest order with that slug or None if it does not exist
+        """
+        category_id = self.category_slugs.get(slug)
+        return None if category_id is None else self.categories[category_id]
+
+    def get_descendant_categories(self, category_id: int) -> List[int]:
+        """
+        Get a category and all categories below it.
+
+        :param category_id: the id of the category
+        :return: a list with the id of the category and the ids of all its descendants
+        """
+        descendants, visited = [category_id], {category_id}
+        for descendant in descendants:
+            for child in self.category_children.get(descendant, ()):
+                # Guard against cycles in the category tree
+                if child not in visited:
+                    visited.add(child)
+                    descendants.append(child)
+        return descendants
+
+    def get_ancestor_categories(self, category_id: int) -> List[int]:
+        """
+        Get a category and all categories above it.
+
+        :param category_id: the id of the category
+        :return: a list with the id of the category followed by the ids of its ancestors, empty if it does not exist
+        """
+        ancestors, visited = [], set()
+        while category_id in self.categories and category_id not in visited:
+            visited.add(category_id)
+            ancestors.append(category_id)
+            category_id = self.categories[category_id].parent_id
+        return ancestors
+
+    def get_category_subscriptions(self, category_id: int) -> List[SubscriptionRecord]:
+        """
+        Get the subscriptions in a category and all categories below it.
+
+        :param category_id: the id of the category
+        :return: a list of SubscriptionRecords ordered by name
+        """
+        return sorted(
+            (
+                self.subscriptions[subscription_id]
+                for descendant in self.get_descendant_categories(category_id)
+                for subscription_id in self.category_subscriptions.get(descendant, ())
+            ),
+            key=lambda record: (record.name, record.id),
+        )
+
+    def get_popular_subscriptions(self) -> Tuple[SubscriptionRecord, ...]:
+        """
+        Get all subscriptions ordered by popularity.
+
+        :return: a tuple of SubscriptionRecords ordered by amount_used (descending), name and id
+        """
+        return self._popular
+
+    def iter_names(self) -> Iterator[Tuple[int, str]]:
+        """
+        Iterate over the names and search terms of all subscriptions.
+
+        :return: an iterator of (subscription id, name or search term) tuples
+        """
+        for record in self.subscriptions.values():
+            yield record.id, record.name
+            for term in record.search_terms:
+                yield record.id, term
+
+
+_snapshot = None
+_checked = 0.0
+_lock = threading.Lock()
+
+
+def get_catalog() -> CatalogSnapshot:
+    """
+    Get the catalog snapshot of this process.
+
+    The version of the catalog is checked at most once every CATALOG_VERSION_CHECK_INTERVAL seconds, the snapshot is
+    rebuilt when the version changed. The snapshot is also rebuilt after CATALOG_SNAPSHOT_MAX_AGE seconds as the
+    popularity (amount_used) of subscriptions changes without changing the version.
+    :return: the CatalogSnapshot
+    """
+    global _snapshot, _checked
+    snapshot = _snapshot
+    now = time.monotonic()
+    if (
+        snapshot is not None
+        and now - _checked < settings.CATALOG_VERSION_CHECK_INTERVAL
+        and now - snapshot.built < settings.CATALOG_SNAPSHOT_MAX_AGE
+    ):
+        return snapshot
+    with _lock:
+        version = CatalogVersion.get_version()
+        if (
+            _snapshot is None
+            or _snapshot.version != version
+            or now - _snapshot.built >= settings.CATALOG_SNAPSHOT_MAX_AGE
+        ):
+            _snapshot = CatalogSnapshot(version)
+        _checked = time.monotonic()
+        return _snapshot
+
+
+def recheck_catalog():
+    """
+    Make this process check the version of the catalog on the next read.
+
+    :return: None
+    """
+    global _checked
+    _checked = 0.0
+
+
+def catalog_changed():
+    """
+    Give the catalog a new version, all processes rebuild their snapshot.
+
+    This process rebuilds its snapshot on the next read, other processes within CATALOG_VERSION_CHECK_INTERVAL seconds.
+    The version is checked again after the transaction is committed, as other threads do not see the new version before.
+    :return: None
+    """
+    CatalogVersion.bump()
+    recheck_catalog()
+    transaction.on_commit(recheck_catalog)
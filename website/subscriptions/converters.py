@@ -1,104 +1,48 @@
 from django.urls.converters import SlugConverter, IntConverter
+
+from kanikervanaf.converters import CachedModelConverterMixin, ModelConverterMixin
+from .catalog import get_catalog
 from .models import Subscription, SubscriptionCategory
 
 
-class SubscriptionPkConverter(IntConverter):
-    """Converter for Subscription model (for PKs)."""
+class CatalogConverterMixin(CachedModelConverterMixin):
+    """
+    Cached converter for catalog models.
 
-    def to_python(self, value):
-        """
-        Cast int to Subscription.
+    The cached lookups are versioned with the catalog version, so they are invalidated in all processes when the
+    catalog changes.
+    """
 
-        :param value: the integer to convert to a Subscription
-        :type value: int
-        :return: a Subscription or ValueError
+    def get_version(self):
         """
-        try:
-            return Subscription.objects.get(pk=int(value))
-        except Subscription.DoesNotExist:
-            raise ValueError
+        Get the version of the cached lookups.
 
-    def to_url(self, obj):
+        :return: the version of the catalog snapshot of this process
         """
-        Cast an object of Subscription to a string.
+        return get_catalog().version
 
-        :param obj: the Subscription object
-        :return: the public key of the Subscription object in string format
-        """
-        return str(obj.pk)
 
+class SubscriptionPkConverter(ModelConverterMixin, IntConverter):
+    """Converter for Subscription model (for PKs), not cached as it is used by admin views saving the instance."""
 
-class SubscriptionCategoryPkConverter(IntConverter):
-    """Converter for Subscription model (for PKs)."""
+    model = Subscription
 
-    def to_python(self, value):
-        """
-        Cast int to SubscriptionCategory.
 
-        :param value: the integer to convert to a SubscriptionCategory
-        :type value: int
-        :return: a Subscription or ValueError
-        """
-        try:
-            return SubscriptionCategory.objects.get(pk=int(value))
-        except SubscriptionCategory.DoesNotExist:
-            raise ValueError
+class SubscriptionCategoryPkConverter(ModelConverterMixin, IntConverter):
+    """Converter for SubscriptionCategory model (for PKs), not cached as it is used by admin views saving the instance."""
 
-    def to_url(self, obj):
-        """
-        Cast an object of SubscriptionCategory to a string.
-
-        :param obj: the SubscriptionCategory object
-        :return: the public key of the SubscriptionCategory object in string format
-        """
-        return str(obj.pk)
+    model = SubscriptionCategory
 
 
-class SubscriptionConverter(SlugConverter):
+class SubscriptionConverter(CatalogConverterMixin, SlugConverter):
     """Converter for Subscription model."""
 
-    def to_python(self, value):
-        """
-        Cast slug to Subscription.
-
-        :param value: the slug of the Subscription
-        :return: a Subscription or ValueError
-        """
-        try:
-            return Subscription.objects.get(slug=value)
-        except Subscription.DoesNotExist:
-            raise ValueError
-
-    def to_url(self, obj):
-        """
-        Cast an object of Subscription to a string.
-
-        :param obj: the Subscription object
-        :return: the slug of the Subscription object in string format
-        """
-        return str(obj.slug)
+    model = Subscription
+    lookup_field = "slug"
 
 
-class SubscriptionCategoryConverter(SlugConverter):
+class SubscriptionCategoryConverter(CatalogConverterMixin, SlugConverter):
     """Converter for SubscriptionCategory model."""
 
-    def to_python(self, value):
-        """
-        Cast slug to SubscriptionCategory.
-
-        :param value: the slug of the Subscription
-        :return: a SubscriptionCategory or ValueError
-        """
-        try:
-            return SubscriptionCategory.objects.get(slug=value)
-        except SubscriptionCategory.DoesNotExist:
-            raise ValueError
-
-    def to_url(self, obj):
-        """
-        Cast an object of SubscriptionCategory to a string.
-
-        :param obj: the SubscriptionCategory object
-        :return: the public key of the SubscriptionCategory object in string format
-        """
-        return str(obj.slug)
+    model = SubscriptionCategory
+    lookup_field = "slug"
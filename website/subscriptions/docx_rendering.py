@@ -0,0 +1,473 @@
+import logging
+import os
+import re
+import tempfile
+from html.parser import HTMLParser
+from io import BytesIO
+from typing import Union
+
+from django.conf import settings
+from docx import Document
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.shared import Mm
+from pdf2docx import Converter
+
+from .rendering import write_pdf
+
+logger = logging.getLogger(__name__)
+
+# Marker for a line break in a paragraph
+BREAK = None
+
+WHITESPACE = re.compile(r"\s+")
+
+ALIGNMENTS = {
+    "left": WD_ALIGN_PARAGRAPH.LEFT,
+    "start": WD_ALIGN_PARAGRAPH.LEFT,
+    "right": WD_ALIGN_PARAGRAPH.RIGHT,
+    "end": WD_ALIGN_PARAGRAPH.RIGHT,
+    "center": WD_ALIGN_PARAGRAPH.CENTER,
+    "justify": WD_ALIGN_PARAGRAPH.JUSTIFY,
+}
+
+# Tags of which the content is not rendered, the content of style elements is checked by check_style_sheet()
+HIDDEN_TAGS = {"head", "title", "style", "script"}
+# Properties in style sheets that can be left out of the Word document, it uses its default font instead
+IGNORED_STYLE_SHEET_PROPERTIES = {"font-family"}
+CSS_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+CSS_RULE = re.compile(r"[^{}]*\{([^{}]*)\}")
+# Void tags that have no effect on the document
+IGNORED_VOID_TAGS = {"link", "meta"}
+# Tags that only pass through their content
+TRANSPARENT_TAGS = {"html", "body", "header", "footer", "span", "thead", "tbody"}
+# Tags that start a new paragraph
+BLOCK_TAGS = {"p", "div", "h1", "h2", "h3", "h4", "h5", "h6"}
+FORMAT_TAGS = {
+    "b": "bold",
+    "strong": "bold",
+    "i": "italic",
+    "em": "italic",
+    "u": "underline",
+}
+LIST_STYLES = {"ul": "List Bullet", "ol": "List Number"}
+HEADING_STYLES = {
+    "h{}".format(level): "Heading {}".format(level) for level in range(1, 7)
+}
+
+
+class UnsupportedHTMLError(Exception):
+    """Raised when an HTML document uses constructs the native Word document renderer does not support."""
+
+
+def check_style_sheet(css: str):
+    """
+    Check that a style sheet does not change the layout of the document.
+
+    :param css: the content of a style element
+    :return: None
+    :raises UnsupportedHTMLError: if the style sheet sets properties other than IGNORED_STYLE_SHEET_PROPERTIES or
+    contains at-rules
+    """
+    css = CSS_COMMENT.sub("", css)
+    if CSS_RULE.sub("", css).strip() != "":
+        raise UnsupportedHTMLError("Unsupported style sheet")
+    for declarations in CSS_RULE.findall(css):
+        for declaration in declarations.split(";"):
+            if declaration.strip() == "":
+                continue
+            prop = declaration.partition(":")[0].strip().lower()
+            if prop not in IGNORED_STYLE_SHEET_PROPERTIES:
+                raise UnsupportedHTMLError(
+                    "Unsupported style '{}' in <style>".format(declaration.strip())
+                )
+
+
+class Paragraph:
+    """A paragraph of text runs and line breaks."""
+
+    def __init__(self, style=None, alignment=None):
+        """
+        Initialize a paragraph.
+
+        :param style: the Word paragraph style
+        :param alignment: the WD_ALIGN_PARAGRAPH alignment
+        """
+        self.style = style
+        self.alignment = alignment
+        self.runs = []
+
+    def ends_with_whitespace(self) -> bool:
+        """
+        Check whether new text in this paragraph should have its leading whitespace removed.
+
+        :return: True if the paragraph is empty, ends with a line break or ends with a space
+        """
+        return (
+            len(self.runs) == 0
+            or self.runs[-1] is BREAK
+            or self.runs[-1][0].endswith(" ")
+        )
+
+    def finish(self):
+        """Remove whitespace at the end of the paragraph."""
+        while len(self.runs) > 0 and self.runs[-1] is not BREAK:
+            text, formatting = self.runs[-1]
+            text = text.rstrip(" ")
+            if text != "":
+                self.runs[-1] = (text, formatting)
+                break
+            self.runs.pop()
+
+
+class Table:
+    """A table of which every cell contains a list of paragraphs."""
+
+    def __init__(self):
+        """Initialize a table."""
+        self.rows = []
+
+
+class DocumentBuilder(HTMLParser):
+    """
+    Parse an HTML document into paragraphs and tables.
+
+    Only the subset of HTML used in letter templates is supported: paragraphs, divisions, headings, line breaks, bold,
+    italic and underlined text, lists and simple tables. Inline styles may only set text-align and style sheets may only
+    set the font family.
+    """
+
+    def __init__(self):
+        """Initialize the builder."""
+        super().__init__(convert_charrefs=True)
+        self.blocks = []
+        self.stack = []
+        self.table = None
+        self.cell = None
+        self.paragraph = None
+        self.hidden = 0
+        self.style_sheet = None
+
+    @property
+    def container(self) -> list:
+        """
+        Get the list that new paragraphs are added to.
+
+        :return: the paragraphs of the current table cell or the blocks of the document
+        """
+        return self.cell if self.cell is not None else self.blocks
+
+    def close_paragraph(self):
+        """Finish the current paragraph, the next text will start a new one."""
+        if self.paragraph is not None:
+            self.paragraph.finish()
+            if len(self.paragraph.runs) == 0:
+                self.container.remove(self.paragraph)
+            self.paragraph = None
+
+    def get_paragraph(self) -> Paragraph:
+        """
+        Get the current paragraph, creating it with the style and alignment of the open elements if there is none.
+
+        :return: the current paragraph
+        """
+        if self.paragraph is None:
+            style = None
+            alignment = None
+            for tag, attributes in self.stack:
+                if tag == "li":
+                    style = attributes["list_style"]
+                elif tag in HEADING_STYLES:
+                    style = HEADING_STYLES[tag]
+                if attributes.get("alignment") is not None:
+                    alignment = attributes["alignment"]
+            self.paragraph = Paragraph(style=style, alignment=alignment)
+            self.container.append(self.paragraph)
+        return self.paragraph
+
+    def get_formatting(self) -> dict:
+        """
+        Get the formatting of text in the open elements.
+
+        :return: a dictionary with the bold, italic and underline formatting
+        """
+        formatting = {"bold": False, "italic": False, "underline": False}
+        for tag, _ in self.stack:
+            if tag in FORMAT_TAGS:
+                formatting[FORMAT_TAGS[tag]] = True
+        return formatting
+
+    @staticmethod
+    def get_alignment(tag, attributes):
+        """
+        Get the alignment set in the inline style of an element.
+
+        :param tag: the tag of the element
+        :param attributes: the attributes of the element
+        :return: the WD_ALIGN_PARAGRAPH alignment or None if no alignment is set
+        """
+        alignment = None
+        for declaration in (dict(attributes).get("style") or "").split(";"):
+            if declaration.strip() == "":
+                continue
+            prop, _, value = declaration.partition(":")
+            prop, value = prop.strip().lower(), value.strip().lower()
+            if prop != "text-align" or value not in ALIGNMENTS:
+                raise UnsupportedHTMLError(
+                    "Unsupported style '{}' on <{}>".format(declaration.strip(), tag)
+                )
+            alignment = ALIGNMENTS[value]
+        return alignment
+
+    def handle_starttag(self, tag, attrs):
+        """Handle the start of an element."""
+        if tag in HIDDEN_TAGS:
+            self.hidden += 1
+            if tag == "style":
+                self.style_sheet = []
+            return
+        if self.hidden > 0 or tag in IGNORED_VOID_TAGS:
+            return
+        if tag == "br":
+            self.get_paragraph().runs.append(BREAK)
+            return
+
+        attributes = {"alignment": self.get_alignment(tag, attrs)}
+        if tag in BLOCK_TAGS:
+            if tag == "p" and any(open_tag == "p" for open_tag, _ in self.stack):
+                # A paragraph can not contain another paragraph, the open one is closed implicitly
+                self.end_element("p")
+            self.close_paragraph()
+        elif tag in LIST_STYLES:
+            self.close_paragraph()
+        elif tag == "li":
+            lists = [open_tag for open_tag, _ in self.stack if open_tag in LIST_STYLES]
+            if len(lists) != 1:
+                raise UnsupportedHTMLError("List items must be in exactly one list")
+            if any(open_tag == "li" for open_tag, _ in self.stack):
+                self.end_element("li")
+            attributes["list_style"] = LIST_STYLES[lists[0]]
+            self.close_paragraph()
+        elif tag == "table":
+            if self.table is not None:
+                raise UnsupportedHTMLError("Nested tables are not supported")
+            self.close_paragraph()
+            self.table = Table()
+            self.blocks.append(self.table)
+        elif tag == "tr":
+            if self.table is None:
+                raise UnsupportedHTMLError("Table rows must be in a table")
+            self.close_paragraph()
+            self.cell = None
+            self.table.rows.append([])
+        elif tag in ("td", "th"):
+            if self.table is None or len(self.table.rows) == 0:
+                raise UnsupportedHTMLError("Table cells must be in a table row")
+            if any(
+                dict(attrs).get(span) not in (None, "1")
+                for span in ("colspan", "rowspan")
+            ):
+                raise UnsupportedHTMLError("Merged table cells are not supported")
+            self.close_paragraph()
+            self.cell = []
+            self.table.rows[-1].append(self.cell)
+            if tag == "th":
+                self.stack.append(("b", {}))
+        elif tag not in FORMAT_TAGS and tag not in TRANSPARENT_TAGS:
+            raise UnsupportedHTMLError("Unsupported element <{}>".format(tag))
+        self.stack.append((tag, attributes))
+
+    def handle_startendtag(self, tag, attrs):
+        """Handle an element without content."""
+        self.handle_starttag(tag, attrs)
+        if tag not in IGNORED_VOID_TAGS and tag != "br":
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        """Handle the end of an element."""
+        if tag in HIDDEN_TAGS:
+            self.hidden = max(self.hidden - 1, 0)
+            if tag == "style" and self.style_sheet is not None:
+                check_style_sheet("".join(self.style_sheet))
+                self.style_sheet = None
+            return
+        if self.hidden > 0:
+            return
+        if tag == "p" and not any(open_tag == "p" for open_tag, _ in self.stack):
+            # A closing tag without an opening tag is an empty paragraph
+            self.close_paragraph()
+            return
+        self.end_element(tag)
+
+    def end_element(self, tag):
+        """
+        Close the most recently opened element with a tag and all elements opened after it.
+
+        :param tag: the tag of the element to close
+        """
+        if not any(open_tag == tag for open_tag, _ in self.stack):
+            return
+        while len(self.stack) > 0:
+            open_tag, _ = self.stack.pop()
+            if (
+                open_tag in BLOCK_TAGS
+                or open_tag in LIST_STYLES
+                or open_tag in ("li", "tr", "td", "th", "table")
+            ):
+                self.close_paragraph()
+            if open_tag in ("td", "th"):
+                if open_tag == "th":
+                    self.stack.pop()
+                self.cell = None
+            elif open_tag == "table":
+                self.table = None
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        """Handle text."""
+        if self.style_sheet is not None:
+            self.style_sheet.append(data)
+        if self.hidden > 0:
+            return
+        text = WHITESPACE.sub(" ", data)
+        if self.paragraph is None or self.paragraph.ends_with_whitespace():
+            text = text.lstrip(" ")
+        if text == "":
+            return
+        if self.table is not None and self.cell is None:
+            raise UnsupportedHTMLError("Text in a table must be in a table cell")
+        self.get_paragraph().runs.append((text, self.get_formatting()))
+
+    def build(self, html: str) -> list:
+        """
+        Parse an HTML document.
+
+        :param html: the HTML document
+        :return: a list of Paragraph and Table objects
+        """
+        self.feed(html)
+        self.close()
+        self.close_paragraph()
+        return self.blocks
+
+
+def _write_paragraph(paragraph: Paragraph, docx_paragraph):
+    """
+    Write a paragraph to a Word document paragraph.
+
+    :param paragraph: the paragraph to write
+    :param docx_paragraph: the (empty) python-docx paragraph to write to
+    """
+    if paragraph.style is not None:
+        docx_paragraph.style = paragraph.style
+    if paragraph.alignment is not None:
+        docx_paragraph.alignment = paragraph.alignment
+    for run in paragraph.runs:
+        if run is BREAK:
+            docx_paragraph.add_run().add_break()
+        else:
+            text, formatting = run
+            docx_run = docx_paragraph.add_run(text)
+            docx_run.bold = formatting["bold"] or None
+            docx_run.italic = formatting["italic"] or None
+            docx_run.underline = formatting["underline"] or None
+
+
+def html_to_docx(html: str) -> bytes:
+    """
+    Render an HTML document directly to a Word document (docx).
+
+    :param html: the HTML document
+    :raises UnsupportedHTMLError: if the document uses constructs that are not supported
+    :return: the Word document as bytes
+    """
+    blocks = DocumentBuilder().build(html)
+
+    document = Document()
+    section = document.sections[0]
+    section.page_width = Mm(210)
+    section.page_height = Mm(297)
+    section.left_margin = section.right_margin = Mm(20)
+    section.top_margin = section.bottom_margin = Mm(20)
+
+    for block in blocks:
+        if isinstance(block, Paragraph):
+            _write_paragraph(block, document.add_paragraph())
+        else:
+            columns = max((len(row) for row in block.rows), default=0)
+            if columns == 0:
+                continue
+            table = document.add_table(rows=len(block.rows), cols=columns)
+            for row, cells in zip(table.rows, block.rows):
+                for docx_cell, paragraphs in zip(row.cells, cells):
+                    for index, paragraph in enumerate(paragraphs):
+                        _write_paragraph(
+                            paragraph,
+                            docx_cell.paragraphs[0]
+                            if index == 0
+                            else docx_cell.add_paragraph(),
+                        )
+
+    output = BytesIO()
+    document.save(output)
+    return output.getvalue()
+
+
+def get_scratch_directory() -> Union[str, None]:
+    """
+    Get the directory in which to create scratch files for document conversion.
+
+    This is the DOCX_SCRATCH_DIRECTORY setting if it is set, otherwise the memory-backed /dev/shm if it is available.
+
+    :return: a directory or None to use the default temporary directory
+    """
+    if settings.DOCX_SCRATCH_DIRECTORY is not None:
+        return settings.DOCX_SCRATCH_DIRECTORY
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return "/dev/shm"
+    return None
+
+
+def convert_pdf_to_docx(pdf: bytes) -> bytes:
+    """
+    Convert a PDF document to a Word document (docx).
+
+    The pdf2docx library only supports reading from and writing to files, so the conversion is done in a scratch
+    directory (memory-backed if available) that is always removed afterwards.
+
+    :param pdf: the PDF document
+    :return: the Word document as bytes
+    """
+    with tempfile.TemporaryDirectory(
+        prefix="docx-", dir=get_scratch_directory()
+    ) as directory:
+        pdf_filename = os.path.join(directory, "document.pdf")
+        docx_filename = os.path.join(directory, "document.docx")
+        with open(pdf_filename, "wb") as pdf_file:
+            pdf_file.write(pdf)
+
+        converter = Converter(pdf_filename)
+        try:
+            converter.convert(docx_filename)
+        finally:
+            converter.close()
+
+        with open(docx_filename, "rb") as docx_file:
+            return docx_file.read()
+
+
+def render_docx(html: str) -> bytes:
+    """
+    Render an HTML document to a Word document (docx).
+
+    The document is rendered natively if possible. Documents that use unsupported constructs are rendered to PDF and
+    converted to a Word document with pdf2docx.
+
+    :param html: the HTML document
+    :return: the Word document as bytes
+    """
+    try:
+        return html_to_docx(html)
+    except UnsupportedHTMLError as e:
+        logger.info("Rendering Word document via PDF: {}".format(e))
+        return convert_pdf_to_docx(write_pdf(html))
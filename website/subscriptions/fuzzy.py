@@ -0,0 +1,228 @@
+import heapq
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connection, transaction, OperationalError
+
+from subscriptions.catalog import get_catalog
+from subscriptions.models import Subscription, SubscriptionSearchTerm
+
+logger = logging.getLogger(__name__)
+
+NON_ALPHANUMERIC_PATTERN = re.compile(r"[\W_]+")
+
+
+def normalize(text: str) -> str:
+    """
+    Normalize a text for fuzzy matching.
+
+    :param text: the text
+    :return: the text in lower case with accents removed and everything but letters and digits replaced by spaces
+    """
+    text = "".join(
+        character
+        for character in unicodedata.normalize("NFKD", text.lower())
+        if not unicodedata.combining(character)
+    )
+    return NON_ALPHANUMERIC_PATTERN.sub(" ", text).strip()
+
+
+def get_trigrams(text: str) -> FrozenSet[str]:
+    """
+    Get the trigrams of a text the way pg_trgm does.
+
+    Every word is prefixed with two spaces and suffixed with one space, so a word of n characters has n + 1 trigrams.
+    :param text: the text
+    :return: a set with the trigrams of the normalized text
+    """
+    trigrams = set()
+    for word in normalize(text).split():
+        padded = "  {} ".format(word)
+        trigrams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return frozenset(trigrams)
+
+
+class NGramIndex:
+    """
+    In-memory trigram index for fuzzy matching names.
+
+    The index maps every trigram to the entries containing it. The similarity of an entry to a query is the amount of
+    shared trigrams divided by the amount of trigrams in the union of both (the similarity pg_trgm uses). A subscription
+    can have multiple entries (its name and its search terms), its similarity is that of its best entry.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[int, str]]):
+        """
+        Build the index.
+
+        :param entries: an iterable of (subscription id, text) tuples
+        """
+        self._subscriptions = []
+        self._sizes = []
+        postings = defaultdict(list)
+        for subscription_id, text in entries:
+            trigrams = get_trigrams(text)
+            if len(trigrams) == 0:
+                continue
+            entry = len(self._subscriptions)
+            self._subscriptions.append(subscription_id)
+            self._sizes.append(len(trigrams))
+            for trigram in trigrams:
+                postings[trigram].append(entry)
+        self._postings = {
+            trigram: tuple(entries) for trigram, entries in postings.items()
+        }
+
+    def __len__(self):
+        """
+        Get the amount of entries in the index.
+
+        :return: the amount of entries
+        """
+        return len(self._subscriptions)
+
+    def search(
+        self,
+        query: str,
+        limit: int,
+        threshold: float = 0.0,
+        budget: Optional[float] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Search the subscriptions most similar to a query.
+
+        The posting lists of the query trigrams are counted from the shortest (most selective) to the longest. When the
+        time budget runs out the remaining posting lists are skipped, the result is then based on the most selective
+        trigrams only.
+        :param query: the query
+        :param limit: the maximum amount of results
+        :param threshold: the minimum similarity of a result
+        :param budget: the maximum amount of seconds to spend, no limit if None
+        :return: a list of at most limit (subscription id, similarity) tuples, most similar first
+        """
+        deadline = None if budget is None else time.perf_counter() + budget
+        query_trigrams = get_trigrams(query)
+        postings = sorted(
+            (
+                self._postings[trigram]
+                for trigram in query_trigrams
+                if trigram in self._postings
+            ),
+            key=len,
+        )
+        shared = Counter()
+        for posting in postings:
+            shared.update(posting)
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+
+        similarities: Dict[int, float] = {}
+        for entry, amount in shared.items():
+            similarity = amount / (len(query_trigrams) + self._sizes[entry] - amount)
+            subscription_id = self._subscriptions[entry]
+            if similarity >= threshold and similarity > similarities.get(
+                subscription_id, 0.0
+            ):
+                similarities[subscription_id] = similarity
+        return heapq.nlargest(
+            limit, similarities.items(), key=lambda result: (result[1], -result[0])
+        )
+
+
+_index = None
+_index_snapshot = None
+_index_lock = threading.Lock()
+
+
+def get_ngram_index() -> NGramIndex:
+    """
+    Get the n-gram index of this process.
+
+    The index is built from the catalog snapshot of this process, it is rebuilt when the snapshot changed.
+    :return: the NGramIndex
+    """
+    global _index, _index_snapshot
+    snapshot = get_catalog()
+    with _index_lock:
+        if _index_snapshot is not snapshot:
+            _index = NGramIndex(snapshot.iter_names())
+            _index_snapshot = snapshot
+        return _index
+
+
+def _search_trigram(
+    query: str, limit: int, threshold: float, budget: float
+) -> List[Tuple[int, float]]:
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # The statement timeout enforces the budget, the threshold is used by the % operator of trigram_similar
+            cursor.execute(
+                "SELECT set_config('statement_timeout', %s, true), "
+                "set_config('pg_trgm.similarity_threshold', %s, true)",
+                [str(max(1, int(budget * 1000))), str(threshold)],
+            )
+        names = (
+            Subscription.objects.filter(name__trigram_similar=query)
+            .annotate(similarity=TrigramSimilarity("name", query))
+            .order_by("-similarity")
+            .values_list("id", "similarity")[:limit]
+        )
+        terms = (
+            SubscriptionSearchTerm.subscription.through.objects.filter(
+                subscriptionsearchterm__name__trigram_similar=query
+            )
+            .annotate(
+                similarity=TrigramSimilarity("subscriptionsearchterm__name", query)
+            )
+            .order_by("-similarity")
+            .values_list("subscription_id", "similarity")[:limit]
+        )
+        similarities: Dict[int, float] = {}
+        for subscription_id, similarity in list(names) + list(terms):
+            similarities[subscription_id] = max(
+                similarity, similarities.get(subscription_id, 0.0)
+            )
+    return heapq.nlargest(
+        limit, similarities.items(), key=lambda result: (result[1], -result[0])
+    )
+
+
+def fuzzy_search(query: str, limit: int = None) -> List[Tuple[int, float]]:
+    """
+    Search subscriptions with a name or search term similar to a query, tolerating typos.
+
+    On PostgreSQL the pg_trgm extension is used (with trigram GIN indexes on the names), other databases use the
+    in-memory NGramIndex of this process. The search is limited to FUZZY_SEARCH_BUDGET seconds.
+    :param query: the query
+    :param limit: the maximum amount of results, defaults to FUZZY_SEARCH_RESULTS
+    :return: a list of (subscription id, similarity) tuples, most similar first, of subscriptions with a similarity of
+    at least FUZZY_SEARCH_THRESHOLD
+    """
+    if limit is None:
+        limit = settings.FUZZY_SEARCH_RESULTS
+    if normalize(query) == "":
+        return []
+    if connection.vendor == "postgresql":
+        try:
+            return _search_trigram(
+                query,
+                limit,
+                settings.FUZZY_SEARCH_THRESHOLD,
+                settings.FUZZY_SEARCH_BUDGET,
+            )
+        except OperationalError as e:
+            logger.warning("Fuzzy search for {} failed: {}".format(query, e))
+            return []
+    return get_ngram_index().search(
+        query,
+        limit,
+        threshold=settings.FUZZY_SEARCH_THRESHOLD,
+        budget=settings.FUZZY_SEARCH_BUDGET,
+    )
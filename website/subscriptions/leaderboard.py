@@ -0,0 +1,174 @@
+import bisect
+import time
+from typing import Iterable, List, NamedTuple, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+from subscriptions.catalog import get_catalog, TOP_SUBSCRIPTIONS
+from subscriptions.models import Subscription
+
+ENTRY_FIELDS = ("id", "name", "slug", "category_id", "amount_used")
+
+
+class LeaderboardEntry(NamedTuple):
+    """Subscription on a leaderboard."""
+
+    id: int
+    name: str
+    slug: str
+    category_id: Optional[int]
+    amount_used: int
+
+    @property
+    def pk(self):
+        """
+        Get the primary key of the subscription.
+
+        :return: the id of the subscription
+        """
+        return self.id
+
+
+def get_rank_key(entry: LeaderboardEntry):
+    """
+    Get the sort key of a leaderboard entry.
+
+    :param entry: the LeaderboardEntry
+    :return: a tuple ordering entries by amount_used (descending), name and id, the order of the popularity index
+    """
+    return -entry.amount_used, entry.name, entry.id
+
+
+class Leaderboard:
+    """
+    Sorted list of the most popular subscriptions (of a category).
+
+    The amount_used of a subscription only increases, so the leaderboard can be kept up to date by merging the
+    subscriptions that were used into it: a subscription already on the leaderboard moves up and a subscription that
+    is not on it can only push off the last entry.
+    """
+
+    def __init__(self, entries: Iterable[LeaderboardEntry], size: int):
+        """
+        Initialize the leaderboard.
+
+        :param entries: the entries on the leaderboard
+        :param size: the maximum amount of entries
+        """
+        self.size = size
+        self.entries = sorted(entries, key=get_rank_key)[:size]
+
+    def top(self, limit: int) -> List[LeaderboardEntry]:
+        """
+        Get the first entries of the leaderboard.
+
+        :param limit: the maximum amount of entries
+        :return: a list of at most limit LeaderboardEntries, most popular first
+        """
+        return self.entries[:limit]
+
+    def merge(self, entries: Iterable[LeaderboardEntry]):
+        """
+        Merge the new state of subscriptions into the leaderboard.
+
+        :param entries: LeaderboardEntries of subscriptions whose amount_used increased
+        :return: None
+        """
+        for entry in entries:
+            self.entries = [x for x in self.entries if x.id != entry.id]
+            if len(self.entries) < self.size or get_rank_key(entry) < get_rank_key(
+                self.entries[-1]
+            ):
+                bisect.insort(self.entries, entry, key=get_rank_key)
+                del self.entries[self.size :]
+
+
+def _get_key(category_id: Optional[int]) -> str:
+    return "leaderboard:{}:{}".format(
+        get_catalog().version, "all" if category_id is None else category_id
+    )
+
+
+def build_leaderboard(category_id: Optional[int] = None) -> Leaderboard:
+    """
+    Build a leaderboard from the database.
+
+    The subscriptions are fetched in the order of the popularity index of Subscription, so only the first
+    LEADERBOARD_SIZE rows are read instead of sorting the whole table.
+    :param category_id: the id of the category (including all categories below it), None for all subscriptions
+    :return: the Leaderboard
+    """
+    queryset = Subscription.objects.order_by("-amount_used", "name", "id")
+    if category_id is not None:
+        queryset = queryset.filter(category__ancestor_links__ancestor_id=category_id)
+    return Leaderboard(
+        (
+            LeaderboardEntry(*row)
+            for row in queryset.values_list(*ENTRY_FIELDS)[: settings.LEADERBOARD_SIZE]
+        ),
+        settings.LEADERBOARD_SIZE,
+    )
+
+
+def get_leaderboard(category_id: Optional[int] = None) -> Leaderboard:
+    """
+    Get a leaderboard from the cache, building it if it is not cached.
+
+    Leaderboards are cached per catalog version, so they are rebuilt when subscriptions are added, changed or removed.
+    They are also rebuilt every LEADERBOARD_TIMEOUT seconds to pick up updates made by processes that do not share the
+    LEADERBOARD_CACHE.
+    :param category_id: the id of the category (including all categories below it), None for all subscriptions
+    :return: the Leaderboard
+    """
+    cache = caches[settings.LEADERBOARD_CACHE]
+    key = _get_key(category_id)
+    cached = cache.get(key)
+    if cached is not None:
+        return Leaderboard(cached[1], settings.LEADERBOARD_SIZE)
+    leaderboard = build_leaderboard(category_id)
+    cache.set(key, (time.time(), leaderboard.entries), settings.LEADERBOARD_TIMEOUT)
+    return leaderboard
+
+
+def update_leaderboards(subscription_ids: Iterable[int]) -> bool:
+    """
+    Merge the new amount_used of subscriptions into the cached leaderboards.
+
+    The leaderboard of all subscriptions and the leaderboards of the categories of the subscriptions (and their
+    ancestors) are updated. Leaderboards that are not cached are left alone, they are built on their next read. Updated
+    leaderboards keep their original expiry time.
+    :param subscription_ids: the ids of the subscriptions whose amount_used increased
+    :return: True if the first TOP_SUBSCRIPTIONS entries of the leaderboard of all subscriptions (might have) changed
+    """
+    entries = [
+        LeaderboardEntry(*row)
+        for row in Subscription.objects.filter(id__in=subscription_ids).values_list(
+            *ENTRY_FIELDS
+        )
+    ]
+    catalog = get_catalog()
+    updates = {None: entries}
+    for entry in entries:
+        for category_id in catalog.get_ancestor_categories(entry.category_id):
+            updates.setdefault(category_id, []).append(entry)
+
+    cache = caches[settings.LEADERBOARD_CACHE]
+    changed = False
+    for category_id, category_entries in updates.items():
+        key = _get_key(category_id)
+        cached = cache.get(key)
+        if cached is None:
+            # Without the previous leaderboard it is unknown whether the first entries changed
+            changed = changed or category_id is None
+            continue
+        built, cached_entries = cached
+        leaderboard = Leaderboard(cached_entries, settings.LEADERBOARD_SIZE)
+        top = leaderboard.top(TOP_SUBSCRIPTIONS)
+        leaderboard.merge(category_entries)
+        remaining = built + settings.LEADERBOARD_TIMEOUT - time.time()
+        if remaining > 0:
+            cache.set(key, (built, leaderboard.entries), remaining)
+        if category_id is None:
+            changed = top != leaderboard.top(TOP_SUBSCRIPTIONS)
+    return changed
@@ -0,0 +1,94 @@
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from pdf2docx import parse
+
+from subscriptions.docx_rendering import convert_pdf_to_docx, html_to_docx
+from subscriptions.models import Subscription
+from subscriptions.rendering import write_pdf
+from subscriptions.services import render_deregister_letter_html
+
+
+def convert_pdf_to_docx_with_temporary_files(pdf: bytes) -> bytes:
+    """
+    Convert a PDF document to a Word document the way it was done before the scratch directory pipeline.
+
+    :param pdf: the PDF document
+    :return: the Word document as bytes
+    """
+    pdf_file = tempfile.NamedTemporaryFile()
+    pdf_file.write(pdf)
+    pdf_file.flush()
+    docx_file = tempfile.NamedTemporaryFile()
+    parse(pdf_file.name, docx_file.name)
+    pdf_file.close()
+    written_docx_file = open(docx_file.name, "rb")
+    docx_content = written_docx_file.read()
+    written_docx_file.close()
+    docx_file.close()
+    return docx_content
+
+
+class Command(BaseCommand):
+    """Benchmark the rendering of deregister letters to Word documents."""
+
+    help = "Compare the pipelines for rendering deregister letters to Word documents."
+
+    def add_arguments(self, parser):
+        """Add arguments to the command."""
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=20,
+            help="Number of renders to time per pipeline.",
+        )
+        parser.add_argument(
+            "--subscription",
+            type=int,
+            default=None,
+            help="Primary key of the subscription to render the letter for, defaults to the first subscription.",
+        )
+
+    def handle(self, *args, **options):
+        """Run the benchmark."""
+        if options["subscription"] is not None:
+            subscription = Subscription.objects.filter(
+                pk=options["subscription"]
+            ).first()
+        else:
+            subscription = Subscription.objects.first()
+        if subscription is None:
+            raise CommandError("No subscription to render a letter for.")
+
+        html = render_deregister_letter_html(
+            settings.DEFAULT_TEMPLATE_PARAMETERS, subscription
+        )
+        pipelines = [
+            (
+                "PDF via temporary files",
+                lambda: convert_pdf_to_docx_with_temporary_files(write_pdf(html)),
+            ),
+            (
+                "PDF via scratch directory",
+                lambda: convert_pdf_to_docx(write_pdf(html)),
+            ),
+            ("native", lambda: html_to_docx(html)),
+        ]
+        for name, render in pipelines:
+            timings = []
+            for _ in range(options["iterations"]):
+                start = time.perf_counter()
+                render()
+                timings.append(time.perf_counter() - start)
+            self.stdout.write(
+                "{}: mean {:.2f} ms, median {:.2f} ms, min {:.2f} ms over {} renders".format(
+                    name,
+                    statistics.mean(timings) * 1000,
+                    statistics.median(timings) * 1000,
+                    min(timings) * 1000,
+                    len(timings),
+                )
+            )
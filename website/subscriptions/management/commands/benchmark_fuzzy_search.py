@@ -0,0 +1,155 @@
+import random
+import statistics
+import string
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from subscriptions.fuzzy import NGramIndex
+
+BRANDS = [
+    "netflix",
+    "ziggo",
+    "spotify",
+    "videoland",
+    "basic fit",
+    "fit for free",
+    "t-mobile",
+    "kpn",
+    "vodafone",
+    "disney plus",
+    "new york times",
+    "volkskrant",
+    "telegraaf",
+    "anwb",
+    "greenpeace",
+    "unicef",
+]
+
+SUFFIXES = [
+    "premium",
+    "basis",
+    "familie",
+    "student",
+    "zakelijk",
+    "jaar",
+    "maand",
+    "nederland",
+    "belgie",
+    "online",
+]
+
+
+def generate_catalog(size: int, rng: random.Random):
+    """
+    Generate a synthetic catalog of subscription names.
+
+    :param size: the amount of subscriptions
+    :param rng: the random generator
+    :return: a list of (id, name) tuples
+    """
+    return [
+        (
+            subscription_id,
+            "{} {} {}".format(
+                rng.choice(BRANDS),
+                rng.choice(SUFFIXES),
+                "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 8))),
+            ),
+        )
+        for subscription_id in range(1, size + 1)
+    ]
+
+
+def add_typo(text: str, rng: random.Random) -> str:
+    """
+    Add a typo to a text by deleting, replacing, inserting or swapping a character.
+
+    :param text: the text
+    :param rng: the random generator
+    :return: the text with a typo
+    """
+    position = rng.randrange(len(text) - 1)
+    typo = rng.choice(["delete", "replace", "insert", "swap"])
+    if typo == "delete":
+        return text[:position] + text[position + 1 :]
+    elif typo == "replace":
+        return (
+            text[:position] + rng.choice(string.ascii_lowercase) + text[position + 1 :]
+        )
+    elif typo == "insert":
+        return text[:position] + rng.choice(string.ascii_lowercase) + text[position:]
+    return text[:position] + text[position + 1] + text[position] + text[position + 2 :]
+
+
+class Command(BaseCommand):
+    """Benchmark the in-memory fuzzy search index."""
+
+    help = "Benchmark the in-memory fuzzy search index over a synthetic catalog of subscriptions."
+
+    def add_arguments(self, parser):
+        """Add arguments to the command."""
+        parser.add_argument(
+            "--size",
+            type=int,
+            default=100000,
+            help="Number of subscriptions in the synthetic catalog.",
+        )
+        parser.add_argument(
+            "--queries",
+            type=int,
+            default=200,
+            help="Number of queries with a typo to time.",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Seed of the random generator."
+        )
+
+    def handle(self, *args, **options):
+        """Run the benchmark."""
+        rng = random.Random(options["seed"])
+        catalog = generate_catalog(options["size"], rng)
+        start = time.perf_counter()
+        index = NGramIndex(catalog)
+        self.stdout.write(
+            "Built an index of {} entries in {:.0f} ms".format(
+                len(index), (time.perf_counter() - start) * 1000
+            )
+        )
+
+        queries = [
+            (subscription_id, add_typo(name, rng))
+            for subscription_id, name in rng.sample(catalog, options["queries"])
+        ]
+        for name, budget in [
+            ("unlimited", None),
+            (
+                "budget {:.0f} ms".format(settings.FUZZY_SEARCH_BUDGET * 1000),
+                settings.FUZZY_SEARCH_BUDGET,
+            ),
+        ]:
+            timings = []
+            found = 0
+            for subscription_id, query in queries:
+                start = time.perf_counter()
+                results = index.search(
+                    query,
+                    settings.FUZZY_SEARCH_RESULTS,
+                    threshold=settings.FUZZY_SEARCH_THRESHOLD,
+                    budget=budget,
+                )
+                timings.append(time.perf_counter() - start)
+                if subscription_id in [result for result, _ in results]:
+                    found += 1
+            timings.sort()
+            self.stdout.write(
+                "{}: median {:.2f} ms, p95 {:.2f} ms, max {:.2f} ms, recall@{} {:.1%}".format(
+                    name,
+                    statistics.median(timings) * 1000,
+                    timings[int(len(timings) * 0.95) - 1] * 1000,
+                    timings[-1] * 1000,
+                    settings.FUZZY_SEARCH_RESULTS,
+                    found / len(queries),
+                )
+            )
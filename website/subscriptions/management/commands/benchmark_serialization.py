@@ -0,0 +1,132 @@
+import decimal
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from kanikervanaf.api.renderers import FastJSONRenderer
+from kanikervanaf.api.values import get_values_serializer
+from subscriptions.api.v1.serializers import SubscriptionSerializer
+from subscriptions.models import Subscription, SubscriptionCategory
+
+
+def generate_subscriptions(size: int, rng: random.Random, category=None):
+    """
+    Generate synthetic subscriptions.
+
+    :param size: the amount of subscriptions
+    :param rng: the random generator
+    :param category: the category of the subscriptions
+    :return: a list of unsaved subscriptions
+    """
+    return [
+        Subscription(
+            name="Benchmark abonnement {}".format(number),
+            slug="benchmark-abonnement-{}".format(number),
+            category=category,
+            price=decimal.Decimal(rng.randint(0, 10000)) / 100,
+            support_email="support{}@example.com".format(number),
+            support_postal_code="1234 AB",
+            support_city="Nijmegen",
+            amount_used=rng.randint(1, 1000),
+            can_generate_letter=rng.random() < 0.5,
+            can_generate_email=rng.random() < 0.5,
+            explanation_field="<p>Opzeggen kan per brief of per e-mail.</p>",
+        )
+        for number in range(size)
+    ]
+
+
+class Command(BaseCommand):
+    """Benchmark serializing subscriptions with the ModelSerializer and with the values() rows."""
+
+    help = (
+        "Benchmark serializing and rendering synthetic subscriptions with the ModelSerializer and JSONRenderer "
+        "against the ValuesSerializer and FastJSONRenderer. The synthetic subscriptions are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        """Add arguments to the command."""
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[100, 1000, 10000],
+            help="Numbers of subscriptions to serialize.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Number of times to time every size.",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Seed of the random generator."
+        )
+
+    def time(self, function, repeat: int):
+        """
+        Time a function.
+
+        :param function: the function to time
+        :param repeat: the number of times to call the function
+        :return: a tuple with the median duration in seconds and the output of the function
+        """
+        timings = []
+        output = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = function()
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings), output
+
+    def handle(self, *args, **options):
+        """Run the benchmark."""
+        rng = random.Random(options["seed"])
+        names = tuple(SubscriptionSerializer.Meta.fields)
+        values_serializer = get_values_serializer(SubscriptionSerializer, names)
+
+        with transaction.atomic():
+            category = SubscriptionCategory.objects.create(
+                name="Benchmark", slug="benchmark-serialization"
+            )
+            Subscription.objects.bulk_create(
+                generate_subscriptions(max(options["sizes"]), rng, category),
+                batch_size=1000,
+            )
+            queryset = Subscription.objects.filter(category=category).order_by("id")
+            for size in options["sizes"]:
+                page = queryset[:size]
+                serializer_time, expected = self.time(
+                    lambda: JSONRenderer().render(
+                        SubscriptionSerializer(page, many=True).data
+                    ),
+                    options["repeat"],
+                )
+                values_time, content = self.time(
+                    lambda: FastJSONRenderer().render(
+                        values_serializer.serialize(values_serializer.get_rows(page))
+                    ),
+                    options["repeat"],
+                )
+                if content != expected:
+                    raise CommandError(
+                        "The output of the ValuesSerializer differs for {} rows.".format(
+                            size
+                        )
+                    )
+                self.stdout.write(
+                    "{} rows: ModelSerializer {:.1f} ms ({:.0f} rows/s), values {:.1f} ms ({:.0f} rows/s), "
+                    "{:.1f}x".format(
+                        size,
+                        serializer_time * 1000,
+                        size / serializer_time,
+                        values_time * 1000,
+                        size / values_time,
+                        serializer_time / values_time,
+                    )
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from subscriptions.models import SubscriptionSearchDocument
+
+
+class Command(BaseCommand):
+    """Rebuild the search documents of all subscriptions."""
+
+    help = (
+        "Rebuild the search documents of all subscriptions, run this after changing subscriptions or search terms "
+        "without signals (for example with QuerySet.update())."
+    )
+
+    def handle(self, *args, **options):
+        """Rebuild the search documents."""
+        SubscriptionSearchDocument.rebuild()
+        self.stdout.write(
+            "Rebuilt {} search document(s).".format(
+                SubscriptionSearchDocument.objects.count()
+            )
+        )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from subscriptions.rollups import rollup_deregistrations
+from subscriptions.services import update_popularity
+
+
+class Command(BaseCommand):
+    """Roll up deregistration events and update the popularity of subscriptions."""
+
+    help = (
+        "Aggregate deregistration events into hourly and daily rollups and update the amount_used of subscriptions, "
+        "run this periodically (but not concurrently)."
+    )
+
+    def handle(self, *args, **options):
+        """Roll up the deregistration events."""
+        deltas = rollup_deregistrations()
+        if len(deltas) > 0:
+            update_popularity(deltas.keys())
+            self.stdout.write(
+                "Rolled up {} deregistration(s) of {} subscription(s).".format(
+                    sum(deltas.values()), len(deltas)
+                )
+            )
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from subscriptions.services import run_deregister_jobs
+
+
+class Command(BaseCommand):
+    """Run a worker that handles queued deregister jobs."""
+
+    help = "Run a worker that handles queued deregister jobs."
+
+    def add_arguments(self, parser):
+        """Add arguments to the command."""
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run all jobs that are ready and exit afterwards.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=2.0,
+            help="Seconds to wait before checking for new jobs when the queue is empty.",
+        )
+
+    def handle(self, *args, **options):
+        """Run the worker."""
+        while True:
+            close_old_connections()
+            amount = run_deregister_jobs()
+            if amount > 0:
+                self.stdout.write("Handled {} deregister job(s).".format(amount))
+            if options["once"]:
+                break
+            if amount == 0:
+                time.sleep(options["sleep"])
@@ -0,0 +1,80 @@
+# Generated by Django 4.0.6 on 2026-10-18 09:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_subscription_category_closure(apps, schema_editor):
+    SubscriptionCategory = apps.get_model("subscriptions", "SubscriptionCategory")
+    SubscriptionCategoryClosure = apps.get_model(
+        "subscriptions", "SubscriptionCategoryClosure"
+    )
+    parents = dict(SubscriptionCategory.objects.values_list("id", "category_id"))
+    links = []
+    for category_id in parents.keys():
+        ancestor_id, depth, visited = category_id, 0, set()
+        while ancestor_id in parents and ancestor_id not in visited:
+            visited.add(ancestor_id)
+            links.append(
+                SubscriptionCategoryClosure(
+                    ancestor_id=ancestor_id, descendant_id=category_id, depth=depth
+                )
+            )
+            ancestor_id, depth = parents[ancestor_id], depth + 1
+    SubscriptionCategoryClosure.objects.bulk_create(links)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "subscriptions",
+            "0012_alter_queuedmaillist_id_alter_subscription_id_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SubscriptionCategoryClosure",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("depth", models.PositiveIntegerField()),
+                (
+                    "ancestor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="descendant_links",
+                        to="subscriptions.subscriptioncategory",
+                    ),
+                ),
+                (
+                    "descendant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ancestor_links",
+                        to="subscriptions.subscriptioncategory",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("ancestor", "descendant")},
+            },
+        ),
+        migrations.AddIndex(
+            model_name="subscriptioncategoryclosure",
+            index=models.Index(
+                fields=["descendant", "depth"], name="subscriptio_descend_46c5b9_idx"
+            ),
+        ),
+        migrations.RunPython(
+            build_subscription_category_closure, migrations.RunPython.noop
+        ),
+    ]
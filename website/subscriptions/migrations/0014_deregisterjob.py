@@ -0,0 +1,87 @@
+# Generated by Django 4.0.6 on 2026-10-18 09:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("subscriptions", "0013_subscriptioncategoryclosure"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeregisterJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "idempotency_key",
+                    models.CharField(
+                        help_text="Key preventing the same request from being queued twice (the token of the mail list).",
+                        max_length=64,
+                        unique=True,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "Queued"),
+                            ("running", "Running"),
+                            ("succeeded", "Succeeded"),
+                            ("failed", "Failed"),
+                        ],
+                        db_index=True,
+                        default="queued",
+                        max_length=16,
+                    ),
+                ),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("last_error", models.TextField(blank=True)),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                (
+                    "available_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        help_text="The job will not be picked up by a worker before this time.",
+                    ),
+                ),
+                ("started", models.DateTimeField(blank=True, null=True)),
+                ("finished", models.DateTimeField(blank=True, null=True)),
+                (
+                    "duration",
+                    models.DurationField(
+                        blank=True,
+                        help_text="The duration of the last attempt.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "mail_list",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="deregister_job",
+                        to="subscriptions.queuedmaillist",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="deregisterjob",
+            index=models.Index(
+                fields=["status", "available_at"], name="subscriptio_status_bc789d_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.6 on 2026-10-18 10:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("subscriptions", "0014_deregisterjob"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="queuedmaillist",
+            name="created",
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,132 @@
+# Generated by Django 4.0.6 on 2026-10-18 10:14
+
+from collections import defaultdict
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models, transaction, DatabaseError
+import django.db.models.deletion
+
+FTS_TABLE = "subscriptions_subscriptionsearch_fts"
+DOCUMENT_TABLE = "subscriptions_subscriptionsearchdocument"
+GIN_INDEX = "subscriptions_search_vector_gin"
+
+SQLITE_FTS5_CREATE = [
+    "CREATE VIRTUAL TABLE {fts} USING fts5(name, terms, content='{document}', content_rowid='subscription_id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER {fts}_insert AFTER INSERT ON {document} BEGIN "
+    "INSERT INTO {fts}(rowid, name, terms) VALUES (new.subscription_id, new.name, new.terms); END",
+    "CREATE TRIGGER {fts}_delete AFTER DELETE ON {document} BEGIN "
+    "INSERT INTO {fts}({fts}, rowid, name, terms) VALUES ('delete', old.subscription_id, old.name, old.terms); END",
+    "CREATE TRIGGER {fts}_update AFTER UPDATE ON {document} BEGIN "
+    "INSERT INTO {fts}({fts}, rowid, name, terms) VALUES ('delete', old.subscription_id, old.name, old.terms); "
+    "INSERT INTO {fts}(rowid, name, terms) VALUES (new.subscription_id, new.name, new.terms); END",
+]
+
+SQLITE_FTS5_DROP = [
+    "DROP TRIGGER IF EXISTS {fts}_insert",
+    "DROP TRIGGER IF EXISTS {fts}_delete",
+    "DROP TRIGGER IF EXISTS {fts}_update",
+    "DROP TABLE IF EXISTS {fts}",
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX {} ON {} USING gin (search_vector)".format(
+                GIN_INDEX, DOCUMENT_TABLE
+            )
+        )
+    elif vendor == "sqlite":
+        try:
+            with transaction.atomic(using=schema_editor.connection.alias):
+                for statement in SQLITE_FTS5_CREATE:
+                    schema_editor.execute(
+                        statement.format(fts=FTS_TABLE, document=DOCUMENT_TABLE)
+                    )
+        except DatabaseError:
+            # SQLite was compiled without FTS5, searching falls back to a substring search
+            pass
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS {}".format(GIN_INDEX))
+    elif vendor == "sqlite":
+        for statement in SQLITE_FTS5_DROP:
+            schema_editor.execute(statement.format(fts=FTS_TABLE))
+
+
+def build_search_documents(apps, schema_editor):
+    Subscription = apps.get_model("subscriptions", "Subscription")
+    SubscriptionSearchTerm = apps.get_model("subscriptions", "SubscriptionSearchTerm")
+    SubscriptionSearchDocument = apps.get_model(
+        "subscriptions", "SubscriptionSearchDocument"
+    )
+    terms = defaultdict(list)
+    for subscription_id, term in (
+        SubscriptionSearchTerm.subscription.through.objects.values_list(
+            "subscription_id", "subscriptionsearchterm__name"
+        )
+        .order_by("subscriptionsearchterm__name")
+        .iterator()
+    ):
+        terms[subscription_id].append(term)
+    SubscriptionSearchDocument.objects.bulk_create(
+        [
+            SubscriptionSearchDocument(
+                subscription_id=subscription_id,
+                name=name,
+                terms=" ".join(terms[subscription_id]),
+            )
+            for subscription_id, name in Subscription.objects.values_list(
+                "id", "name"
+            ).order_by()
+        ]
+    )
+    if schema_editor.connection.vendor == "postgresql":
+        SubscriptionSearchDocument.objects.update(
+            search_vector=SearchVector(
+                "name", weight="A", config=settings.SEARCH_CONFIG
+            )
+            + SearchVector("terms", weight="B", config=settings.SEARCH_CONFIG)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("subscriptions", "0015_queuedmaillist_created_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SubscriptionSearchDocument",
+            fields=[
+                (
+                    "subscription",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="search_document",
+                        serialize=False,
+                        to="subscriptions.subscription",
+                    ),
+                ),
+                ("name", models.TextField(blank=True)),
+                ("terms", models.TextField(blank=True)),
+                (
+                    "search_vector",
+                    django.contrib.postgres.search.SearchVectorField(
+                        blank=True, null=True
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(build_search_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.0.6 on 2026-10-18 10:40
+
+from django.db import migrations
+
+TRIGRAM_INDEXES = [
+    ("subscriptions_subscription_name_trgm", "subscriptions_subscription"),
+    ("subscriptions_searchterm_name_trgm", "subscriptions_subscriptionsearchterm"),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for index, table in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            "CREATE INDEX {} ON {} USING gin (name gin_trgm_ops)".format(index, table)
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for index, _ in TRIGRAM_INDEXES:
+        schema_editor.execute("DROP INDEX IF EXISTS {}".format(index))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("subscriptions", "0016_subscriptionsearchdocument"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.0.6 on 2026-10-18 10:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("subscriptions", "0018_catalogversion"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="subscription",
+            index=models.Index(
+                fields=["-amount_used", "name", "id"],
+                name="subscription_popularity_idx",
+            ),
+        ),
+    ]
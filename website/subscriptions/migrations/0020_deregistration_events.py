@@ -0,0 +1,94 @@
+# Generated by Django 4.0.6 on 2026-10-18 10:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("subscriptions", "0019_subscription_popularity_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeregistrationRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("hour", "Hour"), ("day", "Day")], max_length=4
+                    ),
+                ),
+                (
+                    "start",
+                    models.DateTimeField(help_text="The start of the hour or day."),
+                ),
+                ("count", models.PositiveIntegerField()),
+                (
+                    "subscription",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="deregistration_rollups",
+                        to="subscriptions.subscription",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="DeregistrationEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        db_index=True, default=django.utils.timezone.now
+                    ),
+                ),
+                (
+                    "category",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="The category of the subscription at the time of deregistering.",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="subscriptions.subscriptioncategory",
+                    ),
+                ),
+                (
+                    "subscription",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="deregistration_events",
+                        to="subscriptions.subscription",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="deregistrationrollup",
+            constraint=models.UniqueConstraint(
+                fields=("period", "start", "subscription"),
+                name="unique_deregistration_rollup",
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.0.6 on 2026-10-18 11:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("subscriptions", "0020_deregistration_events"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="deregisterjob",
+            name="sent_items",
+            field=models.ManyToManyField(
+                blank=True,
+                help_text="The subscriptions of which the deregister email was sent, these are skipped when the job is retried.",
+                related_name="+",
+                to="subscriptions.subscription",
+            ),
+        ),
+    ]
@@ -1,10 +1,14 @@
 import os
+from collections import defaultdict
 
-from django.db import models
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import models, transaction, connection
+from django.db.models import F, Q, Count, OuterRef, Subquery, Window
+from django.db.models.functions import Coalesce, RowNumber
 import secrets
 import datetime
-import pytz
 from django.conf import settings
+from django.utils import timezone
 from tinymce.models import HTMLField
 from ordered_model.models import OrderedModel
 
@@ -213,6 +217,12 @@ class Subscription(SubscriptionObject):
         """Meta class."""
 
         ordering = ["name"]
+        indexes = [
+            models.Index(
+                fields=["-amount_used", "name", "id"],
+                name="subscription_popularity_idx",
+            )
+        ]
 
     @staticmethod
     def top_category(category, max_items=5, order_by=None):
@@ -224,7 +234,9 @@ class Subscription(SubscriptionObject):
         :param order_by: the order by which to order the items
         :return: a list of Subscription objects being the top of a category
         """
-        queryset = Subscription.objects.filter(category__in=category.get_family_tree())
+        queryset = Subscription.objects.filter(
+            category__ancestor_links__ancestor=category
+        )
         if order_by is not None:
             queryset = queryset.order_by(order_by)
 
@@ -233,6 +245,69 @@ class Subscription(SubscriptionObject):
         else:
             return queryset
 
+    @staticmethod
+    def top_per_top_level_category(max_items=5):
+        """
+        Get the top of all top level categories at once.
+
+        Ranks the subscriptions within the family tree of each top level category with a ROW_NUMBER() window function
+        (ordered by amount_used) and keeps the first max_items of each partition, all in one query. Databases without
+        window function support fall back to counting the higher ranked subscriptions in a correlated subquery.
+
+        :param max_items: the maximum amount of items to put in the top of each category
+        :return: a dictionary mapping the id of a top level category to a list of Subscription objects
+        """
+        queryset = Subscription.objects.filter(
+            category__ancestor_links__ancestor__category=None
+        ).annotate(root_category=F("category__ancestor_links__ancestor"))
+
+        if connection.features.supports_over_clause:
+            queryset = queryset.annotate(
+                top_rank=Window(
+                    expression=RowNumber(),
+                    partition_by=[F("root_category")],
+                    order_by=[F("amount_used").desc(), F("name").asc(), F("id").asc()],
+                )
+            )
+        else:
+            higher_ranked = Subscription.objects.filter(
+                category__ancestor_links__ancestor=OuterRef("root_category")
+            ).filter(
+                Q(amount_used__gt=OuterRef("amount_used"))
+                | Q(amount_used=OuterRef("amount_used"), name__lt=OuterRef("name"))
+                | Q(
+                    amount_used=OuterRef("amount_used"),
+                    name=OuterRef("name"),
+                    id__lt=OuterRef("id"),
+                )
+            )
+            higher_ranked_count = (
+                higher_ranked.order_by()
+                .values("category__ancestor_links__ancestor")
+                .annotate(count=Count("id"))
+                .values("count")
+            )
+            queryset = queryset.annotate(
+                top_rank=Coalesce(
+                    Subquery(higher_ranked_count, output_field=models.IntegerField()),
+                    0,
+                )
+                + 1
+            )
+
+        # Filtering on a window function is not possible in the ORM, so the ranked query is used as a subquery
+        sql, params = queryset.order_by().query.sql_with_params()
+        ranked = Subscription.objects.raw(
+            "SELECT * FROM ({}) ranked WHERE ranked.top_rank <= %s "
+            "ORDER BY ranked.root_category, ranked.top_rank".format(sql),
+            params + (max_items,),
+        )
+
+        tops = dict()
+        for subscription in ranked:
+            tops.setdefault(subscription.root_category, []).append(subscription)
+        return tops
+
     def has_registered_price(self):
         """
         Check if a subscription has a registered price.
@@ -276,13 +351,15 @@ class Subscription(SubscriptionObject):
 
     def deregistered(self):
         """
-        Update the amount of times the subscription has been deregistered.
+        Record that the subscription has been deregistered.
 
-        Adds one to the amount of time this subscription has been used
+        Adds a DeregistrationEvent for this subscription, amount_used is updated when the events are rolled up (see
+        subscriptions/rollups.py).
         :return: None
         """
-        self.amount_used += 1
-        self.save()
+        DeregistrationEvent.objects.create(
+            subscription_id=self.pk, category_id=self.category_id
+        )
 
 
 class SubscriptionCategory(SubscriptionObject, OrderedModel):
@@ -317,29 +394,17 @@ class SubscriptionCategory(SubscriptionObject, OrderedModel):
         """
         return SubscriptionCategory.objects.filter(category=None)
 
-    def get_family_tree(self, already_visited=None):
+    def get_family_tree(self):
         """
         Get all family members of a category.
 
-        :param already_visited: against infinite recursion
-        :return: a list with all family members of a category.
+        :return: a list with all family members of a category, starting with the category itself
         """
-        if already_visited is None:
-            already_visited = []
-
-        if self in already_visited:
-            return []
-        else:
-            already_visited.append(self)
-
-        children_visiting = [x for x in self.get_subcategories(order="id")]
-        all_children = []
-        for child in children_visiting:
-            all_children = all_children + child.get_family_tree(
-                already_visited=already_visited
+        return list(
+            SubscriptionCategory.objects.filter(ancestor_links__ancestor=self).order_by(
+                "ancestor_links__depth", "id"
             )
-
-        return [self] + all_children
+        )
 
     def get_path_to_me(self):
         """
@@ -348,10 +413,106 @@ class SubscriptionCategory(SubscriptionObject, OrderedModel):
         :return: a list where the first category is a top level category and the next ones the children to the category
         where this function is called upon
         """
-        if self.category is None:
-            return [self]
+        return list(
+            SubscriptionCategory.objects.filter(
+                descendant_links__descendant=self
+            ).order_by("-descendant_links__depth")
+        )
+
+
+class SubscriptionCategoryClosure(models.Model):
+    """
+    Closure table for the SubscriptionCategory tree.
+
+    Stores a row for every (ancestor, descendant) pair in the category tree, including a row with depth 0 linking each
+    category to itself. This allows resolving all descendants or ancestors of a category in a single query.
+    """
+
+    ancestor = models.ForeignKey(
+        SubscriptionCategory, related_name="descendant_links", on_delete=models.CASCADE
+    )
+    descendant = models.ForeignKey(
+        SubscriptionCategory, related_name="ancestor_links", on_delete=models.CASCADE
+    )
+    depth = models.PositiveIntegerField()
+
+    class Meta:
+        """Meta class."""
+
+        unique_together = ("ancestor", "descendant")
+        indexes = [models.Index(fields=["descendant", "depth"])]
+
+    def __str__(self):
+        """
+        Convert this object to a string.
+
+        :return: a string with the ancestor, descendant and depth
+        """
+        return "{} > {} ({})".format(self.ancestor, self.descendant, self.depth)
+
+    @staticmethod
+    def is_up_to_date(category):
+        """
+        Check whether the closure rows of a category match its current parent.
+
+        :param category: the SubscriptionCategory to check
+        :return: True if the closure rows linking the category to itself and to its parent exist, False otherwise
+        """
+        links = set(
+            SubscriptionCategoryClosure.objects.filter(
+                descendant=category, depth__lte=1
+            ).values_list("ancestor_id", "depth")
+        )
+        expected = {(category.id, 0)}
+        if category.category_id is not None:
+            expected.add((category.category_id, 1))
+        return links == expected
+
+    @staticmethod
+    def rebuild(categories=None):
+        """
+        Rebuild the closure rows of (a part of) the category tree.
+
+        The adjacency list (the category field of SubscriptionCategory) is leading. The whole tree is fetched in one
+        query, after which the closure rows of the subtrees rooted at categories are replaced.
+
+        :param categories: an iterable of SubscriptionCategory objects (or ids) whose subtrees to rebuild, if None the
+        closure rows of the whole tree are rebuilt
+        :return: None
+        """
+        parents = dict(SubscriptionCategory.objects.values_list("id", "category_id"))
+        children = dict()
+        for category_id, parent_id in parents.items():
+            children.setdefault(parent_id, []).append(category_id)
+
+        if categories is None:
+            subtree = set(parents.keys())
         else:
-            return self.category.get_path_to_me() + [self]
+            subtree = set()
+            to_visit = [getattr(x, "id", x) for x in categories]
+            while to_visit:
+                category_id = to_visit.pop()
+                if category_id in parents and category_id not in subtree:
+                    subtree.add(category_id)
+                    to_visit.extend(children.get(category_id, []))
+
+        links = []
+        for category_id in subtree:
+            ancestor_id, depth, visited = category_id, 0, set()
+            while ancestor_id in parents and ancestor_id not in visited:
+                visited.add(ancestor_id)
+                links.append(
+                    SubscriptionCategoryClosure(
+                        ancestor_id=ancestor_id, descendant_id=category_id, depth=depth
+                    )
+                )
+                ancestor_id, depth = parents[ancestor_id], depth + 1
+
+        with transaction.atomic():
+            SubscriptionCategoryClosure.objects.filter(
+                descendant_id__in=subtree
+            ).delete()
+            SubscriptionCategoryClosure.objects.bulk_create(links)
 
 
 class SubscriptionSearchTerm(models.Model):
@@ -369,12 +530,206 @@ class SubscriptionSearchTerm(models.Model):
         return self.name
 
 
+class SubscriptionSearchDocument(models.Model):
+    """
+    Search document of a Subscription, containing its name and all its search terms.
+
+    On PostgreSQL the document is indexed in search_vector (with a GIN index), on SQLite it is indexed in an FTS5 table
+    that is kept up to date by triggers on this table. The documents are updated by signals when a Subscription or a
+    SubscriptionSearchTerm changes, see subscriptions/search.py for searching them.
+    """
+
+    subscription = models.OneToOneField(
+        Subscription,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="search_document",
+    )
+    name = models.TextField(blank=True)
+    terms = models.TextField(blank=True)
+    search_vector = SearchVectorField(null=True, blank=True)
+
+    def __str__(self):
+        """
+        Convert this object to a string.
+
+        :return: a string with the name of the subscription
+        """
+        return self.name
+
+    @staticmethod
+    def get_search_vector():
+        """
+        Get the expression to compute the search vector of a document with.
+
+        :return: a SearchVector over the name (with weight A) and the search terms (with weight B)
+        """
+        return SearchVector(
+            "name", weight="A", config=settings.SEARCH_CONFIG
+        ) + SearchVector("terms", weight="B", config=settings.SEARCH_CONFIG)
+
+    @staticmethod
+    def rebuild(subscription_ids=None):
+        """
+        Rebuild the search documents of subscriptions.
+
+        :param subscription_ids: the ids of the subscriptions to rebuild the documents of, all documents are rebuilt if
+        None
+        :return: None
+        """
+        subscriptions = Subscription.objects.all()
+        search_terms = SubscriptionSearchTerm.subscription.through.objects.all()
+        documents = SubscriptionSearchDocument.objects.all()
+        if subscription_ids is not None:
+            subscription_ids = list(subscription_ids)
+            subscriptions = subscriptions.filter(id__in=subscription_ids)
+            search_terms = search_terms.filter(subscription_id__in=subscription_ids)
+            documents = documents.filter(subscription_id__in=subscription_ids)
+
+        terms = defaultdict(list)
+        for subscription_id, term in search_terms.values_list(
+            "subscription_id", "subscriptionsearchterm__name"
+        ).order_by("subscriptionsearchterm__name"):
+            terms[subscription_id].append(term)
+
+        with transaction.atomic():
+            documents.delete()
+            SubscriptionSearchDocument.objects.bulk_create(
+                [
+                    SubscriptionSearchDocument(
+                        subscription_id=subscription_id,
+                        name=name,
+                        terms=" ".join(terms[subscription_id]),
+                    )
+                    for subscription_id, name in subscriptions.values_list(
+                        "id", "name"
+                    ).order_by()
+                ]
+            )
+            if connection.vendor == "postgresql":
+                documents.update(
+                    search_vector=SubscriptionSearchDocument.get_search_vector()
+                )
+
+
+class CatalogVersion(models.Model):
+    """
+    Version of the catalog (subscriptions, categories and search terms).
+
+    There is a single row that gets a new random version every time the catalog changes, see subscriptions/catalog.py.
+    A random version (instead of a counter) makes sure the version of a rolled back change is never used again.
+    """
+
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        """
+        Convert this object to a string.
+
+        :return: a string with the version
+        """
+        return str(self.version)
+
+    @staticmethod
+    def get_version() -> int:
+        """
+        Get the current version of the catalog.
+
+        :return: the current version, 0 if the catalog was never changed
+        """
+        version = CatalogVersion.objects.filter(pk=1).values_list("version", flat=True)
+        return version.first() or 0
+
+    @staticmethod
+    def bump() -> int:
+        """
+        Give the catalog a new version.
+
+        :return: the new version
+        """
+        version = secrets.randbits(62) + 1
+        if CatalogVersion.objects.filter(pk=1).update(version=version) == 0:
+            CatalogVersion.objects.update_or_create(pk=1, defaults={"version": version})
+        return version
+
+
+class DeregistrationEvent(models.Model):
+    """
+    Deregistration from a subscription.
+
+    Events are only ever inserted, so concurrent deregistrations never contend on a row. They are aggregated into
+    DeregistrationRollups periodically and removed after DEREGISTRATION_EVENT_RETENTION.
+    """
+
+    subscription = models.ForeignKey(
+        Subscription, on_delete=models.CASCADE, related_name="deregistration_events"
+    )
+    category = models.ForeignKey(
+        SubscriptionCategory,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="+",
+        help_text="The category of the subscription at the time of deregistering.",
+    )
+    created = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        """
+        Convert this object to a string.
+
+        :return: a string with the subscription and the time of deregistering
+        """
+        return "{} at {}".format(self.subscription_id, self.created)
+
+
+class DeregistrationRollup(models.Model):
+    """Amount of deregistrations from a subscription in an hour or a day."""
+
+    PERIOD_HOUR = "hour"
+    PERIOD_DAY = "day"
+
+    PERIODS = (
+        (PERIOD_HOUR, "Hour"),
+        (PERIOD_DAY, "Day"),
+    )
+
+    subscription = models.ForeignKey(
+        Subscription, on_delete=models.CASCADE, related_name="deregistration_rollups"
+    )
+    period = models.CharField(max_length=4, choices=PERIODS)
+    start = models.DateTimeField(help_text="The start of the hour or day.")
+    count = models.PositiveIntegerField()
+
+    class Meta:
+        """Meta class."""
+
+        constraints = [
+            models.UniqueConstraint(
+                fields=["period", "start", "subscription"],
+                name="unique_deregistration_rollup",
+            )
+        ]
+
+    def __str__(self):
+        """
+        Convert this object to a string.
+
+        :return: a string with the subscription, the period and the count
+        """
+        return "{} ({} of {}): {}".format(
+            self.subscription_id, self.period, self.start, self.count
+        )
+
+
 class QueuedMailList(models.Model):
     """Submitted user list with subscriptions to deregister from."""
 
+    EXPIRES_AFTER = datetime.timedelta(minutes=15)
+
     token = models.CharField(max_length=64, unique=True)
     item_list = models.ManyToManyField(Subscription)
-    created = models.DateTimeField(auto_now_add=True)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
     firstname = models.CharField(max_length=512)
     lastname = models.CharField(max_length=512, blank=True)
     email_address = models.EmailField(max_length=512)
@@ -410,35 +765,268 @@ class QueuedMailList(models.Model):
         :param postal_code: User's postal code (optional)
         :param residence: User's residence (optional)
         :param subscription_list: list of Subscription objects to add to the Queued Mail list (Subscriptions the user
-        wants to deregister from)
+        wants to deregister from), added with one bulk insert
         :return: Created QueuedMailList with a fresh random token
         """
         random_token = secrets.token_hex(32)
-        mail_list = QueuedMailList.objects.create(
-            token=random_token,
-            firstname=firstname,
-            lastname=lastname,
-            email_address=email_address,
-            address=address,
-            postal_code=postal_code,
-            residence=residence,
-        )
-        for item in subscription_list:
-            mail_list.item_list.add(item)
+        with transaction.atomic():
+            mail_list = QueuedMailList.objects.create(
+                token=random_token,
+                firstname=firstname,
+                lastname=lastname,
+                email_address=email_address,
+                address=address,
+                postal_code=postal_code,
+                residence=residence,
+            )
+            through = QueuedMailList.item_list.through
+            through.objects.bulk_create(
+                [
+                    through(queuedmaillist_id=mail_list.id, subscription_id=item_id)
+                    for item_id in dict.fromkeys(item.id for item in subscription_list)
+                ]
+            )
         return mail_list
 
+    def deregistered(self):
+        """
+        Record that the subscriptions in this list have been deregistered.
+
+        Adds a DeregistrationEvent for every subscription in this list with a single bulk insert, amount_used is
+        updated when the events are rolled up (see subscriptions/rollups.py).
+        :return: the amount of recorded deregistrations
+        """
+        now = timezone.now()
+        return len(
+            DeregistrationEvent.objects.bulk_create(
+                [
+                    DeregistrationEvent(
+                        subscription_id=subscription_id,
+                        category_id=category_id,
+                        created=now,
+                    )
+                    for subscription_id, category_id in self.item_list.values_list(
+                        "id", "category_id"
+                    )
+                ]
+            )
+        )
+
+    @staticmethod
+    def unexpired():
+        """
+        Get all QueuedMailLists that are not expired.
+
+        :return: a QuerySet of QueuedMailLists created less than EXPIRES_AFTER ago
+        """
+        return QueuedMailList.objects.filter(
+            created__gt=timezone.now() - QueuedMailList.EXPIRES_AFTER
+        )
+
     @staticmethod
     def remove_expired():
         """
         Remove all expired QueuedMailLists.
 
+        Mail lists for which a DeregisterJob is queued or running are kept until the job handled them, mail lists of
+        failed jobs are removed.
+        :return: the amount of removed mail lists
+        """
+        _, deleted = (
+            QueuedMailList.objects.filter(
+                created__lte=timezone.now() - QueuedMailList.EXPIRES_AFTER
+            )
+            .exclude(
+                deregister_job__status__in=[
+                    DeregisterJob.STATUS_QUEUED,
+                    DeregisterJob.STATUS_RUNNING,
+                ]
+            )
+            .delete()
+        )
+        return deleted.get(QueuedMailList._meta.label, 0)
+
+
+class DeregisterJob(models.Model):
+    """Queued job for handling the deregister request of a QueuedMailList in the background."""
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_SUCCEEDED = "succeeded"
+    STATUS_FAILED = "failed"
+
+    STATUS = (
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_SUCCEEDED, "Succeeded"),
+        (STATUS_FAILED, "Failed"),
+    )
+
+    idempotency_key = models.CharField(
+        max_length=64,
+        unique=True,
+        help_text="Key preventing the same request from being queued twice (the token of the mail list).",
+    )
+    mail_list = models.OneToOneField(
+        QueuedMailList,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="deregister_job",
+    )
+    status = models.CharField(
+        max_length=16, choices=STATUS, default=STATUS_QUEUED, db_index=True
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    available_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="The job will not be picked up by a worker before this time.",
+    )
+    started = models.DateTimeField(null=True, blank=True)
+    finished = models.DateTimeField(null=True, blank=True)
+    duration = models.DurationField(
+        null=True, blank=True, help_text="The duration of the last attempt."
+    )
+    sent_items = models.ManyToManyField(
+        Subscription,
+        blank=True,
+        related_name="+",
+        help_text="The subscriptions of which the deregister email was sent, these are skipped when the job is retried.",
+    )
+
+    class Meta:
+        """Meta class."""
+
+        indexes = [models.Index(fields=["status", "available_at"])]
+
+    def __str__(self):
+        """
+        Convert this object to a string.
+
+        :return: a string with the idempotency key and the status
+        """
+        return "{}, status: {}".format(self.idempotency_key, self.status)
+
+    @property
+    def is_finished(self):
+        """
+        Check whether this job is finished.
+
+        :return: True if this job succeeded or failed permanently, False otherwise
+        """
+        return self.status in (self.STATUS_SUCCEEDED, self.STATUS_FAILED)
+
+    @staticmethod
+    def enqueue(mail_list: QueuedMailList):
+        """
+        Queue a job for a QueuedMailList.
+
+        Queueing the same mail list twice returns the job that was queued the first time.
+        :param mail_list: the mail list to queue a job for
+        :return: the DeregisterJob for the mail list
+        """
+        job, _ = DeregisterJob.objects.get_or_create(
+            idempotency_key=mail_list.token, defaults={"mail_list": mail_list}
+        )
+        return job
+
+    @staticmethod
+    def claim_next():
+        """
+        Claim the next job that is ready to be run.
+
+        Jobs that are running for longer than DEREGISTER_JOB_TIMEOUT seconds are considered abandoned by their worker
+        and are claimed again if they have attempts left, otherwise they are marked as failed.
+        :return: the claimed DeregisterJob or None if there are no jobs ready to be run
+        """
+        now = timezone.now()
+        abandoned_before = now - datetime.timedelta(
+            seconds=settings.DEREGISTER_JOB_TIMEOUT
+        )
+        DeregisterJob.objects.filter(
+            status=DeregisterJob.STATUS_RUNNING,
+            started__lte=abandoned_before,
+            attempts__gte=settings.DEREGISTER_JOB_MAX_ATTEMPTS,
+        ).update(
+            status=DeregisterJob.STATUS_FAILED,
+            last_error="The job was abandoned by its worker.",
+            finished=now,
+        )
+        with transaction.atomic():
+            job = (
+                DeregisterJob.objects.select_for_update(skip_locked=True)
+                .filter(
+                    Q(status=DeregisterJob.STATUS_QUEUED, available_at__lte=now)
+                    | Q(
+                        status=DeregisterJob.STATUS_RUNNING,
+                        started__lte=abandoned_before,
+                        attempts__lt=settings.DEREGISTER_JOB_MAX_ATTEMPTS,
+                    )
+                )
+                .order_by("available_at", "id")
+                .first()
+            )
+            if job is None:
+                return None
+            job.status = DeregisterJob.STATUS_RUNNING
+            job.attempts += 1
+            job.started = now
+            job.finished = None
+            job.save(update_fields=["status", "attempts", "started", "finished"])
+        return job
+
+    @staticmethod
+    def remove_expired():
+        """
+        Remove all DeregisterJobs that finished more than DEREGISTER_JOB_RETENTION ago.
+
+        :return: the amount of removed DeregisterJobs
+        """
+        _, deleted = DeregisterJob.objects.filter(
+            status__in=[DeregisterJob.STATUS_SUCCEEDED, DeregisterJob.STATUS_FAILED],
+            finished__lte=timezone.now() - settings.DEREGISTER_JOB_RETENTION,
+        ).delete()
+        return deleted.get(DeregisterJob._meta.label, 0)
+
+    def mark_succeeded(self):
+        """
+        Mark this job as succeeded.
+
         :return: None
         """
-        mail_lists = QueuedMailList.objects.all()
-        timezone = pytz.timezone(settings.TIME_ZONE)
-        remove_after = timezone.localize(
-            datetime.datetime.now() - datetime.timedelta(minutes=15)
+        self._finish(DeregisterJob.STATUS_SUCCEEDED, "")
+
+    def mark_failed(self, error: str, retry: bool = True):
+        """
+        Mark this attempt of this job as failed.
+
+        The job is queued again with an exponential backoff as long as it has attempts left.
+        :param error: a description of the error
+        :param retry: whether the job may be retried
+        :return: None
+        """
+        if retry and self.attempts < settings.DEREGISTER_JOB_MAX_ATTEMPTS:
+            self.available_at = timezone.now() + datetime.timedelta(
+                seconds=settings.DEREGISTER_JOB_RETRY_DELAY * 2 ** (self.attempts - 1)
+            )
+            self._finish(DeregisterJob.STATUS_QUEUED, error)
+        else:
+            self._finish(DeregisterJob.STATUS_FAILED, error)
+
+    def _finish(self, status: str, error: str):
+        self.status = status
+        self.last_error = error
+        self.finished = timezone.now()
+        if self.started is not None:
+            self.duration = self.finished - self.started
+        self.save(
+            update_fields=[
+                "status",
+                "last_error",
+                "available_at",
+                "finished",
+                "duration",
+            ]
         )
-        for mail_list in mail_lists.iterator():
-            if mail_list.created <= remove_after:
-                mail_list.delete()
@@ -0,0 +1,291 @@
+import hashlib
+import time
+from typing import Iterable, Optional, Set
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+
+from subscriptions.catalog import TOP_SUBSCRIPTIONS
+from subscriptions.leaderboard import get_leaderboard
+from subscriptions.models import SubscriptionCategoryClosure
+
+# Tag of every cached page and fragment, purging it purges the whole cache
+CATALOG_TAG = "catalog"
+# Tag of the list of most popular subscriptions
+POPULAR_TAG = "popular"
+# Tag of the list of trending subscriptions
+TRENDING_TAG = "trending"
+# Tag of the list of top level categories
+CATEGORIES_TAG = "categories"
+
+
+def get_subscription_tag(subscription_id: int) -> str:
+    """
+    Get the tag of the pages showing the details of a subscription.
+
+    :param subscription_id: the id of the subscription
+    :return: the tag
+    """
+    return "subscription:{}".format(subscription_id)
+
+
+def get_category_tag(category_id: int) -> str:
+    """
+    Get the tag of the pages and fragments showing a category.
+
+    :param category_id: the id of the category
+    :return: the tag
+    """
+    return "category:{}".format(category_id)
+
+
+def _get_cache():
+    return caches[settings.CATALOG_PAGE_CACHE]
+
+
+def _get_tag_key(tag: str) -> str:
+    return "catalog-tag:{}".format(tag)
+
+
+def _hash(value: str) -> str:
+    return hashlib.md5(value.encode("utf-8")).hexdigest()
+
+
+def get_page_key(request) -> str:
+    """
+    Get the cache key of a page.
+
+    :param request: the request for the page
+    :return: a cache key based on the absolute URL (including the query string) of the request
+    """
+    return "catalog-page:{}".format(_hash(request.build_absolute_uri()))
+
+
+def get_fragment_key(*vary_on) -> str:
+    """
+    Get the cache key of a fragment.
+
+    :param vary_on: the values identifying the fragment
+    :return: a cache key based on the values
+    """
+    return "catalog-fragment:{}".format(_hash(":".join(str(x) for x in vary_on)))
+
+
+def _is_fresh(tags: Iterable[str], rendered: float) -> bool:
+    """
+    Check whether an entry rendered at some time is still valid.
+
+    An entry is invalid if one of its tags was purged less than CATALOG_VERSION_CHECK_INTERVAL seconds before it was
+    rendered, as other processes may have rendered it from their previous catalog snapshot. Tags without purge time
+    (for example because the cache evicted it) invalidate the entry as well.
+    :param tags: the tags of the entry
+    :param rendered: the time (in seconds since the epoch) at which rendering the entry started
+    :return: True if the entry is valid, False otherwise
+    """
+    keys = [_get_tag_key(tag) for tag in tags]
+    purged = _get_cache().get_many(keys)
+    return len(purged) == len(keys) and all(
+        rendered > purge_time + settings.CATALOG_VERSION_CHECK_INTERVAL
+        for purge_time in purged.values()
+    )
+
+
+def get_cached(key: str):
+    """
+    Get a valid page or fragment from the cache.
+
+    :param key: the cache key
+    :return: the cached value or None if there is no valid entry
+    """
+    entry = _get_cache().get(key)
+    if entry is None or not _is_fresh(entry["tags"], entry["rendered"]):
+        return None
+    return entry["value"]
+
+
+def set_cached(key: str, value, tags: Iterable[str], rendered: float):
+    """
+    Store a page or fragment in the cache.
+
+    The value is not stored if one of its tags was purged while it was rendered.
+    :param key: the cache key
+    :param value: the value to store
+    :param tags: the tags of the value, purging one of them invalidates the entry
+    :param rendered: the time (in seconds since the epoch) at which rendering the value started
+    :return: None
+    """
+    cache = _get_cache()
+    tags = sorted(set(tags) | {CATALOG_TAG})
+    for tag in tags:
+        # Tags that were never purged get a purge time in the past, add() does not overwrite a concurrent purge
+        cache.add(_get_tag_key(tag), 0.0, None)
+    if _is_fresh(tags, rendered):
+        cache.set(
+            key,
+            {"value": value, "tags": tags, "rendered": rendered},
+            settings.CATALOG_PAGE_CACHE_TIMEOUT,
+        )
+
+
+def purge(tags: Iterable[str]):
+    """
+    Invalidate all cached pages and fragments with one of the tags.
+
+    The tags are purged now and again after the current transaction is committed, so pages rendered from the data of
+    before the commit are not served.
+    :param tags: the tags to purge
+    :return: None
+    """
+    tags = set(tags)
+    if len(tags) == 0:
+        return
+
+    def purge_tags():
+        _get_cache().set_many(
+            {_get_tag_key(tag): time.time() for tag in tags}, timeout=None
+        )
+
+    purge_tags()
+    transaction.on_commit(purge_tags)
+
+
+def get_category_tags(
+    category_ids: Iterable[int], descendants: bool = False
+) -> Set[str]:
+    """
+    Get the tags of the pages and fragments showing (the subscriptions of) categories.
+
+    Categories show the subscriptions of all categories below them, so the tags of the ancestors of the categories are
+    included.
+    :param category_ids: the ids of the categories
+    :param descendants: whether to include the tags of the descendants of the categories as well, these show the names
+    of their ancestors
+    :return: a set with the tags of the categories and their ancestors (and descendants)
+    """
+    category_ids = set(x for x in category_ids if x is not None)
+    if len(category_ids) == 0:
+        return set()
+    affected = set(category_ids)
+    affected.update(
+        SubscriptionCategoryClosure.objects.filter(
+            descendant_id__in=category_ids
+        ).values_list("ancestor_id", flat=True)
+    )
+    if descendants:
+        affected.update(
+            SubscriptionCategoryClosure.objects.filter(
+                ancestor_id__in=category_ids
+            ).values_list("descendant_id", flat=True)
+        )
+    return {get_category_tag(category_id) for category_id in affected}
+
+
+def get_subscription_tags(
+    subscription_id: int, category_id: Optional[int], amount_used: int
+) -> Set[str]:
+    """
+    Get the tags of the pages and fragments showing a subscription.
+
+    :param subscription_id: the id of the subscription
+    :param category_id: the id of the category of the subscription
+    :param amount_used: the amount of times the subscription was used
+    :return: a set with the tag of the subscription, the tags of its categories and the tag of the list of most popular
+    subscriptions if the subscription is (or might enter) that list
+    """
+    tags = {get_subscription_tag(subscription_id)} | get_category_tags([category_id])
+    popular = get_leaderboard().top(TOP_SUBSCRIPTIONS)
+    if (
+        len(popular) < TOP_SUBSCRIPTIONS
+        or amount_used >= popular[-1].amount_used
+        or subscription_id in {entry.id for entry in popular}
+    ):
+        tags.add(POPULAR_TAG)
+    return tags
+
+
+def is_cacheable(request) -> bool:
+    """
+    Check whether the response to a request may be served from and stored in the page cache.
+
+    :param request: the request
+    :return: True for GET and HEAD requests of anonymous visitors, False otherwise
+    """
+    return request.method in ("GET", "HEAD") and not request.user.is_authenticated
+
+
+def uses_csrf_token(request) -> bool:
+    """
+    Check whether a CSRF token was used while handling a request.
+
+    :param request: the request
+    :return: True if the CSRF token was used (so the response is specific to the visitor), False otherwise
+    """
+    return request.META.get("CSRF_COOKIE_NEEDS_UPDATE", False)
+
+
+def add_page_tags(request, tags: Iterable[str]):
+    """
+    Add tags to the page being rendered for a request, used by cached fragments to pass on their tags.
+
+    :param request: the request
+    :param tags: the tags to add
+    :return: None
+    """
+    page_tags = getattr(request, "catalog_page_tags", None)
+    if page_tags is not None:
+        page_tags.update(tags)
+
+
+class CachedCatalogPageMixin:
+    """
+    Mixin for views of catalog pages that are the same for every anonymous visitor.
+
+    Pages are cached by their absolute URL and tagged with the tags of get_cache_tags() and those of the cached
+    fragments (see the catalogcache template tag) on the page. Pages of authenticated users, pages that use a CSRF token
+    and responses other than 200 are not cached.
+    """
+
+    def get_cache_tags(self, **kwargs) -> Iterable[str]:
+        """
+        Get the tags of the page.
+
+        :param kwargs: the keyword arguments of the view
+        :return: an iterable of tags, purging one of them invalidates the cached page
+        """
+        return []
+
+    def dispatch(self, request, *args, **kwargs):
+        """
+        Serve the page from the cache or render and store it.
+
+        :param request: the request
+        :param args: arguments
+        :param kwargs: keyword arguments
+        :return: the (cached) response
+        """
+        if not is_cacheable(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        key = get_page_key(request)
+        page = get_cached(key)
+        if page is not None:
+            return HttpResponse(page["content"], content_type=page["content_type"])
+
+        rendered = time.time()
+        request.catalog_page_tags = set(self.get_cache_tags(**kwargs))
+        response = super().dispatch(request, *args, **kwargs)
+        if (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not uses_csrf_token(request)
+        ):
+            set_cached(
+                key,
+                {"content": response.content, "content_type": response["Content-Type"]},
+                request.catalog_page_tags,
+                rendered,
+            )
+        return response
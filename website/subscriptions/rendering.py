@@ -0,0 +1,171 @@
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterable, Iterator, Union
+
+from django.conf import settings
+from weasyprint import HTML
+
+try:
+    import uwsgi
+except ImportError:
+    uwsgi = None
+
+logger = logging.getLogger(__name__)
+
+BACKEND_SERIAL = "serial"
+BACKEND_POOL = "pool"
+
+# Seconds between two checks of a pool worker whether its parent process is still alive
+PARENT_CHECK_INTERVAL = 1.0
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def write_pdf(html: str) -> bytes:
+    """
+    Render an HTML document to PDF.
+
+    :param html: the HTML document to render
+    :return: a bytes array which includes a rendered PDF document
+    """
+    return HTML(string=html).write_pdf()
+
+
+def _watch_parent(parent_pid: int):
+    """
+    Exit the current process as soon as its parent process is gone.
+
+    :param parent_pid: the process id of the parent process
+    :return: None
+    """
+    while os.getppid() == parent_pid:
+        time.sleep(PARENT_CHECK_INTERVAL)
+    os._exit(1)
+
+
+def _initialize_worker(parent_pid: int):
+    """
+    Initialize a pool worker.
+
+    The worker exits when its parent dies, a forked worker inherits both ends of the pipe it reads its tasks from, so it
+    would otherwise never notice that the parent was killed (for example by the uwsgi harakiri) and stay behind as an
+    orphan. The worker is warmed up by rendering an empty document, this loads WeasyPrint's fonts and stylesheets once.
+    :param parent_pid: the process id of the process that started the pool
+    :return: None
+    """
+    threading.Thread(
+        target=_watch_parent, args=(parent_pid,), name="watch-parent", daemon=True
+    ).start()
+    write_pdf("<p></p>")
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """
+    Get the process pool for rendering documents, the pool is created on first use.
+
+    The pool uses the fork start method as the spawn and forkserver methods re-execute sys.executable, which is the
+    uwsgi binary in production.
+    :return: a ProcessPoolExecutor with PDF_RENDER_WORKERS workers
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PDF_RENDER_WORKERS,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=_initialize_worker,
+                initargs=(os.getpid(),),
+            )
+        return _pool
+
+
+def shutdown_pool():
+    """
+    Shut down the process pool for rendering documents (if it was started).
+
+    :return: None
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+
+
+atexit.register(shutdown_pool)
+if uwsgi is not None:
+    # uwsgi calls this hook when it stops or recycles a worker (for example after --max-requests)
+    uwsgi.atexit = shutdown_pool
+
+
+def _render_or_exception(
+    render: Callable[[str], bytes], html: str
+) -> Union[bytes, Exception]:
+    try:
+        return render(html)
+    except Exception as e:
+        return e
+
+
+def iter_rendered(
+    render: Callable[[str], bytes], html_documents: Iterable[str]
+) -> Iterator[Union[bytes, Exception]]:
+    """
+    Render HTML documents with a render function and the backend configured in PDF_RENDER_BACKEND.
+
+    The serial backend renders the documents one by one in this process, the pool backend fans the documents out over
+    a process pool. In both cases the results are yielded in the order of html_documents.
+    :param render: the function that renders one HTML document to bytes, it must be defined at module level so it can
+    be sent to the pool workers
+    :param html_documents: the HTML documents to render
+    :return: an iterator with for every document either the rendered document as bytes or the exception raised while
+    rendering it
+    """
+    html_documents = list(html_documents)
+    if settings.PDF_RENDER_BACKEND != BACKEND_POOL or len(html_documents) <= 1:
+        for html in html_documents:
+            yield _render_or_exception(render, html)
+        return
+
+    try:
+        futures = [get_pool().submit(render, html) for html in html_documents]
+    except BrokenProcessPool:
+        futures = []
+    for index, html in enumerate(html_documents):
+        try:
+            yield futures[index].result()
+        except (BrokenProcessPool, IndexError):
+            # A worker died (or the pool could not be used), start a new pool next time and render this one here
+            logger.error("The render pool is broken, rendering serially")
+            shutdown_pool()
+            yield _render_or_exception(render, html)
+        except Exception as e:
+            yield e
+
+
+def iter_pdfs(html_documents: Iterable[str]) -> Iterator[Union[bytes, Exception]]:
+    """
+    Render HTML documents to PDF with the backend configured in PDF_RENDER_BACKEND.
+
+    :param html_documents: the HTML documents to render
+    :return: an iterator with for every document either the rendered PDF as bytes or the exception raised while
+    rendering it
+    """
+    return iter_rendered(write_pdf, html_documents)
+
+
+def render_pdfs(html_documents: Iterable[str]) -> [Union[bytes, Exception]]:
+    """
+    Render HTML documents to PDF with the backend configured in PDF_RENDER_BACKEND.
+
+    :param html_documents: the HTML documents to render
+    :return: a list with for every document either the rendered PDF as bytes or the exception raised while rendering it
+    """
+    return list(iter_pdfs(html_documents))
@@ -0,0 +1,288 @@
+import datetime
+import secrets
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from subscriptions.catalog import get_catalog, TOP_SUBSCRIPTIONS
+from subscriptions.models import (
+    DeregistrationEvent,
+    DeregistrationRollup,
+    Subscription,
+)
+
+
+class TrendingEntry(NamedTuple):
+    """Subscription on the trending ranking."""
+
+    id: int
+    name: str
+    slug: str
+    category_id: Optional[int]
+    deregistrations: int
+
+    @property
+    def pk(self):
+        """
+        Get the primary key of the subscription.
+
+        :return: the id of the subscription
+        """
+        return self.id
+
+
+def get_hour_start(moment: datetime.datetime) -> datetime.datetime:
+    """
+    Get the start of the hour of a moment.
+
+    :param moment: an aware datetime
+    :return: the start of the hour in the current time zone
+    """
+    return timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+
+
+def get_day_start(moment: datetime.datetime) -> datetime.datetime:
+    """
+    Get the start of the day of a moment.
+
+    :param moment: an aware datetime
+    :return: the start of the day in the current time zone
+    """
+    return timezone.localtime(moment).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _get_rollup_start(now: datetime.datetime) -> datetime.datetime:
+    """
+    Get the start of the hours to roll up.
+
+    The hours since the last rolled up hour are rolled up again, going back at least DEREGISTRATION_ROLLUP_LOOKBACK to
+    include the events of transactions that committed after the previous rollup.
+    :param now: the current time
+    :return: the start of the first hour to roll up
+    """
+    start = now - settings.DEREGISTRATION_ROLLUP_LOOKBACK
+    last_rollup = DeregistrationRollup.objects.filter(
+        period=DeregistrationRollup.PERIOD_HOUR
+    ).aggregate(start=Max("start"))["start"]
+    if last_rollup is None:
+        last_rollup = DeregistrationEvent.objects.aggregate(created=Min("created"))[
+            "created"
+        ]
+    if last_rollup is not None:
+        start = min(start, last_rollup)
+    return get_hour_start(start)
+
+
+def _add_day_deltas(day_deltas: Dict[tuple, int]):
+    """
+    Add the changes in the hourly rollups to the daily rollups.
+
+    :param day_deltas: a dictionary mapping (subscription id, start of the day) to the change in deregistrations
+    :return: None
+    """
+    day_deltas = {key: delta for key, delta in day_deltas.items() if delta != 0}
+    if len(day_deltas) == 0:
+        return
+    existing = {
+        (rollup.subscription_id, rollup.start): rollup
+        for rollup in DeregistrationRollup.objects.select_for_update().filter(
+            period=DeregistrationRollup.PERIOD_DAY,
+            start__in={start for _, start in day_deltas},
+            subscription_id__in={subscription_id for subscription_id, _ in day_deltas},
+        )
+    }
+    updated = []
+    created = []
+    for (subscription_id, start), delta in day_deltas.items():
+        rollup = existing.get((subscription_id, start))
+        if rollup is None:
+            created.append(
+                DeregistrationRollup(
+                    subscription_id=subscription_id,
+                    period=DeregistrationRollup.PERIOD_DAY,
+                    start=start,
+                    count=delta,
+                )
+            )
+        else:
+            rollup.count += delta
+            updated.append(rollup)
+    DeregistrationRollup.objects.bulk_update(updated, ["count"])
+    DeregistrationRollup.objects.bulk_create(created)
+
+
+def _add_amounts_used(deltas: Dict[int, int]):
+    """
+    Add the new deregistrations to the amount_used of subscriptions.
+
+    Subscriptions with the same amount of new deregistrations are updated with one query.
+    :param deltas: a dictionary mapping subscription ids to their amount of new deregistrations
+    :return: None
+    """
+    subscriptions_per_delta = defaultdict(list)
+    for subscription_id, delta in deltas.items():
+        subscriptions_per_delta[delta].append(subscription_id)
+    for delta, subscription_ids in subscriptions_per_delta.items():
+        Subscription.objects.filter(id__in=subscription_ids).update(
+            amount_used=F("amount_used") + delta
+        )
+
+
+def rollup_deregistrations(now: datetime.datetime = None) -> Dict[int, int]:
+    """
+    Aggregate the DeregistrationEvents into hourly and daily DeregistrationRollups.
+
+    The hourly rollups of the recent hours are recounted from the events, the differences with the previous counts
+    are added to the daily rollups and to the amount_used of the subscriptions. Recounting makes running the rollup
+    again harmless, it should not run concurrently with itself though. Events and hourly rollups older than
+    DEREGISTRATION_EVENT_RETENTION are removed, daily rollups are kept. The cached trending rankings are invalidated
+    if there are new deregistrations.
+    :param now: the current time, defaults to timezone.now()
+    :return: a dictionary mapping the ids of subscriptions with new deregistrations to their amount of new
+    deregistrations
+    """
+    if now is None:
+        now = timezone.now()
+    with transaction.atomic():
+        start = _get_rollup_start(now)
+        counts = {
+            (row["subscription_id"], row["hour"]): row["count"]
+            for row in DeregistrationEvent.objects.filter(created__gte=start)
+            .annotate(hour=TruncHour("created"))
+            .values("subscription_id", "hour")
+            .annotate(count=Count("id"))
+        }
+        previous_rollups = DeregistrationRollup.objects.select_for_update().filter(
+            period=DeregistrationRollup.PERIOD_HOUR, start__gte=start
+        )
+        previous = {
+            (rollup.subscription_id, rollup.start): rollup.count
+            for rollup in previous_rollups
+        }
+
+        deltas = defaultdict(int)
+        day_deltas = defaultdict(int)
+        for key in counts.keys() | previous.keys():
+            delta = counts.get(key, 0) - previous.get(key, 0)
+            subscription_id, hour = key
+            deltas[subscription_id] += delta
+            day_deltas[subscription_id, get_day_start(hour)] += delta
+
+        previous_rollups.delete()
+        DeregistrationRollup.objects.bulk_create(
+            [
+                DeregistrationRollup(
+                    subscription_id=subscription_id,
+                    period=DeregistrationRollup.PERIOD_HOUR,
+                    start=hour,
+                    count=count,
+                )
+                for (subscription_id, hour), count in counts.items()
+            ]
+        )
+        _add_day_deltas(day_deltas)
+        deltas = {
+            subscription_id: delta
+            for subscription_id, delta in deltas.items()
+            if delta != 0
+        }
+        _add_amounts_used(deltas)
+
+        # Events are removed per hour together with their hourly rollup, so an hour is never recounted partially
+        removed_before = get_hour_start(now - settings.DEREGISTRATION_EVENT_RETENTION)
+        DeregistrationEvent.objects.filter(created__lt=removed_before).delete()
+        DeregistrationRollup.objects.filter(
+            period=DeregistrationRollup.PERIOD_HOUR, start__lt=removed_before
+        ).delete()
+    if len(deltas) > 0:
+        trending_changed()
+    return deltas
+
+
+TRENDING_VERSION_KEY = "trending-version"
+
+
+def _get_trending_key(category_id: Optional[int]) -> str:
+    return "trending:{}:{}:{}".format(
+        get_catalog().version,
+        caches[settings.LEADERBOARD_CACHE].get(TRENDING_VERSION_KEY, 0),
+        "all" if category_id is None else category_id,
+    )
+
+
+def trending_changed():
+    """
+    Give the cached trending rankings a new version, invalidating all of them.
+
+    :return: None
+    """
+    caches[settings.LEADERBOARD_CACHE].set(
+        TRENDING_VERSION_KEY, secrets.randbits(62) + 1, None
+    )
+
+
+def build_trending(
+    category_id: Optional[int] = None, now: datetime.datetime = None
+) -> List[TrendingEntry]:
+    """
+    Build the ranking of subscriptions deregistered most often in the last TRENDING_DAYS days from the daily rollups.
+
+    :param category_id: the id of the category (including all categories below it), None for all subscriptions
+    :param now: the current time, defaults to timezone.now()
+    :return: a list of at most LEADERBOARD_SIZE TrendingEntries, most deregistered first
+    """
+    if now is None:
+        now = timezone.now()
+    since = get_day_start(now) - datetime.timedelta(days=settings.TRENDING_DAYS - 1)
+    queryset = DeregistrationRollup.objects.filter(
+        period=DeregistrationRollup.PERIOD_DAY, start__gte=since
+    )
+    if category_id is not None:
+        queryset = queryset.filter(
+            subscription__category__ancestor_links__ancestor_id=category_id
+        )
+    return [
+        TrendingEntry(*row)
+        for row in queryset.values(
+            "subscription_id",
+            "subscription__name",
+            "subscription__slug",
+            "subscription__category_id",
+        )
+        .annotate(deregistrations=Sum("count"))
+        .order_by("-deregistrations", "subscription__name", "subscription_id")
+        .values_list(
+            "subscription_id",
+            "subscription__name",
+            "subscription__slug",
+            "subscription__category_id",
+            "deregistrations",
+        )[: settings.LEADERBOARD_SIZE]
+    ]
+
+
+def get_trending(
+    category_id: Optional[int] = None, limit: int = TOP_SUBSCRIPTIONS
+) -> List[TrendingEntry]:
+    """
+    Get the subscriptions deregistered most often in the last TRENDING_DAYS days.
+
+    The ranking is cached for LEADERBOARD_TIMEOUT seconds per catalog version, rolling up new deregistrations
+    invalidates it.
+    :param category_id: the id of the category (including all categories below it), None for all subscriptions
+    :param limit: the maximum amount of subscriptions
+    :return: a list of at most limit TrendingEntries, most deregistered first
+    """
+    cache = caches[settings.LEADERBOARD_CACHE]
+    key = _get_trending_key(category_id)
+    entries = cache.get(key)
+    if entries is None:
+        entries = build_trending(category_id)
+        cache.set(key, entries, settings.LEADERBOARD_TIMEOUT)
+    return entries[:limit]
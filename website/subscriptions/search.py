@@ -0,0 +1,185 @@
+import math
+import re
+from typing import List, Optional
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import (
+    Case,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    Q,
+    QuerySet,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast, Ln
+
+from subscriptions.models import Subscription
+
+SEARCH_BACKEND_POSTGRESQL = "postgresql"
+SEARCH_BACKEND_SQLITE_FTS5 = "sqlite_fts5"
+
+# FTS5 table indexing the SubscriptionSearchDocument table on SQLite, created in migration 0016
+FTS_TABLE = "subscriptions_subscriptionsearch_fts"
+
+# Weights of the name and the search terms columns in the FTS5 BM25 ranking
+FTS_NAME_WEIGHT = 10.0
+FTS_TERMS_WEIGHT = 2.0
+
+# Maximum number of words of a search query that are used
+MAX_QUERY_TOKENS = 8
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def get_query_tokens(query: str) -> List[str]:
+    """
+    Split a search query in words.
+
+    :param query: the search query
+    :return: a list of lower case words in the query, everything but letters, digits and underscores is dropped
+    """
+    return TOKEN_PATTERN.findall(query.lower())[:MAX_QUERY_TOKENS]
+
+
+def get_search_backend(queryset: QuerySet) -> Optional[str]:
+    """
+    Get the full text search backend for the database of a queryset.
+
+    :param queryset: the queryset that will be searched
+    :return: SEARCH_BACKEND_POSTGRESQL, SEARCH_BACKEND_SQLITE_FTS5 or None if the database does not support full text
+    search (or SQLite was compiled without FTS5 and the FTS5 table does not exist)
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == "postgresql":
+        return SEARCH_BACKEND_POSTGRESQL
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                [FTS_TABLE],
+            )
+            if cursor.fetchone() is not None:
+                return SEARCH_BACKEND_SQLITE_FTS5
+    return None
+
+
+def get_popularity(amount_used: int) -> float:
+    """
+    Get the weighted popularity of a subscription that is added to its text relevance.
+
+    :param amount_used: the amount of times the subscription was used
+    :return: SEARCH_POPULARITY_WEIGHT times the natural logarithm of (1 + amount_used)
+    """
+    return settings.SEARCH_POPULARITY_WEIGHT * math.log1p(amount_used)
+
+
+def _search_postgresql(tokens: List[str], queryset: QuerySet) -> QuerySet:
+    # Every word is matched as a prefix so results show up while the user is typing
+    search_query = SearchQuery(
+        " & ".join("{}:*".format(token) for token in tokens),
+        search_type="raw",
+        config=settings.SEARCH_CONFIG,
+    )
+    return (
+        queryset.filter(search_document__search_vector=search_query)
+        .annotate(
+            # Normalization 32 scales the rank to rank / (rank + 1), so the relevance is between 0 and 1
+            search_relevance=SearchRank(
+                F("search_document__search_vector"), search_query, normalization=32
+            ),
+            search_score=ExpressionWrapper(
+                F("search_relevance")
+                + Value(settings.SEARCH_POPULARITY_WEIGHT)
+                * Ln(Cast("amount_used", FloatField()) + Value(1.0)),
+                output_field=FloatField(),
+            ),
+        )
+        .order_by("-search_score", "name")
+    )
+
+
+def _search_sqlite_fts5(tokens: List[str], queryset: QuerySet) -> QuerySet:
+    # Every word is quoted (so it can not be interpreted as an FTS5 operator) and matched as a prefix
+    match = " ".join('"{}"*'.format(token) for token in tokens)
+    # Only the subscriptions in the queryset are matched, so filters of the queryset do not drop any results
+    subquery, subquery_params = queryset.order_by().values("id").query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(
+            "SELECT {table}.rowid, bm25({table}, %s, %s), subscription.amount_used FROM {table} "
+            "INNER JOIN {subscription_table} subscription ON subscription.id = {table}.rowid "
+            "WHERE {table} MATCH %s AND {table}.rowid IN ({subquery})".format(
+                table=FTS_TABLE,
+                subscription_table=Subscription._meta.db_table,
+                subquery=subquery,
+            ),
+            [FTS_NAME_WEIGHT, FTS_TERMS_WEIGHT, match, *subquery_params],
+        )
+        rows = cursor.fetchall()
+
+    # BM25 is negative with the best matches being the most negative, scale it to a relevance between 0 and 1. The
+    # results are limited after blending in the popularity, so popular results with a lower relevance are kept.
+    scores = dict(
+        sorted(
+            (
+                (subscription_id, -bm25 / (1 - bm25) + get_popularity(amount_used))
+                for subscription_id, bm25, amount_used in rows
+            ),
+            key=lambda x: x[1],
+            reverse=True,
+        )[: settings.SEARCH_MAX_RESULTS]
+    )
+    if len(scores) == 0:
+        return queryset.none()
+    return (
+        queryset.filter(id__in=scores.keys())
+        .annotate(
+            search_score=Case(
+                *[
+                    When(id=subscription_id, then=Value(score))
+                    for subscription_id, score in scores.items()
+                ],
+                output_field=FloatField(),
+            )
+        )
+        .order_by("-search_score", "name")
+    )
+
+
+def _search_fallback(tokens: List[str], queryset: QuerySet) -> QuerySet:
+    for token in tokens:
+        queryset = queryset.filter(
+            Q(search_document__name__icontains=token)
+            | Q(search_document__terms__icontains=token)
+        )
+    return queryset.order_by("-amount_used", "name")
+
+
+def search_subscriptions(query: str, queryset: QuerySet = None) -> QuerySet:
+    """
+    Search subscriptions by their name and search terms.
+
+    Every word in the query must match (as a prefix) a word in the name or the search terms of a subscription. Results
+    are ranked by their text relevance blended with their popularity (amount_used), see get_popularity(). PostgreSQL
+    uses the search vectors in SubscriptionSearchDocument, SQLite uses its FTS5 table and other databases fall back to
+    a substring search on SubscriptionSearchDocument ranked on popularity only.
+    :param query: the search query
+    :param queryset: the subscriptions to search in, defaults to all subscriptions
+    :return: a queryset with the results ordered by their score (best first), on SQLite only the SEARCH_MAX_RESULTS
+    best results are returned
+    """
+    if queryset is None:
+        queryset = Subscription.objects.all()
+    tokens = get_query_tokens(query)
+    if len(tokens) == 0:
+        return queryset.none()
+
+    backend = get_search_backend(queryset)
+    if backend == SEARCH_BACKEND_POSTGRESQL:
+        return _search_postgresql(tokens, queryset)
+    elif backend == SEARCH_BACKEND_SQLITE_FTS5:
+        return _search_sqlite_fts5(tokens, queryset)
+    return _search_fallback(tokens, queryset)
@@ -1,21 +1,33 @@
+import functools
+import hashlib
+import json
 import os
 
 from django.contrib.sites.models import Site
 from django.template import Template, Context, Engine, TemplateSyntaxError
-from weasyprint import HTML
-from .models import QueuedMailList, Subscription
+from .models import QueuedMailList, Subscription, DeregisterJob
+from . import page_cache
+from .leaderboard import update_leaderboards
+from .rendering import write_pdf, render_pdfs, iter_rendered
+from .archives import stream_zip
+from .docx_rendering import render_docx
+from kanikervanaf.mail import MailDispatcher
+from outbox.services import queue_email
 from django.template.loader import get_template
 from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
-from smtplib import SMTPException
+from django.core.cache import caches
+from django.db import transaction
 import logging
 import datetime
-from pdf2docx import parse
-import tempfile
-from typing import Union
+from typing import Iterable, Iterator, List, NamedTuple, Set, Tuple, Union
 
 logger = logging.getLogger(__name__)
 
+ARTIFACT_FORMAT_PDF = "pdf"
+ARTIFACT_FORMAT_DOCX = "docx"
+ARTIFACT_FORMAT_TEXT = "txt"
+
 
 def render_string_to_pdf(
     template: str, context: dict, use_django_engine=False
@@ -29,7 +41,7 @@ def render_string_to_pdf(
     :return: a bytes array which includes a rendered PDF document
     """
     rendered_str = render_string(template, context, use_django_engine=use_django_engine)
-    return HTML(string=rendered_str).write_pdf()
+    return write_pdf(rendered_str)
 
 
 def render_string(template: str, context: dict, use_django_engine=False) -> str:
@@ -44,28 +56,74 @@ def render_string(template: str, context: dict, use_django_engine=False) -> str:
     if use_django_engine:
         engine = None
     else:
-        engine = Engine()
+        engine = get_template_engine()
 
     return Template(template, engine=engine).render(Context(context))
 
 
-def render_deregister_letter_pdf(
+@functools.lru_cache(maxsize=None)
+def get_template_engine() -> Engine:
+    """
+    Get the template engine used to render letter and email templates.
+
+    The engine is created once per process and shared between all renders.
+
+    :return: the template engine
+    """
+    return Engine()
+
+
+@functools.lru_cache(maxsize=settings.COMPILED_TEMPLATE_CACHE_SIZE)
+def _compile_template_file(filename: str, modified: int, size: int) -> Template:
+    """
+    Compile a template file.
+
+    The modification time and size of the file are part of the cache key so an edited file is recompiled.
+
+    :param filename: the filename of the template file
+    :param modified: the modification time of the file in nanoseconds
+    :param size: the size of the file in bytes
+    :return: the compiled template
+    """
+    return Template(get_file_contents(filename), engine=get_template_engine())
+
+
+def get_compiled_template(filename: str) -> Template:
+    """
+    Get a compiled template for a template file.
+
+    Compiled templates are cached per process, keyed by the filename, modification time and size of the file.
+
+    :param filename: the filename of the template file
+    :return: the compiled template, if the file could not be read a template with an error message is returned
+    """
+    try:
+        stat = os.stat(str(filename))
+    except OSError:
+        return Template(get_file_contents(filename), engine=get_template_engine())
+    return _compile_template_file(str(filename), stat.st_mtime_ns, stat.st_size)
+
+
+def clear_compiled_templates():
+    """Clear the compiled template cache."""
+    _compile_template_file.cache_clear()
+
+
+def render_deregister_letter_html(
     template_context: dict, item: Subscription, letter_template=None
-) -> bytes:
+) -> str:
     """
-    Render a deregister letter to PDF.
+    Render a deregister letter to HTML.
 
     :param template_context: the template context
     :param item: the item to render the letter for
     :param letter_template: the letter template to use, if specified this template will be used instead of the one
     registered in the subscription
-    :return: a rendered PDF as bytes
+    :return: the rendered letter as HTML string
     """
     item_address, item_postal_code, item_residence = item.get_address_information()
-    template = (
-        get_file_contents(item.get_letter_template())
-        if letter_template is None
-        else get_file_contents(letter_template)
+    template = get_compiled_template(
+        item.get_letter_template() if letter_template is None else letter_template
     )
 
     context = {
@@ -76,7 +134,26 @@ def render_deregister_letter_pdf(
         "date": datetime.datetime.now().strftime("%d-%m-%Y"),
     }
     context.update(template_context)
-    return render_string_to_pdf(template, context)
+    return template.render(Context(context))
+
+
+def render_deregister_letter_pdf(
+    template_context: dict, item: Subscription, letter_template=None
+) -> bytes:
+    """
+    Render a deregister letter to PDF.
+
+    :param template_context: the template context
+    :param item: the item to render the letter for
+    :param letter_template: the letter template to use, if specified this template will be used instead of the one
+    registered in the subscription
+    :return: a rendered PDF as bytes
+    """
+    return write_pdf(
+        render_deregister_letter_html(
+            template_context, item, letter_template=letter_template
+        )
+    )
 
 
 def render_deregister_letter_docx(
@@ -85,35 +162,19 @@ def render_deregister_letter_docx(
     """
     Render a letter as a Word document (docx).
 
-    This function uses the pdf2docx library for rendering a docx document. We first render the HTML to PDF and then
-    write it to a file to convert it to a Word document. Then the binary content of the Word document is returned.
+    The letter is rendered directly from HTML to a Word document. If the template uses HTML that is not supported by
+    the native renderer, the letter is rendered to PDF and converted to a Word document with pdf2docx.
     :param template_context: the template context
     :param item: the item to render the letter for
     :param letter_template: the letter template to use, if specified this template will be used instead of the one
     registered in the subscription
     :return: a rendered Word document as bytes
     """
-    # First render the PDF
-    pdf = render_deregister_letter_pdf(
-        template_context, item, letter_template=letter_template
+    return render_docx(
+        render_deregister_letter_html(
+            template_context, item, letter_template=letter_template
+        )
     )
-    # Then save the PDF temporarily
-    pdf_file = tempfile.NamedTemporaryFile()
-    pdf_file.write(pdf)
-    # Now create a temporary file for storing the docx document as the library only support reading from/writing to
-    # files
-    docx_file = tempfile.NamedTemporaryFile()
-    # Convert the document
-    parse(pdf_file.name, docx_file.name)
-    # Close the PDF file as we do not need it anymore (it will also probably be deleted after closing)
-    pdf_file.close()
-    # Now the docx file with in another file and read the content
-    written_docx_file = open(docx_file.name, "rb")
-    docx_content = written_docx_file.read()
-    # Close both files as we have read the content
-    written_docx_file.close()
-    docx_file.close()
-    return docx_content
 
 
 def send_verification_email(
@@ -126,8 +187,7 @@ def send_verification_email(
     :param email_address: the email address of the user that will receive the verification mail
     :param verification_url: the verification url (including the verification token) to be put in the verification mail
     button
-    :return: True if the mail was send successfully, False otherwise
-    This function captures SMTPExceptions and logs them to the console.
+    :return: True if the mail was queued in the outbox
     """
     template = get_template("email/verification_mail.html")
     template_text = get_template("email/verification_mail.txt")
@@ -148,12 +208,7 @@ def send_verification_email(
         [email_address],
     )
     msg.attach_alternative(html_content, "text/html")
-    try:
-        msg.send()
-    except SMTPException as e:
-        logger.error(e)
-        return False
-
+    queue_email(msg)
     return True
 
 
@@ -176,8 +231,7 @@ def send_summary_email(
     :param pdfs: a list of pdf documents generated
     :param user_information: the user information for the summary email
     :param direct_send: whether or not the deregister emails were send directly to the companies
-    :return: True if the mail was send successfully, False otherwise
-    This function captures SMTPExceptions and logs them to the console.
+    :return: True if the mail was queued in the outbox
     """
     template = get_template("email/confirmation_mail.html")
     template_text = get_template("email/confirmation_mail.txt")
@@ -205,12 +259,7 @@ def send_summary_email(
     for pdf in pdfs:
         msg.attach(pdf["item"].slug + ".pdf", pdf["pdf"], "application/pdf")
 
-    try:
-        msg.send()
-    except SMTPException as e:
-        logger.error(e)
-        return False
-
+    queue_email(msg)
     return True
 
 
@@ -226,76 +275,266 @@ def create_deregister_letters(
     """
     succeeded = list()
     failed = list()
-    pdfs = list()
+    rendered = list()
+    template_context = {
+        "firstname": mail_list.firstname,
+        "lastname": mail_list.lastname,
+        "address": mail_list.address,
+        "postal_code": mail_list.postal_code,
+        "residence": mail_list.residence,
+    }
     for item in mail_list.item_list.iterator():
         if item.can_generate_letter:
             try:
-                pdfs.append(
-                    {
-                        "item": item,
-                        "pdf": render_deregister_letter_pdf(
-                            {
-                                "firstname": mail_list.firstname,
-                                "lastname": mail_list.lastname,
-                                "address": mail_list.address,
-                                "postal_code": mail_list.postal_code,
-                                "residence": mail_list.residence,
-                            },
-                            item,
-                        ),
-                    }
+                rendered.append(
+                    (item, render_deregister_letter_html(template_context, item))
                 )
-                succeeded.append(item)
             except TemplateSyntaxError as e:
                 logger.error("Creating a PDF file for {} results in {}".format(item, e))
                 failed.append(item)
         else:
             failed.append(item)
 
+    pdfs = list()
+    rendered_pdfs = render_pdfs([html for _, html in rendered])
+    for (item, _), pdf in zip(rendered, rendered_pdfs):
+        if isinstance(pdf, Exception):
+            logger.error("Creating a PDF file for {} results in {}".format(item, pdf))
+            failed.append(item)
+        else:
+            pdfs.append({"item": item, "pdf": pdf})
+            succeeded.append(item)
+
     return succeeded, failed, pdfs
 
 
-def handle_deregister_request(mail_list: QueuedMailList) -> bool:
+def iter_deregister_letters(
+    template_context: dict, subscription_ids: Iterable[int], artifact_format: str
+) -> Iterator[Tuple[int, Union[Subscription, None], Union[bytes, None]]]:
+    """
+    Render deregister letters for multiple subscriptions with one shared template context.
+
+    The subscriptions are fetched in one query. The letters are rendered with the backend configured in
+    PDF_RENDER_BACKEND, so both PDF and Word documents are rendered in parallel when the pool backend is used.
+    :param template_context: the template context
+    :param subscription_ids: the ids of the subscriptions to render a letter for
+    :param artifact_format: the format of the letters, ARTIFACT_FORMAT_PDF or ARTIFACT_FORMAT_DOCX
+    :return: an iterator with a tuple (subscription_id, subscription, letter) for every id in the order of
+    subscription_ids, the subscription is None if it does not exist and the letter is None if it could not be rendered
+    """
+    subscription_ids = list(subscription_ids)
+    subscriptions = Subscription.objects.select_related("category").in_bulk(
+        subscription_ids
+    )
+    rendered = []
+    for subscription_id in subscription_ids:
+        subscription = subscriptions.get(subscription_id)
+        html = None
+        if subscription is not None:
+            try:
+                html = render_deregister_letter_html(template_context, subscription)
+            except TemplateSyntaxError as e:
+                logger.error(
+                    "Creating a letter for {} results in {}".format(subscription, e)
+                )
+        rendered.append((subscription_id, subscription, html))
+
+    letters = iter_rendered(
+        write_pdf if artifact_format == ARTIFACT_FORMAT_PDF else render_docx,
+        (html for _, _, html in rendered if html is not None),
+    )
+    for subscription_id, subscription, html in rendered:
+        letter = None
+        if html is not None:
+            letter = next(letters)
+            if isinstance(letter, Exception):
+                logger.error(
+                    "Creating a letter for {} results in {}".format(
+                        subscription, letter
+                    )
+                )
+                letter = None
+        yield subscription_id, subscription, letter
+
+
+def stream_deregister_letters_zip(
+    template_context: dict, subscription_ids: Iterable[int], artifact_format: str
+) -> Iterator[bytes]:
+    """
+    Render deregister letters for multiple subscriptions to a streamed ZIP archive.
+
+    Every letter is written to the archive as soon as it is rendered. Subscriptions for which no letter could be
+    rendered get an error file instead, and a manifest.json with the status of every subscription is written last.
+    :param template_context: the template context
+    :param subscription_ids: the ids of the subscriptions to render a letter for
+    :param artifact_format: the format of the letters, ARTIFACT_FORMAT_PDF or ARTIFACT_FORMAT_DOCX
+    :return: an iterator with the bytes of the ZIP archive
+    """
+
+    def files():
+        manifest = []
+        letters = iter_deregister_letters(
+            template_context, subscription_ids, artifact_format
+        )
+        for index, (subscription_id, subscription, letter) in enumerate(
+            letters, start=1
+        ):
+            if subscription is None:
+                error = "Subscription does not exist."
+            elif letter is None:
+                error = "The letter could not be rendered."
+            else:
+                error = None
+
+            if error is None:
+                filename = "{:03d}-{}.{}".format(
+                    index, subscription.slug, artifact_format
+                )
+                yield filename, letter
+            else:
+                filename = "{:03d}-{}.error.txt".format(index, subscription_id)
+                yield filename, error.encode("utf-8")
+            manifest.append(
+                {
+                    "subscription": subscription_id,
+                    "file": filename,
+                    "status": "failed" if error is not None else "succeeded",
+                    "error": error,
+                }
+            )
+        yield "manifest.json", json.dumps(manifest, indent=2).encode("utf-8")
+
+    return stream_zip(files())
+
+
+def handle_deregister_request(
+    mail_list: QueuedMailList, job: DeregisterJob = None
+) -> bool:
     """
     Handle a deregister request.
 
+    The summary email is queued, the deregistrations are recorded and the mail list is deleted in one transaction, so
+    a retry after a failure does not queue a second summary email.
     :param mail_list: the mail list to handle
-    :return: True if the summary email was send successfully, False otherwise
+    :param job: the DeregisterJob handling the mail list, deregister emails already sent by an earlier attempt of the
+    job are not sent again
+    :return: True if the summary email was queued in the outbox
     """
-    succeeded_mails, failed_mails = send_deregister_emails(mail_list)
     succeeded_letters, failed_letters, pdfs = create_deregister_letters(mail_list)
-    retvalue = send_summary_email(
-        succeeded_mails,
-        failed_mails,
-        succeeded_letters,
-        failed_letters,
-        pdfs,
-        mail_list,
-    )
-    for subscription in mail_list.item_list.iterator():
-        subscription.deregistered()
-    mail_list.delete()
-    QueuedMailList.remove_expired()
+    succeeded_mails, failed_mails = send_deregister_emails(mail_list, job=job)
+    with transaction.atomic():
+        retvalue = send_summary_email(
+            succeeded_mails,
+            failed_mails,
+            succeeded_letters,
+            failed_letters,
+            pdfs,
+            mail_list,
+        )
+        mail_list.deregistered()
+        mail_list.delete()
     return retvalue
 
 
+def update_popularity(subscription_ids: Iterable[int]):
+    """
+    Update the leaderboards after the deregistrations of subscriptions were rolled up.
+
+    The cached fragments showing the trending subscriptions are purged, the cached pages showing the most popular
+    subscriptions are purged if those changed.
+    :param subscription_ids: the ids of the subscriptions of which the amount_used increased
+    :return: None
+    """
+    tags = [page_cache.TRENDING_TAG]
+    if update_leaderboards(subscription_ids):
+        tags.append(page_cache.POPULAR_TAG)
+    page_cache.purge(tags)
+
+
+def run_deregister_job(job: DeregisterJob) -> bool:
+    """
+    Run a claimed deregister job.
+
+    :param job: the DeregisterJob to run, claimed with DeregisterJob.claim_next()
+    :return: True if the job succeeded, False otherwise
+    """
+    if job.mail_list is None:
+        job.mark_failed(
+            "The mail list of this job does not exist anymore.", retry=False
+        )
+        return False
+
+    try:
+        summary_send = handle_deregister_request(job.mail_list, job=job)
+    except Exception as e:
+        logger.exception("Deregister job {} failed".format(job))
+        job.mark_failed(str(e))
+        return False
+
+    # The mail list is deleted after handling the request
+    job.mail_list = None
+    if summary_send:
+        job.mark_succeeded()
+    else:
+        job.mark_failed("The summary email could not be sent.", retry=False)
+    logger.info("Deregister job {} finished in {}".format(job, job.duration))
+    return summary_send
+
+
+def run_deregister_jobs(max_jobs: int = None) -> int:
+    """
+    Run deregister jobs until there are no jobs ready to be run.
+
+    :param max_jobs: the maximum amount of jobs to run, None to run all jobs that are ready
+    :return: the amount of jobs that were run
+    """
+    amount = 0
+    while max_jobs is None or amount < max_jobs:
+        job = DeregisterJob.claim_next()
+        if job is None:
+            break
+        run_deregister_job(job)
+        amount += 1
+    return amount
+
+
 def send_deregister_emails(
-    mail_list: QueuedMailList, direct_send: bool = False
+    mail_list: QueuedMailList,
+    direct_send: bool = False,
+    dispatcher: MailDispatcher = None,
+    job: DeregisterJob = None,
 ) -> (set, set):
     """
     Send all deregister emails for subscriptions in mail_list.
 
+    All emails are sent over one connection.
     :param mail_list: a QueuedMailList object including the user information to be noted in the email and a list of
     subscriptions to send deregister emails for
     :param direct_send: whether or not to send the emails directly to the subscription providers or not
+    :param dispatcher: the MailDispatcher to send the emails with, if not specified a new connection is used
+    :param job: the DeregisterJob sending the emails, sent emails are recorded in its sent_items and emails recorded
+    there are not sent again
     :return: two sets, the first one with all subscriptions that succeeded sending an email, the other with all
     subscriptions that failed sending an email
     """
+    if dispatcher is None:
+        with MailDispatcher() as dispatcher:
+            return send_deregister_emails(
+                mail_list, direct_send=direct_send, dispatcher=dispatcher, job=job
+            )
+
     succeeded = set()
     failed = set()
+    already_sent = (
+        set() if job is None else set(job.sent_items.values_list("id", flat=True))
+    )
 
     for subscription in mail_list.item_list.iterator():
-        if subscription.support_email is not None and subscription.support_email != "":
+        if subscription.id in already_sent:
+            succeeded.add(subscription)
+        elif (
+            subscription.support_email is not None and subscription.support_email != ""
+        ):
             deregister_email = render_deregister_email(
                 {
                     "firstname": mail_list.firstname,
@@ -316,7 +555,7 @@ def send_deregister_emails(
                     settings.EMAIL_HOST_USER,
                     [subscription.support_email],
                     cc=[mail_list.email_address],
-                    reply_to=mail_list.email_address,
+                    reply_to=[mail_list.email_address],
                 )
             else:
                 msg = EmailMultiAlternatives(
@@ -325,11 +564,11 @@ def send_deregister_emails(
                     settings.EMAIL_HOST_USER,
                     [mail_list.email_address],
                 )
-            try:
-                msg.send()
+            if dispatcher.send(msg):
                 succeeded.add(subscription)
-            except SMTPException as e:
-                logger.error(e)
+                if job is not None:
+                    job.sent_items.add(subscription)
+            else:
                 failed.add(subscription)
         else:
             failed.add(subscription)
@@ -349,10 +588,8 @@ def render_deregister_email(
     :return: a rendered email as string
     """
     item_address, item_postal_code, item_residence = item.get_address_information()
-    template = (
-        get_file_contents(item.get_email_template_text())
-        if email_template is None
-        else get_file_contents(email_template)
+    template = get_compiled_template(
+        item.get_email_template_text() if email_template is None else email_template
     )
 
     context = {
@@ -365,7 +602,84 @@ def render_deregister_email(
     }
     context.update(template_context)
 
-    return render_string(template, context)
+    return template.render(Context(context))
+
+
+def _get_artifact_template(item: Subscription, artifact_format: str) -> str:
+    """
+    Get the template file used to render an artifact.
+
+    :param item: the subscription to render the artifact for
+    :param artifact_format: the format of the artifact, one of ARTIFACT_FORMAT_PDF, ARTIFACT_FORMAT_DOCX or
+    ARTIFACT_FORMAT_TEXT
+    :return: the template file location
+    """
+    if artifact_format == ARTIFACT_FORMAT_TEXT:
+        return item.get_email_template_text()
+    return item.get_letter_template()
+
+
+def get_deregister_artifact_digest(
+    template_context: dict, item: Subscription, artifact_format: str
+) -> str:
+    """
+    Get the content address of a rendered deregister letter or email.
+
+    The digest covers everything the rendered output depends on: the template source, the address information and name
+    of the subscription, the (normalized) template context, the date of rendering and the output format.
+
+    :param template_context: the template context
+    :param item: the subscription to render the artifact for
+    :param artifact_format: the format of the artifact, one of ARTIFACT_FORMAT_PDF, ARTIFACT_FORMAT_DOCX or
+    ARTIFACT_FORMAT_TEXT
+    :return: a hexadecimal SHA-256 digest
+    """
+    template = get_compiled_template(_get_artifact_template(item, artifact_format))
+    key = {
+        "format": artifact_format,
+        "template": hashlib.sha256(template.source.encode("utf-8")).hexdigest(),
+        "address": item.get_address_information(),
+        "name": item.name,
+        "date": datetime.datetime.now().strftime("%d-%m-%Y"),
+        "context": template_context,
+    }
+    normalized = json.dumps(key, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def get_deregister_artifact(
+    template_context: dict, item: Subscription, artifact_format: str, digest=None
+) -> Union[bytes, str]:
+    """
+    Get a rendered deregister letter or email from the rendered artifact cache, rendering it on a miss.
+
+    :param template_context: the template context
+    :param item: the subscription to render the artifact for
+    :param artifact_format: the format of the artifact, one of ARTIFACT_FORMAT_PDF, ARTIFACT_FORMAT_DOCX or
+    ARTIFACT_FORMAT_TEXT
+    :param digest: the digest of the artifact as returned by get_deregister_artifact_digest, computed if not specified
+    :return: the rendered PDF or Word document as bytes or the rendered email as string
+    """
+    if digest is None:
+        digest = get_deregister_artifact_digest(template_context, item, artifact_format)
+    cache = caches[settings.RENDERED_ARTIFACT_CACHE]
+    cache_key = "rendered-artifact:{}".format(digest)
+    artifact = cache.get(cache_key)
+    if artifact is not None:
+        return artifact
+
+    if artifact_format == ARTIFACT_FORMAT_PDF:
+        artifact = render_deregister_letter_pdf(template_context, item)
+    elif artifact_format == ARTIFACT_FORMAT_DOCX:
+        artifact = render_deregister_letter_docx(template_context, item)
+    elif artifact_format == ARTIFACT_FORMAT_TEXT:
+        artifact = render_deregister_email(template_context, item)
+    else:
+        raise ValueError("Unknown artifact format {}".format(artifact_format))
+
+    if len(artifact) <= settings.RENDERED_ARTIFACT_MAX_SIZE:
+        cache.set(cache_key, artifact)
+    return artifact
 
 
 def send_request_email(
@@ -378,7 +692,7 @@ def send_request_email(
     :param email_address: the email-address of the person sending the contact email
     :param subscription: the subscription that the user requested
     :param message: the message of the contact email
-    :return: True if the sending succeeded, False otherwise
+    :return: True if the mail was queued in the outbox
     """
     template = get_template("email/request_mail.html")
     template_text = get_template("email/request_mail.txt")
@@ -404,57 +718,99 @@ def send_request_email(
     )
     msg.attach_alternative(html_content, "text/html")
 
-    try:
-        msg.send()
-    except SMTPException as e:
-        logger.error(e)
-        return False
-
+    queue_email(msg)
     return True
 
 
-def store_subscription_list(subscription_list: []) -> set:
+class SubscriptionSelection(NamedTuple):
+    """Subscriptions selected for a deregister request and the selected ids that were ignored."""
+
+    subscriptions: Set[Subscription]
+    unknown_ids: List[int]
+    truncated_ids: List[int]
+
+
+def store_subscription_list(subscription_list: []) -> SubscriptionSelection:
     """
-    Create a set with all ids corresponding to subscription items in subscription_list.
+    Get the subscriptions corresponding to the subscription items in subscription_list.
 
+    The subscriptions are fetched with one query. Items without a valid id are skipped, duplicate ids are removed and
+    at most MAX_SUBSCRIPTIONS_PER_REQUEST ids are used. Ids that do not correspond to a subscription and ids exceeding
+    the maximum are logged and returned so they can be reported to the user.
     :param subscription_list: the list of dictionaries with (at least) id key-values corresponding to subscription
-    objects :return: a set with all subscriptions having a corresponding id in the items in subscription_list
+    objects
+    :return: a SubscriptionSelection with a set of all subscriptions having a corresponding id in the items in
+    subscription_list, the ids that do not correspond to a subscription and the ids exceeding the maximum
     """
-    subscription_objects = set()
+    if not isinstance(subscription_list, list):
+        logger.warning("Ignoring a subscription list that is not a list")
+        return SubscriptionSelection(set(), [], [])
+
+    subscription_ids = dict()
     for item in subscription_list:
-        if "id" in item:
-            if Subscription.objects.filter(id=item["id"]).exists():
-                subscription_objects.add(Subscription.objects.get(id=item["id"]))
-    return subscription_objects
+        try:
+            if isinstance(item["id"], bool):
+                continue
+            subscription_id = int(item["id"])
+        except (TypeError, KeyError, ValueError):
+            continue
+        subscription_ids[subscription_id] = None
+
+    subscription_ids = list(subscription_ids)
+    truncated_ids = subscription_ids[settings.MAX_SUBSCRIPTIONS_PER_REQUEST :]
+    if len(truncated_ids) > 0:
+        logger.warning(
+            "Ignoring {} subscriptions exceeding the maximum of {} subscriptions per request".format(
+                len(truncated_ids), settings.MAX_SUBSCRIPTIONS_PER_REQUEST
+            )
+        )
+        subscription_ids = subscription_ids[: settings.MAX_SUBSCRIPTIONS_PER_REQUEST]
+
+    subscriptions = Subscription.objects.filter(id__in=subscription_ids)
+    subscription_objects = set(subscriptions)
+    found_ids = {x.id for x in subscription_objects}
+    unknown_ids = [x for x in subscription_ids if x not in found_ids]
+    if len(unknown_ids) > 0:
+        logger.warning(
+            "Ignoring unknown subscription ids: {}".format(
+                ", ".join(str(x) for x in sorted(unknown_ids))
+            )
+        )
+    return SubscriptionSelection(subscription_objects, unknown_ids, truncated_ids)
 
 
 def handle_verification_request(
     user_information: dict, subscription_list: []
-) -> Union[QueuedMailList, bool]:
+) -> Tuple[Union[QueuedMailList, bool], SubscriptionSelection]:
     """
     Handle a verification request, generate a QueuedMailList.
 
-    :param user_information: the user information to add to the QueuedMailList :param subscription_list: the list of
-    dictionaries with (at least) id key-values corresponding to subscription objects :return: True if a
-    QueuedMailList was generated, False otherwise
+    :param user_information: the user information to add to the QueuedMailList
+    :param subscription_list: the list of dictionaries with (at least) id key-values corresponding to subscription
+    objects
+    :return: a tuple with the generated QueuedMailList (or False if no QueuedMailList was generated) and the
+    SubscriptionSelection with the subscriptions and the ignored ids of subscription_list
     """
-    subscription_objects = store_subscription_list(subscription_list)
+    selection = store_subscription_list(subscription_list)
     if "email" in user_information and "first_name" in user_information:
         try:
-            return QueuedMailList.generate(
-                user_information.get("first_name"),
-                user_information.get("second_name", ""),
-                user_information.get("email"),
-                user_information.get("address", ""),
-                user_information.get("postal_code", ""),
-                user_information.get("residence", ""),
-                subscription_objects,
+            return (
+                QueuedMailList.generate(
+                    user_information.get("first_name"),
+                    user_information.get("second_name", ""),
+                    user_information.get("email"),
+                    user_information.get("address", ""),
+                    user_information.get("postal_code", ""),
+                    user_information.get("residence", ""),
+                    selection.subscriptions,
+                ),
+                selection,
             )
         except Exception as e:
             logger.error(e)
-            return False
+            return False, selection
     else:
-        return False
+        return False, selection
 
 
 def get_file_contents(filename: str) -> str:
@@ -1,7 +1,23 @@
-from django.db.models.signals import pre_save
+from django.db.models.signals import (
+    pre_save,
+    post_save,
+    pre_delete,
+    post_delete,
+    m2m_changed,
+)
 from django.dispatch import receiver
 
-from subscriptions.models import Subscription
+from import_export.signals import post_import
+
+from subscriptions import page_cache
+from subscriptions.catalog import catalog_changed
+from subscriptions.models import (
+    Subscription,
+    SubscriptionCategory,
+    SubscriptionCategoryClosure,
+    SubscriptionSearchDocument,
+    SubscriptionSearchTerm,
+)
 
 
 @receiver(pre_save, sender=Subscription)
@@ -19,3 +35,160 @@ def set_can_generate_letter(sender, instance, **kwargs):
 def set_can_generate_email(sender, instance, **kwargs):
     """Set can_generate_email when Subscription is saved."""
     instance.can_generate_email = bool(instance.support_email)
+
+
+@receiver(post_save, sender=SubscriptionCategory)
+def update_category_closure(sender, instance, **kwargs):
+    """Update the closure rows of a SubscriptionCategory (and its subtree) when its parent changed."""
+    if not SubscriptionCategoryClosure.is_up_to_date(instance):
+        SubscriptionCategoryClosure.rebuild([instance])
+
+
+@receiver(pre_delete, sender=SubscriptionCategory)
+def store_category_children(sender, instance, **kwargs):
+    """Store the children of a SubscriptionCategory before it is deleted."""
+    instance._closure_children = list(
+        SubscriptionCategory.objects.filter(category=instance).values_list(
+            "id", flat=True
+        )
+    )
+
+
+@receiver(post_delete, sender=SubscriptionCategory)
+def update_category_closure_after_delete(sender, instance, **kwargs):
+    """Rebuild the closure rows of the children of a deleted SubscriptionCategory as they became top level."""
+    children = getattr(instance, "_closure_children", [])
+    if children:
+        SubscriptionCategoryClosure.rebuild(children)
+
+
+@receiver(post_save, sender=Subscription)
+def update_search_document(sender, instance, update_fields=None, **kwargs):
+    """Update the search document of a Subscription when its name might have changed."""
+    if update_fields is None or "name" in update_fields:
+        SubscriptionSearchDocument.rebuild([instance.id])
+
+
+@receiver(post_save, sender=SubscriptionSearchTerm)
+def update_search_documents_of_term(sender, instance, **kwargs):
+    """Update the search documents of the subscriptions of a SubscriptionSearchTerm when it is saved."""
+    SubscriptionSearchDocument.rebuild(
+        instance.subscription.values_list("id", flat=True)
+    )
+
+
+@receiver(pre_delete, sender=SubscriptionSearchTerm)
+def store_search_term_subscriptions(sender, instance, **kwargs):
+    """Store the subscriptions of a SubscriptionSearchTerm before it is deleted."""
+    instance._search_subscriptions = list(
+        instance.subscription.values_list("id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=SubscriptionSearchTerm)
+def update_search_documents_after_delete(sender, instance, **kwargs):
+    """Update the search documents of the subscriptions of a deleted SubscriptionSearchTerm."""
+    subscriptions = getattr(instance, "_search_subscriptions", [])
+    if subscriptions:
+        SubscriptionSearchDocument.rebuild(subscriptions)
+
+
+@receiver(m2m_changed, sender=SubscriptionSearchTerm.subscription.through)
+def update_search_documents_of_relation(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    """Update the search documents of subscriptions when search terms are added to or removed from them."""
+    if reverse:
+        # The relation is changed from the side of a Subscription
+        if action in ["post_add", "post_remove", "post_clear"]:
+            SubscriptionSearchDocument.rebuild([instance.id])
+    elif action == "pre_clear":
+        instance._search_subscriptions = list(
+            instance.subscription.values_list("id", flat=True)
+        )
+    elif action == "post_clear":
+        SubscriptionSearchDocument.rebuild(
+            getattr(instance, "_search_subscriptions", [])
+        )
+    elif action in ["post_add", "post_remove"]:
+        SubscriptionSearchDocument.rebuild(pk_set)
+
+
+@receiver(pre_save, sender=Subscription)
+@receiver(pre_delete, sender=Subscription)
+def store_subscription_page_tags(sender, instance, **kwargs):
+    """Store the tags of the cached catalog pages showing a Subscription before it is changed or deleted."""
+    instance._page_cache_tags = set()
+    old = (
+        Subscription.objects.filter(pk=instance.pk)
+        .values("category_id", "amount_used")
+        .first()
+        if instance.pk is not None
+        else None
+    )
+    if old is not None:
+        instance._page_cache_tags = page_cache.get_subscription_tags(
+            instance.pk, old["category_id"], old["amount_used"]
+        )
+
+
+@receiver(post_save, sender=Subscription)
+def purge_subscription_pages(sender, instance, **kwargs):
+    """Purge the cached catalog pages that showed or show a Subscription."""
+    page_cache.purge(
+        getattr(instance, "_page_cache_tags", set())
+        | page_cache.get_subscription_tags(
+            instance.pk, instance.category_id, instance.amount_used
+        )
+    )
+
+
+@receiver(pre_save, sender=SubscriptionCategory)
+@receiver(pre_delete, sender=SubscriptionCategory)
+def store_category_page_tags(sender, instance, **kwargs):
+    """Store the tags of the cached catalog pages showing a SubscriptionCategory before it is changed or deleted."""
+    instance._page_cache_tags = page_cache.get_category_tags(
+        [instance.pk], descendants=True
+    )
+
+
+@receiver(post_save, sender=SubscriptionCategory)
+def purge_category_pages(sender, instance, **kwargs):
+    """Purge the cached catalog pages that showed or show a SubscriptionCategory (or the categories around it)."""
+    page_cache.purge(
+        getattr(instance, "_page_cache_tags", set())
+        | page_cache.get_category_tags([instance.pk], descendants=True)
+        | {page_cache.CATEGORIES_TAG}
+    )
+
+
+@receiver(post_delete, sender=Subscription)
+@receiver(post_delete, sender=SubscriptionCategory)
+def purge_deleted_pages(sender, instance, **kwargs):
+    """Purge the cached catalog pages that showed a deleted Subscription or SubscriptionCategory."""
+    tags = getattr(instance, "_page_cache_tags", set())
+    if sender == SubscriptionCategory:
+        tags = tags | {page_cache.CATEGORIES_TAG}
+    page_cache.purge(tags)
+
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+@receiver(post_save, sender=SubscriptionCategory)
+@receiver(post_delete, sender=SubscriptionCategory)
+@receiver(post_save, sender=SubscriptionSearchTerm)
+@receiver(post_delete, sender=SubscriptionSearchTerm)
+@receiver(m2m_changed, sender=SubscriptionSearchTerm.subscription.through)
+def update_catalog_version(sender, **kwargs):
+    """Give the catalog a new version when a subscription, category or search term changed."""
+    if kwargs.get("action", "post_").startswith("post_"):
+        catalog_changed()
+
+
+@receiver(post_import)
+def update_catalog_version_after_import(sender, model, **kwargs):
+    """Give the catalog a new version after subscriptions, categories or search terms are imported."""
+    if model in [Subscription, SubscriptionCategory, SubscriptionSearchTerm]:
+        catalog_changed()
+    if model in [Subscription, SubscriptionCategory]:
+        page_cache.purge([page_cache.CATALOG_TAG])
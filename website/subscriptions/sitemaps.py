@@ -1,7 +1,8 @@
+import math
+
 from django.contrib.sitemaps import Sitemap
-from django.core.paginator import Paginator
 from django.urls import reverse
-from subscriptions.models import Subscription, SubscriptionCategory
+from subscriptions.catalog import get_catalog
 from subscriptions.views import ListCategoryPageView
 
 
@@ -41,14 +42,15 @@ class SubscriptionCategoryPageSitemap(Sitemap):
 
         :return: a list of (category, page) pairs
         """
-        categories = SubscriptionCategory.objects.all()
+        catalog = get_catalog()
         pages = list()
-        for category in categories:
-            subscriptions = Subscription.top_category(
-                category, max_items=0, order_by="name"
+        for category in catalog.categories.values():
+            subscriptions = len(catalog.get_category_subscriptions(category.id))
+            # A category without subscriptions still has a (empty) first page
+            page_count = max(
+                1, math.ceil(subscriptions / ListCategoryPageView.paginate_by)
             )
-            paginator = Paginator(subscriptions, ListCategoryPageView.paginate_by)
-            for i in paginator.page_range:
+            for i in range(1, page_count + 1):
                 pages.append((category, i))
         return pages
 
@@ -148,9 +150,12 @@ class SubscriptionDetailsSitemap(Sitemap):
         """
         Get a list of items corresponding to this sitemap.
 
-        :return: a list of subscription objects
+        :return: a list of subscription records
         """
-        return Subscription.objects.all().order_by("name")
+        return sorted(
+            get_catalog().subscriptions.values(),
+            key=lambda subscription: (subscription.name, subscription.id),
+        )
 
     def location(self, obj):
         """
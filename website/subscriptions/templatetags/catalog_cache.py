@@ -0,0 +1,79 @@
+import time
+
+from django import template
+from django.utils.safestring import mark_safe
+
+from subscriptions.page_cache import (
+    add_page_tags,
+    CATALOG_TAG,
+    get_cached,
+    get_fragment_key,
+    set_cached,
+    uses_csrf_token,
+)
+
+register = template.Library()
+
+
+class CatalogCacheNode(template.Node):
+    """Template node rendering a cached catalog fragment."""
+
+    def __init__(self, nodelist, vary_on):
+        """
+        Initialize the node.
+
+        :param nodelist: the nodes of the fragment
+        :param vary_on: a list of FilterExpressions identifying the fragment, the first one or two form its tag
+        """
+        self.nodelist = nodelist
+        self.vary_on = vary_on
+
+    def render(self, context):
+        """
+        Render the fragment or get it from the cache.
+
+        :param context: the template context
+        :return: the rendered fragment
+        """
+        values = [str(expression.resolve(context)) for expression in self.vary_on]
+        tags = {":".join(values[:2]), CATALOG_TAG}
+        request = getattr(context, "request", None)
+        if request is None or request.method not in ("GET", "HEAD"):
+            return self.nodelist.render(context)
+
+        add_page_tags(request, tags)
+        key = get_fragment_key(*values)
+        fragment = get_cached(key)
+        if fragment is not None:
+            return mark_safe(fragment)
+
+        rendered = time.time()
+        fragment = self.nodelist.render(context)
+        # Fragments might contain a CSRF token, which is specific to the visitor
+        if not uses_csrf_token(request):
+            set_cached(key, str(fragment), tags, rendered)
+        return fragment
+
+
+@register.tag("catalogcache")
+def do_catalog_cache(parser, token):
+    """
+    Cache a fragment of a catalog page.
+
+    Usage: {% catalogcache name [object_id [vary_on ...]] %} ... {% endcatalogcache %}
+
+    The fragment is cached by all its arguments and tagged with name:object_id (or just name), it is invalidated when
+    that tag is purged (see subscriptions.page_cache). The fragment must be the same for every visitor, cached pages
+    containing the fragment get its tag as well.
+    :param parser: the template parser
+    :param token: the token of the tag
+    :return: a CatalogCacheNode
+    """
+    nodelist = parser.parse(("endcatalogcache",))
+    parser.delete_first_token()
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(
+            "'{}' tag requires at least one argument.".format(bits[0])
+        )
+    return CatalogCacheNode(nodelist, [parser.compile_filter(bit) for bit in bits[1:]])
@@ -0,0 +1,81 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from subscriptions.autocomplete import (
+    autocomplete,
+    get_prefix_index,
+    PrefixIndex,
+)
+from subscriptions.catalog import recheck_catalog
+from subscriptions.models import Subscription, SubscriptionSearchTerm
+
+
+class PrefixIndexTest(TestCase):
+    def setUp(self):
+        self.index = PrefixIndex(
+            [
+                (3, "Basic-Fit België", "basic-fit-belgie"),
+                (1, "Fit for Free", "fit-for-free"),
+                (2, "Basic Fit", "basic-fit"),
+            ],
+            [(1, "Sportschool"), (4, "Unknown subscription")],
+        )
+
+    def test_complete(self):
+        self.assertEqual(len(self.index), 9)
+        self.assertEqual(
+            [record[0] for record in self.index.complete("fit", 5)], [3, 1, 2]
+        )
+        self.assertEqual(
+            [record[0] for record in self.index.complete("BASIC f", 5)], [3, 2]
+        )
+        self.assertEqual(
+            self.index.complete("belgie", 5),
+            [(3, "Basic-Fit België", "basic-fit-belgie")],
+        )
+        self.assertEqual(
+            self.index.complete("sport", 5), [(1, "Fit for Free", "fit-for-free")]
+        )
+        self.assertEqual(self.index.complete("unknown", 5), [])
+        self.assertEqual(self.index.complete("fitt", 5), [])
+        self.assertEqual(self.index.complete(" - ", 5), [])
+
+    def test_limit(self):
+        self.assertEqual([record[0] for record in self.index.complete("f", 2)], [3, 1])
+
+
+class AutocompleteTest(TestCase):
+    fixtures = ["subscriptions.json"]
+
+    def setUp(self):
+        recheck_catalog()
+
+    def test_autocomplete(self):
+        self.assertEqual(
+            autocomplete("new y"), [(10, "New York Times", "new-york-times")]
+        )
+
+    def test_index_is_cleared(self):
+        index = get_prefix_index()
+        self.assertIs(get_prefix_index(), index)
+        SubscriptionSearchTerm.objects.create(name="Krant").subscription.add(11)
+        self.assertIsNot(get_prefix_index(), index)
+        self.assertEqual([record[0] for record in autocomplete("kra")], [11])
+
+    def test_api(self):
+        Subscription.objects.filter(id=9).update(amount_used=10)
+        get_prefix_index()
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                reverse("v1:subscription_autocomplete"), {"prefix": "mobi"}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("max-age=60", response["Cache-Control"])
+        self.assertIn("public", response["Cache-Control"])
+        self.assertEqual(
+            [subscription["name"] for subscription in response.json()["results"]],
+            ["T-Mobile data", "AT&T mobile", "T-Mobile phone"],
+        )
+        self.assertEqual(
+            set(response.json()["results"][0].keys()), {"id", "name", "slug"}
+        )
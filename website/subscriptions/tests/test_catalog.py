@@ -0,0 +1,98 @@
+from django.test import TestCase
+from import_export.signals import post_import
+
+from subscriptions.catalog import get_catalog, recheck_catalog
+from subscriptions.models import (
+    CatalogVersion,
+    Subscription,
+    SubscriptionCategory,
+    SubscriptionSearchTerm,
+)
+
+
+class CatalogSnapshotTest(TestCase):
+    fixtures = ["subscriptions.json"]
+
+    def setUp(self):
+        recheck_catalog()
+
+    def test_snapshot(self):
+        catalog = get_catalog()
+        self.assertEqual(len(catalog.subscriptions), Subscription.objects.count())
+        self.assertEqual(len(catalog.categories), SubscriptionCategory.objects.count())
+
+        record = catalog.get_subscription_by_slug("new-york-times")
+        self.assertEqual(
+            (record.id, record.name, record.pk), (10, "New York Times", 10)
+        )
+        self.assertIsNone(catalog.get_subscription_by_slug("does-not-exist"))
+        with self.assertRaises(AttributeError):
+            record.price = 10
+
+        category = catalog.get_category_by_slug("fitness")
+        self.assertEqual(
+            [
+                subscription.name
+                for subscription in catalog.get_category_subscriptions(category.id)
+            ],
+            [
+                subscription.name
+                for subscription in Subscription.top_category(
+                    SubscriptionCategory.objects.get(id=category.id),
+                    max_items=0,
+                    order_by="name",
+                )
+            ],
+        )
+        self.assertEqual(
+            [record.id for record in catalog.get_popular_subscriptions()[:2]], [10, 13]
+        )
+        self.assertEqual(
+            set(catalog.category_children[None]),
+            set(
+                SubscriptionCategory.objects.filter(category=None).values_list(
+                    "id", flat=True
+                )
+            ),
+        )
+        with self.assertRaises(TypeError):
+            catalog.subscriptions[100] = record
+
+    def test_reads_are_memoized(self):
+        get_catalog()
+        with self.assertNumQueries(0):
+            get_catalog()
+
+    def test_changes_bump_version(self):
+        catalog = get_catalog()
+        version = CatalogVersion.get_version()
+        SubscriptionSearchTerm.objects.create(name="Krant").subscription.add(10)
+        self.assertNotEqual(CatalogVersion.get_version(), version)
+        self.assertIsNot(get_catalog(), catalog)
+        self.assertEqual(get_catalog().subscriptions[10].search_terms, ("Krant",))
+
+        catalog = get_catalog()
+        category = SubscriptionCategory.objects.get(slug="fitness")
+        category.name = "Sport"
+        category.save()
+        self.assertEqual(get_catalog().categories[category.id].name, "Sport")
+
+        catalog = get_catalog()
+        Subscription.objects.get(id=10).delete()
+        self.assertNotIn(10, get_catalog().subscriptions)
+
+    def test_import_bumps_version(self):
+        version = CatalogVersion.get_version()
+        post_import.send(sender=None, model=Subscription)
+        self.assertNotEqual(CatalogVersion.get_version(), version)
+
+    def test_changes_in_other_processes(self):
+        catalog = get_catalog()
+        # A change in another process only changes the version in the database
+        CatalogVersion.bump()
+        self.assertIs(get_catalog(), catalog)
+        with self.settings(CATALOG_VERSION_CHECK_INTERVAL=0):
+            self.assertIsNot(get_catalog(), catalog)
+            catalog = get_catalog()
+            with self.assertNumQueries(1):
+                self.assertIs(get_catalog(), catalog)
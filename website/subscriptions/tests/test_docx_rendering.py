@@ -0,0 +1,139 @@
+from django.test import TestCase
+from subscriptions.api.v1.renderers import WordDocumentRenderer
+from subscriptions.docx_rendering import (
+    html_to_docx,
+    render_docx,
+    UnsupportedHTMLError,
+)
+from subscriptions.services import render_deregister_letter_html
+from subscriptions.models import Subscription
+from docx import Document
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from io import BytesIO
+from mock import patch
+
+
+class DocxRenderingTest(TestCase):
+    fixtures = ["subscriptions.json"]
+
+    @staticmethod
+    def _document(html):
+        return Document(BytesIO(html_to_docx(html)))
+
+    def test_paragraphs(self):
+        document = self._document(
+            "<html><head><title>Title</title><style>body { font-family: serif; }</style></head><body>"
+            "<div>First line<br>\n   second  line</div>"
+            '<p style="text-align: right;">  Right aligned  </p>'
+            "<p>Unclosed paragraph<p>Next paragraph</p></body></html>"
+        )
+        paragraphs = document.paragraphs
+        self.assertEqual(
+            [paragraph.text for paragraph in paragraphs],
+            [
+                "First line\nsecond line",
+                "Right aligned",
+                "Unclosed paragraph",
+                "Next paragraph",
+            ],
+        )
+        self.assertEqual(paragraphs[1].alignment, WD_ALIGN_PARAGRAPH.RIGHT)
+        self.assertIsNone(paragraphs[0].alignment)
+
+    def test_formatting(self):
+        runs = (
+            self._document("<p>Normal <b>bold <i>both</i></b> <u>underlined</u></p>")
+            .paragraphs[0]
+            .runs
+        )
+        self.assertEqual(
+            [(run.text, run.bold, run.italic, run.underline) for run in runs],
+            [
+                ("Normal ", None, None, None),
+                ("bold ", True, None, None),
+                ("both", True, True, None),
+                (" ", None, None, None),
+                ("underlined", None, None, True),
+            ],
+        )
+
+    def test_lists(self):
+        paragraphs = self._document(
+            "<p>Items:<ul><li>First</li><li>Second</ul>After</p><ol><li>Number</li></ol>"
+        ).paragraphs
+        self.assertEqual(
+            [(paragraph.text, paragraph.style.name) for paragraph in paragraphs],
+            [
+                ("Items:", "Normal"),
+                ("First", "List Bullet"),
+                ("Second", "List Bullet"),
+                ("After", "Normal"),
+                ("Number", "List Number"),
+            ],
+        )
+
+    def test_tables(self):
+        document = self._document(
+            "<table><tr><th>Name</th><th>Value</th></tr>"
+            "<tr><td>First</td><td>1<br>2</td></tr><tr><td>Short</td></tr></table>"
+        )
+        table = document.tables[0]
+        self.assertEqual(len(table.rows), 3)
+        self.assertEqual(len(table.columns), 2)
+        self.assertEqual(table.cell(0, 0).text, "Name")
+        self.assertTrue(table.cell(0, 0).paragraphs[0].runs[0].bold)
+        self.assertEqual(table.cell(1, 1).text, "1\n2")
+        self.assertEqual(table.cell(2, 1).text, "")
+
+    def test_unsupported(self):
+        for html in [
+            '<p><img src="logo.png"></p>',
+            '<p style="color: red">Text</p>',
+            "<table><tr><td><table></table></td></tr></table>",
+            '<table><tr><td colspan="2">Text</td></tr></table>',
+            "<li>Item</li>",
+            "<style>p { margin-left: 5cm; }</style><p>Text</p>",
+            "<style>@media print { body { font-family: serif; } }</style><p>Text</p>",
+            "<style>@import url(letter.css);</style><p>Text</p>",
+        ]:
+            with self.subTest(html=html):
+                with self.assertRaises(UnsupportedHTMLError):
+                    html_to_docx(html)
+
+    def test_style_sheet_with_font_family(self):
+        document = Document(
+            BytesIO(
+                html_to_docx(
+                    "<style>/* Font */ body { font-family: Roboto, sans-serif; }</style><p>Text</p>"
+                )
+            )
+        )
+        self.assertEqual([p.text for p in document.paragraphs], ["Text"])
+
+    def test_render_docx_falls_back_to_pdf(self):
+        with patch(
+            "subscriptions.docx_rendering.convert_pdf_to_docx", return_value=b"docx"
+        ) as convert_mock:
+            self.assertEqual(render_docx('<p><img src="logo.png"></p>'), b"docx")
+            convert_mock.assert_called_once()
+            render_docx("<p>Supported</p>")
+            convert_mock.assert_called_once()
+
+    def test_deregister_letter_is_rendered_natively(self):
+        html = render_deregister_letter_html(
+            {"firstname": "Test", "lastname": "Name", "residence": "Tilburg"},
+            Subscription.objects.get(slug="basic-fit-belgie"),
+        )
+        with patch("subscriptions.docx_rendering.convert_pdf_to_docx") as convert_mock:
+            document = Document(BytesIO(render_docx(html)))
+            convert_mock.assert_not_called()
+        texts = [paragraph.text for paragraph in document.paragraphs]
+        self.assertIn("Test Name", texts)
+        self.assertIn("Onderwerp: Opzegging abonnement", texts[2])
+        self.assertEqual(document.paragraphs[1].alignment, WD_ALIGN_PARAGRAPH.RIGHT)
+
+    def test_word_document_renderer(self):
+        renderer = WordDocumentRenderer()
+        self.assertEqual(renderer.render(b"docx"), b"docx")
+        document = Document(BytesIO(renderer.render("<p>Rendered</p>")))
+        self.assertEqual(document.paragraphs[0].text, "Rendered")
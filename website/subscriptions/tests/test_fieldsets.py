@@ -0,0 +1,78 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from subscriptions.catalog import recheck_catalog
+from subscriptions.models import Subscription
+
+
+class SparseFieldsetTest(TestCase):
+    fixtures = ["subscriptions.json"]
+
+    def setUp(self):
+        recheck_catalog()
+
+    def get(self, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), queries
+
+    def test_fields(self):
+        data, queries = self.get(
+            reverse("v1:subscription_list"), {"fields": "name,id", "page_size": 2}
+        )
+        self.assertEqual(list(data["results"][0].keys()), ["id", "name"])
+        self.assertNotIn("explanation_field", queries[-1]["sql"])
+        self.assertNotIn("support_email", queries[-1]["sql"])
+
+    def test_presets(self):
+        data, _ = self.get(reverse("v1:subscription_list"), {"fields": "minimal,price"})
+        self.assertEqual(
+            list(data["results"][0].keys()), ["id", "name", "slug", "price"]
+        )
+        data, _ = self.get(reverse("v1:subscription_list"), {"fields": "full"})
+        self.assertEqual(len(data["results"][0]), 17)
+
+    def test_omit(self):
+        subscription = Subscription.objects.get(slug="new-york-times")
+        data, queries = self.get(
+            reverse("v1:subscription_retrieve", kwargs={"pk": subscription.pk}),
+            {"omit": "explanation_field"},
+        )
+        self.assertEqual(len(data), 16)
+        self.assertNotIn("explanation_field", queries[-1]["sql"])
+
+    def test_ordering_fields_are_loaded(self):
+        # Serializing does not load deferred fields one by one
+        with self.assertNumQueries(1):
+            data, queries = self.get(
+                reverse("v1:subscription_list"),
+                {
+                    "fields": "minimal",
+                    "ordering": "-amount_used",
+                    "cursor": "",
+                    "page_size": 3,
+                },
+            )
+        self.assertIn("amount_used", queries[0]["sql"])
+        response = self.client.get(data["next"])
+        self.assertEqual(response.status_code, 200)
+
+    def test_search(self):
+        data, _ = self.get(
+            reverse("v1:subscription_list"), {"q": "data", "fields": "minimal"}
+        )
+        self.assertEqual(
+            {x["slug"] for x in data["results"]}, {"t-mobile-data", "att-data"}
+        )
+        data, _ = self.get(
+            reverse("v1:subscription_fuzzy"), {"q": "gardian", "fields": "minimal"}
+        )
+        self.assertEqual(list(data["results"][0].keys()), ["id", "name", "slug"])
+
+    def test_unknown_field(self):
+        url = reverse("v1:subscription_list")
+        self.assertEqual(self.client.get(url, {"fields": "password"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"omit": "minimal"}).status_code, 400)
@@ -0,0 +1,96 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from subscriptions.fuzzy import (
+    fuzzy_search,
+    get_ngram_index,
+    get_trigrams,
+    normalize,
+    NGramIndex,
+)
+from subscriptions.catalog import recheck_catalog
+from subscriptions.models import Subscription, SubscriptionSearchTerm
+
+
+class NGramIndexTest(TestCase):
+    def setUp(self):
+        self.index = NGramIndex(
+            [
+                (1, "Netflix"),
+                (2, "Ziggo"),
+                (3, "Ziggo Sport Totaal"),
+                (4, "Spotify Premium"),
+                (4, "Muziek"),
+                (5, ""),
+            ]
+        )
+
+    def test_normalize(self):
+        self.assertEqual(normalize("  Café-Noir_bar!! "), "cafe noir bar")
+
+    def test_trigrams(self):
+        self.assertEqual(get_trigrams("Ab-c"), {"  a", " ab", "ab ", "  c", " c "})
+        self.assertEqual(get_trigrams("--"), set())
+
+    def test_search(self):
+        self.assertEqual(len(self.index), 5)
+        self.assertEqual(self.index.search("netflx", 5, threshold=0.3)[0][0], 1)
+        self.assertEqual(
+            [result for result, _ in self.index.search("zigo", 5, threshold=0.2)],
+            [2, 3],
+        )
+        self.assertEqual(self.index.search("muzik", 5, threshold=0.3)[0][0], 4)
+        self.assertEqual(self.index.search("Netflix", 1)[0], (1, 1.0))
+        self.assertEqual(self.index.search("xyz", 5), [])
+
+    def test_threshold_and_limit(self):
+        self.assertEqual(self.index.search("zigo", 5, threshold=0.9), [])
+        self.assertEqual(len(self.index.search("zigo", 1)), 1)
+
+    def test_budget(self):
+        # Without time left only the most selective trigram is counted
+        results = self.index.search("netflx", 5, budget=0)
+        self.assertEqual([result for result, _ in results], [1])
+        self.assertLess(results[0][1], self.index.search("netflx", 5)[0][1])
+
+
+class FuzzySearchTest(TestCase):
+    fixtures = ["subscriptions.json"]
+
+    def setUp(self):
+        recheck_catalog()
+
+    def test_fuzzy_search(self):
+        self.assertEqual(
+            [result for result, _ in fuzzy_search("lotery")],
+            [1, 2],
+        )
+        self.assertEqual(fuzzy_search("!!"), [])
+
+    def test_index_is_cleared(self):
+        index = get_ngram_index()
+        self.assertIs(get_ngram_index(), index)
+        SubscriptionSearchTerm.objects.create(name="Krant").subscription.add(10)
+        self.assertIsNot(get_ngram_index(), index)
+        self.assertEqual(fuzzy_search("krnt")[0][0], 10)
+
+        index = get_ngram_index()
+        subscription = Subscription.objects.get(id=11)
+        subscription.name = "Financial Times"
+        subscription.save()
+        self.assertIsNot(get_ngram_index(), index)
+
+    def test_index_follows_catalog(self):
+        index = get_ngram_index()
+        with self.settings(CATALOG_SNAPSHOT_MAX_AGE=-1):
+            self.assertIsNot(get_ngram_index(), index)
+
+    def test_api(self):
+        response = self.client.get(reverse("v1:subscription_fuzzy"), {"q": "gardian"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [subscription["name"] for subscription in response.json()["results"]],
+            ["The Guardian"],
+        )
+        response = self.client.get(reverse("v1:subscription_fuzzy"))
+        self.assertEqual(response.json(), {"results": []})
@@ -0,0 +1,105 @@
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+
+from subscriptions.catalog import recheck_catalog
+from subscriptions.leaderboard import (
+    get_leaderboard,
+    Leaderboard,
+    LeaderboardEntry,
+    update_leaderboards,
+)
+from subscriptions.models import Subscription, SubscriptionCategory
+from subscriptions.services import update_popularity
+
+
+class LeaderboardTest(TestCase):
+    fixtures = ["subscriptions.json"]
+
+    def setUp(self):
+        caches["shared"].clear()
+        caches["catalog_pages"].clear()
+        recheck_catalog()
+
+    def test_merge(self):
+        leaderboard = Leaderboard(
+            [
+                LeaderboardEntry(1, "A", "a", None, 5),
+                LeaderboardEntry(2, "B", "b", None, 3),
+            ],
+            2,
+        )
+        leaderboard.merge([LeaderboardEntry(2, "B", "b", None, 6)])
+        self.assertEqual([entry.id for entry in leaderboard.top(2)], [2, 1])
+        # A subscription that is not on the leaderboard pushes off the last entry
+        leaderboard.merge([LeaderboardEntry(3, "C", "c", None, 5)])
+        self.assertEqual([entry.id for entry in leaderboard.top(2)], [2, 1])
+        leaderboard.merge([LeaderboardEntry(3, "C", "c", None, 7)])
+        self.assertEqual([entry.id for entry in leaderboard.top(2)], [3, 2])
+
+    def test_get_leaderboard(self):
+        self.assertEqual(
+            [entry.id for entry in get_leaderboard().top(3)],
+            list(
+                Subscription.objects.order_by("-amount_used", "name").values_list(
+                    "id", flat=True
+                )[:3]
+            ),
+        )
+        with self.assertNumQueries(0):
+            get_leaderboard()
+
+        fitness = SubscriptionCategory.objects.get(slug="fitness")
+        self.assertEqual(
+            [entry.name for entry in get_leaderboard(fitness.id).top(2)],
+            ["Basic Fit Belgie", "Basic fit Netherlands"],
+        )
+
+    def test_update_leaderboards(self):
+        fitness = SubscriptionCategory.objects.get(slug="fitness")
+        get_leaderboard()
+        get_leaderboard(fitness.id)
+        Subscription.objects.filter(id=5).update(amount_used=10)
+        self.assertTrue(update_leaderboards([5]))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_leaderboard().top(1)[0].id, 5)
+            self.assertEqual(get_leaderboard(fitness.id).top(1)[0].id, 5)
+
+        Subscription.objects.filter(id=9).update(amount_used=2)
+        self.assertTrue(update_leaderboards([9]))
+        self.assertEqual([entry.id for entry in get_leaderboard().top(3)], [5, 10, 9])
+        # Subscriptions that keep their position do not change the top
+        self.assertFalse(update_leaderboards([10]))
+
+    def test_update_popularity_purges_popular_pages(self):
+        url = reverse("subscriptions:details_search")
+        self.client.get(url)
+        Subscription.objects.filter(id=5).update(amount_used=10)
+        with self.settings(CATALOG_VERSION_CHECK_INTERVAL=0):
+            update_popularity([5])
+            response = self.client.get(url)
+        self.assertEqual(response.context["top_subscriptions"][0].id, 5)
+
+    def test_top_api(self):
+        response = self.client.get(
+            reverse("v1:subscription_top"), data={"limit": 2}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [subscription["id"] for subscription in response.json()["results"]],
+            [10, 13],
+        )
+        self.assertEqual(response.json()["results"][0]["amount_used"], 6)
+
+        fitness = SubscriptionCategory.objects.get(slug="fitness")
+        response = self.client.get(
+            reverse("v1:subscription_top"), data={"category": fitness.id}
+        )
+        self.assertEqual(len(response.json()["results"]), 5)
+
+    def test_top_api_invalid_parameters(self):
+        url = reverse("v1:subscription_top")
+        self.assertEqual(self.client.get(url, data={"limit": 0}).status_code, 400)
+        self.assertEqual(self.client.get(url, data={"limit": 101}).status_code, 400)
+        self.assertEqual(self.client.get(url, data={"category": "a"}).status_code, 400)
+        self.assertEqual(self.client.get(url, data={"category": 1000}).status_code, 404)
@@ -1,17 +1,25 @@
-from django.test import TestCase
+import datetime
+
+from django.test import TestCase, override_settings
 
 from subscriptions.models import (
     Subscription,
     SubscriptionObject,
     SubscriptionCategory,
+    QueuedMailList,
+    DeregisterJob,
+    DeregistrationEvent,
     TEMPLATE_FILE_DIRECTORY,
 )
+from subscriptions.rollups import rollup_deregistrations
 from django.core.files import File
 from django.conf import settings
 import os
 import shutil
+from django.db import connection
 
-from mock import MagicMock
+from mock import MagicMock, patch
+from freezegun import freeze_time
 
 
 class SubscriptionObjectTest(TestCase):
@@ -250,6 +258,19 @@ class SubscriptionTest(TestCase):
         deregistered_subscription_1.deregistered()
         deregistered_subscription_1.deregistered()
         deregistered_subscription_1_created.deregistered()
+        self.assertEqual(
+            DeregistrationEvent.objects.filter(
+                subscription=deregistered_subscription_1
+            ).count(),
+            2,
+        )
+        rollup_deregistrations()
+        for subscription in [
+            deregistered_subscription_6,
+            deregistered_subscription_1,
+            deregistered_subscription_1_created,
+        ]:
+            subscription.refresh_from_db()
         self.assertEqual(deregistered_subscription_6.amount_used, 7)
         self.assertEqual(deregistered_subscription_1.amount_used, 3)
         self.assertEqual(deregistered_subscription_1_created.amount_used, 2)
@@ -321,3 +342,159 @@ class SubscriptionCategoryTest(TestCase):
                 SubscriptionCategory.objects.get(slug="basic-fit"),
             ],
         )
+
+    def test_get_family_tree_single_query(self):
+        category = SubscriptionCategory.objects.get(slug="multimedia")
+        with self.assertNumQueries(1):
+            category.get_family_tree()
+        category = SubscriptionCategory.objects.get(slug="netflix")
+        with self.assertNumQueries(1):
+            category.get_path_to_me()
+
+    def test_closure_after_move(self):
+        streaming = SubscriptionCategory.objects.get(slug="streaming")
+        streaming.category = SubscriptionCategory.objects.get(slug="fitness")
+        streaming.save()
+        self.assertEqual(
+            SubscriptionCategory.objects.get(slug="netflix").get_path_to_me(),
+            [
+                SubscriptionCategory.objects.get(slug="fitness"),
+                SubscriptionCategory.objects.get(slug="streaming"),
+                SubscriptionCategory.objects.get(slug="netflix"),
+            ],
+        )
+        self.assertNotIn(
+            SubscriptionCategory.objects.get(slug="netflix"),
+            SubscriptionCategory.objects.get(slug="multimedia").get_family_tree(),
+        )
+
+    def test_closure_after_delete(self):
+        SubscriptionCategory.objects.get(slug="streaming").delete()
+        self.assertEqual(
+            SubscriptionCategory.objects.get(slug="netflix").get_path_to_me(),
+            [SubscriptionCategory.objects.get(slug="netflix")],
+        )
+        self.assertCountEqual(
+            SubscriptionCategory.objects.get(slug="multimedia").get_family_tree(),
+            [
+                SubscriptionCategory.objects.get(slug="multimedia"),
+                SubscriptionCategory.objects.get(slug="verizon"),
+                SubscriptionCategory.objects.get(slug="t-mobile"),
+                SubscriptionCategory.objects.get(slug="att"),
+            ],
+        )
+
+    def test_top_category(self):
+        multimedia = SubscriptionCategory.objects.get(slug="multimedia")
+        self.assertCountEqual(
+            Subscription.top_category(multimedia, max_items=0),
+            Subscription.objects.filter(category__in=multimedia.get_family_tree()),
+        )
+
+    def test_top_per_top_level_category(self):
+        tops = Subscription.top_per_top_level_category(max_items=3)
+        for category in SubscriptionCategory.get_top_level_categories():
+            expected = list(
+                Subscription.top_category(category, max_items=0).order_by(
+                    "-amount_used", "name", "id"
+                )[:3]
+            )
+            self.assertEqual(tops.get(category.id, []), expected)
+
+    def test_top_per_top_level_category_without_window_functions(self):
+        with patch.object(connection.features, "supports_over_clause", False):
+            tops = Subscription.top_per_top_level_category(max_items=3)
+        for category in SubscriptionCategory.get_top_level_categories():
+            expected = list(
+                Subscription.top_category(category, max_items=0).order_by(
+                    "-amount_used", "name", "id"
+                )[:3]
+            )
+            self.assertEqual(tops.get(category.id, []), expected)
+
+
+class QueuedMailListTest(TestCase):
+    fixtures = ["subscriptions.json"]
+
+    def test_remove_expired(self):
+        subscriptions = [Subscription.objects.get(slug="new-york-times")]
+        with freeze_time("2022-01-01 12:00"):
+            expired = QueuedMailList.generate(
+                "Test", "", "test@test.com", "", "", "", subscriptions
+            )
+            queued = QueuedMailList.generate(
+                "Test", "", "test@test.com", "", "", "", subscriptions
+            )
+            DeregisterJob.enqueue(queued)
+            failed = QueuedMailList.generate(
+                "Test", "", "test@test.com", "", "", "", subscriptions
+            )
+            DeregisterJob.enqueue(failed).mark_failed("Failed", retry=False)
+        with freeze_time("2022-01-01 12:10"):
+            recent = QueuedMailList.generate(
+                "Test", "", "test@test.com", "", "", "", subscriptions
+            )
+        with freeze_time("2022-01-01 12:16"):
+            self.assertCountEqual(QueuedMailList.unexpired(), [recent])
+            self.assertEqual(QueuedMailList.remove_expired(), 2)
+        self.assertCountEqual(QueuedMailList.objects.all(), [queued, recent])
+        self.assertFalse(
+            QueuedMailList.item_list.through.objects.filter(
+                queuedmaillist_id=expired.id
+            ).exists()
+        )
+
+    @override_settings(DEREGISTER_JOB_RETENTION=datetime.timedelta(days=7))
+    def test_remove_expired_jobs(self):
+        with freeze_time("2022-01-01 12:00"):
+            jobs = [
+                DeregisterJob.enqueue(
+                    QueuedMailList.generate("Test", "", "test@test.com", "", "", "", [])
+                )
+                for _ in range(3)
+            ]
+            jobs[0].mark_succeeded()
+            jobs[1].mark_failed("Failed", retry=False)
+        with freeze_time("2022-01-08 11:00"):
+            self.assertEqual(DeregisterJob.remove_expired(), 0)
+        with freeze_time("2022-01-08 12:00"):
+            self.assertEqual(DeregisterJob.remove_expired(), 2)
+        self.assertCountEqual(DeregisterJob.objects.all(), [jobs[2]])
+
+    def test_generate(self):
+        subscriptions = list(Subscription.objects.order_by("id")[:3])
+        # One savepoint, one insert for the mail list and one for the subscriptions, release savepoint
+        with self.assertNumQueries(4):
+            mail_list = QueuedMailList.generate(
+                "Test",
+                "Name",
+                "test@test.com",
+                "Test address 1",
+                "1111AA",
+                "Test city",
+                subscriptions + [subscriptions[0]],
+            )
+        self.assertCountEqual(mail_list.item_list.all(), subscriptions)
+
+    def test_deregistered(self):
+        mail_list = QueuedMailList.generate(
+            "Test",
+            "Name",
+            "test@test.com",
+            "Test address 1",
+            "1111AA",
+            "Test city",
+            [
+                Subscription.objects.get(slug="new-york-times"),
+                Subscription.objects.get(slug="the-guardian"),
+            ],
+        )
+        with self.assertNumQueries(2):
+            self.assertEqual(mail_list.deregistered(), 2)
+        self.assertEqual(Subscription.objects.get(slug="new-york-times").amount_used, 6)
+        rollup_deregistrations()
+        self.assertEqual(Subscription.objects.get(slug="new-york-times").amount_used, 7)
+        self.assertEqual(Subscription.objects.get(slug="the-guardian").amount_used, 2)
+        self.assertEqual(
+            Subscription.objects.get(slug="basic-fit-belgie").amount_used, 1
+        )
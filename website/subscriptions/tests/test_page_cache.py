@@ -0,0 +1,188 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from django.views import View
+from freezegun import freeze_time
+
+from kanikervanaf.converters import clear_converter_cache
+from subscriptions.catalog import recheck_catalog
+from subscriptions.models import Subscription, SubscriptionCategory
+from subscriptions.page_cache import CachedCatalogPageMixin
+
+User = get_user_model()
+
+
+class CatalogPageCacheTest(TestCase):
+    fixtures = ["subscriptions.json"]
+
+    def setUp(self):
+        caches["catalog_pages"].clear()
+        clear_converter_cache()
+        recheck_catalog()
+
+    def get_urls(self):
+        return [
+            reverse("subscriptions:overview"),
+            reverse(
+                "subscriptions:overview_category",
+                kwargs={"category": SubscriptionCategory.objects.get(slug="fitness")},
+            ),
+            reverse(
+                "subscriptions:overview_category_page",
+                kwargs={
+                    "category": SubscriptionCategory.objects.get(slug="fitness"),
+                    "page": 1,
+                },
+            ),
+            reverse("subscriptions:details_search"),
+            reverse(
+                "subscriptions:details",
+                kwargs={
+                    "subscription": Subscription.objects.get(slug="new-york-times")
+                },
+            ),
+        ]
+
+    def test_anonymous_pages_are_cached(self):
+        for url in self.get_urls():
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotContains(response, "CSRF_TOKEN")
+            with self.assertNumQueries(0):
+                cached = self.client.get(url)
+            self.assertEqual(cached.content, response.content)
+
+    def test_fragments_are_cached(self):
+        for url in [
+            reverse("subscriptions:overview"),
+            reverse(
+                "subscriptions:overview_category",
+                kwargs={"category": SubscriptionCategory.objects.get(slug="fitness")},
+            ),
+            reverse(
+                "subscriptions:details",
+                kwargs={
+                    "subscription": Subscription.objects.get(slug="new-york-times")
+                },
+            ),
+        ]:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                # A new query string misses the page cache, the blocks on the page are served from the fragment cache
+                with self.assertNumQueries(0):
+                    uncached = self.client.get(url, {"x": 1})
+                self.assertEqual(uncached.status_code, 200)
+                self.assertEqual(uncached.content, response.content)
+
+    def test_missing_pages_are_not_cached(self):
+        url = reverse(
+            "subscriptions:overview_category_page",
+            kwargs={
+                "category": SubscriptionCategory.objects.get(slug="fitness"),
+                "page": 2,
+            },
+        )
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_authenticated_users_bypass_page_cache(self):
+        url = reverse(
+            "subscriptions:overview_category",
+            kwargs={"category": SubscriptionCategory.objects.get(slug="fitness")},
+        )
+        self.assertNotContains(self.client.get(url), "Mijn account")
+
+        User.objects.create_user("test", "test@test.com", "password")
+        self.client.login(username="test@test.com", password="password")
+        response = self.client.get(url)
+        self.assertContains(response, "Mijn account")
+        # The category block is the same for every visitor, it is served from the fragment cache
+        self.assertContains(response, "Fit for free France")
+
+    def test_pages_using_csrf_are_not_cached(self):
+        calls = []
+
+        class CsrfView(CachedCatalogPageMixin, View):
+            def get(self, request):
+                calls.append(request)
+                return HttpResponse(get_token(request))
+
+        request = RequestFactory().get("/csrf")
+        request.user = AnonymousUser()
+        CsrfView.as_view()(request)
+        request = RequestFactory().get("/csrf")
+        request.user = AnonymousUser()
+        CsrfView.as_view()(request)
+        self.assertEqual(len(calls), 2)
+
+    def test_subscription_change_purges_affected_pages(self):
+        fitness = reverse(
+            "subscriptions:overview_category",
+            kwargs={"category": SubscriptionCategory.objects.get(slug="fitness")},
+        )
+        t_mobile = reverse(
+            "subscriptions:overview_category",
+            kwargs={"category": SubscriptionCategory.objects.get(slug="t-mobile")},
+        )
+        details = reverse(
+            "subscriptions:details",
+            kwargs={"subscription": Subscription.objects.get(slug="new-york-times")},
+        )
+        with freeze_time("2026-10-18 12:00:00") as frozen_time:
+            for url in [fitness, t_mobile, details]:
+                self.client.get(url)
+            Subscription.objects.filter(id=5).update(name="Fit for free Paris")
+
+            frozen_time.tick(60)
+            subscription = Subscription.objects.get(id=8)
+            subscription.name = "T-Mobile bellen"
+            subscription.save()
+            frozen_time.tick(60)
+
+            # The fitness pages do not show the T-Mobile subscription, so they are still served from the cache
+            self.assertNotContains(self.client.get(fitness), "Fit for free Paris")
+            self.assertContains(self.client.get(t_mobile), "T-Mobile bellen")
+            # The subscription is in the list of most popular subscriptions
+            self.assertContains(self.client.get(details), "T-Mobile bellen")
+
+    def test_category_change_purges_affected_pages(self):
+        overview = reverse("subscriptions:overview")
+        basic_fit = reverse(
+            "subscriptions:overview_category",
+            kwargs={"category": SubscriptionCategory.objects.get(slug="basic-fit")},
+        )
+        details = reverse("subscriptions:details_search")
+        with freeze_time("2026-10-18 12:00:00") as frozen_time:
+            for url in [overview, basic_fit, details]:
+                self.client.get(url)
+            Subscription.objects.filter(id=1).update(name="Lottery America")
+
+            frozen_time.tick(60)
+            category = SubscriptionCategory.objects.get(slug="fitness")
+            category.name = "Sport"
+            category.save()
+            frozen_time.tick(60)
+
+            self.assertContains(self.client.get(overview), "Sport")
+            # Subcategories show the path to their ancestors
+            self.assertContains(self.client.get(basic_fit), "Sport")
+            self.assertNotContains(self.client.get(details), "Lottery America")
+
+    def test_purges_during_rendering_are_not_cached(self):
+        url = reverse(
+            "subscriptions:overview_category",
+            kwargs={"category": SubscriptionCategory.objects.get(slug="fitness")},
+        )
+        with freeze_time("2026-10-18 12:00:00") as frozen_time:
+            subscription = Subscription.objects.get(id=5)
+            subscription.name = "Fit for free Paris"
+            subscription.save()
+            # Other processes might still render the page from their previous catalog snapshot
+            self.client.get(url)
+            Subscription.objects.filter(id=5).update(name="Fit for free Lyon")
+            frozen_time.tick(60)
+            self.assertContains(self.client.get(url), "Fit for free Lyon")
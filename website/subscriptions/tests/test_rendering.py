@@ -0,0 +1,121 @@
+import threading
+from django.test import TestCase, override_settings
+from subscriptions import rendering
+from subscriptions.rendering import render_pdfs, shutdown_pool, BACKEND_POOL
+from subscriptions.services import create_deregister_letters, iter_deregister_letters
+from subscriptions.models import Subscription, QueuedMailList
+from PyPDF2 import PdfFileReader
+from io import BytesIO
+from docx import Document
+from mock import patch
+
+
+def _thread_names():
+    return [thread.name for thread in threading.enumerate()]
+
+
+class RenderingTest(TestCase):
+    fixtures = ["subscriptions.json"]
+
+    def tearDown(self):
+        shutdown_pool()
+
+    @staticmethod
+    def _extract_text(pdf):
+        return PdfFileReader(BytesIO(pdf)).pages[0].extract_text().replace("\n", "")
+
+    def test_render_pdfs_serial(self):
+        pdfs = render_pdfs(["<p>First</p>", "<p>Second</p>"])
+        self.assertEqual(len(pdfs), 2)
+        self.assertIn("First", self._extract_text(pdfs[0]))
+        self.assertIn("Second", self._extract_text(pdfs[1]))
+
+    @override_settings(PDF_RENDER_BACKEND=BACKEND_POOL, PDF_RENDER_WORKERS=2)
+    def test_render_pdfs_pool(self):
+        documents = ["<p>Letter {}</p>".format(i) for i in range(5)]
+        pdfs = render_pdfs(documents)
+        self.assertEqual(len(pdfs), 5)
+        for i, pdf in enumerate(pdfs):
+            self.assertIn("Letter {}".format(i), self._extract_text(pdf))
+
+    def test_render_pdfs_exception(self):
+        with patch(
+            "subscriptions.rendering.write_pdf", side_effect=[b"pdf", ValueError()]
+        ):
+            pdfs = render_pdfs(["<p>First</p>", "<p>Second</p>"])
+        self.assertEqual(pdfs[0], b"pdf")
+        self.assertIsInstance(pdfs[1], ValueError)
+
+    def test_pool_workers_exit_when_parent_dies(self):
+        with patch("subscriptions.rendering.os") as os, patch(
+            "subscriptions.rendering.time.sleep"
+        ) as sleep:
+            os.getppid.side_effect = [100, 100, 1]
+            rendering._watch_parent(100)
+        self.assertEqual(sleep.call_count, 2)
+        os._exit.assert_called_once_with(1)
+
+    @override_settings(PDF_RENDER_BACKEND=BACKEND_POOL, PDF_RENDER_WORKERS=2)
+    def test_pool_workers_watch_parent(self):
+        pool = rendering.get_pool()
+        self.assertEqual(
+            pool.submit(rendering.os.getppid).result(), rendering.os.getpid()
+        )
+        self.assertIn("watch-parent", pool.submit(_thread_names).result())
+
+    @override_settings(PDF_RENDER_BACKEND=BACKEND_POOL, PDF_RENDER_WORKERS=2)
+    def test_create_deregister_letters_pool(self):
+        queued_mail_list = QueuedMailList.generate(
+            "Test",
+            "Name",
+            "test@test.com",
+            "Test address 1",
+            "1111AA",
+            "Test city",
+            [
+                Subscription.objects.get(slug="basic-fit-belgie"),
+                Subscription.objects.get(slug="basic-fit-netherlands"),
+                Subscription.objects.get(slug="new-york-times"),
+            ],
+        )
+        succeeded, failed, pdfs = create_deregister_letters(queued_mail_list)
+        self.assertCountEqual(
+            succeeded,
+            [
+                Subscription.objects.get(slug="basic-fit-belgie"),
+                Subscription.objects.get(slug="basic-fit-netherlands"),
+            ],
+        )
+        self.assertEqual(failed, [Subscription.objects.get(slug="new-york-times")])
+        for pdf in pdfs:
+            self.assertIn(pdf["item"].name, self._extract_text(pdf["pdf"]))
+
+    @override_settings(PDF_RENDER_BACKEND=BACKEND_POOL, PDF_RENDER_WORKERS=2)
+    def test_iter_deregister_letters_docx_pool(self):
+        subscriptions = [
+            Subscription.objects.get(slug="basic-fit-belgie"),
+            Subscription.objects.get(slug="basic-fit-netherlands"),
+        ]
+        with patch(
+            "subscriptions.rendering.get_pool", wraps=rendering.get_pool
+        ) as get_pool:
+            letters = list(
+                iter_deregister_letters(
+                    {"firstname": "Test"},
+                    [subscription.pk for subscription in subscriptions],
+                    "docx",
+                )
+            )
+        get_pool.assert_called()
+        self.assertEqual(
+            [
+                (subscription_id, subscription)
+                for subscription_id, subscription, _ in letters
+            ],
+            [(subscription.pk, subscription) for subscription in subscriptions],
+        )
+        for _, subscription, letter in letters:
+            text = "".join(
+                paragraph.text for paragraph in Document(BytesIO(letter)).paragraphs
+            )
+            self.assertIn(subscription.name, text)
@@ -0,0 +1,173 @@
+import datetime
+from io import StringIO
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from freezegun import freeze_time
+
+from subscriptions.catalog import recheck_catalog
+from subscriptions.models import (
+    DeregistrationEvent,
+    DeregistrationRollup,
+    QueuedMailList,
+    Subscription,
+    SubscriptionCategory,
+)
+from subscriptions.rollups import get_trending, rollup_deregistrations
+
+
+class RollupTest(TestCase):
+    fixtures = ["subscriptions.json"]
+
+    def setUp(self):
+        caches["shared"].clear()
+        caches["catalog_pages"].clear()
+        recheck_catalog()
+
+    def deregister(self, *slugs):
+        mail_list = QueuedMailList.generate(
+            "Test",
+            "Name",
+            "test@test.com",
+            "Test address 1",
+            "1111AA",
+            "Test city",
+            [Subscription.objects.get(slug=slug) for slug in slugs],
+        )
+        mail_list.deregistered()
+
+    def get_rollups(self, period):
+        return list(
+            DeregistrationRollup.objects.filter(period=period)
+            .order_by("start", "subscription_id")
+            .values_list("subscription_id", "start", "count")
+        )
+
+    def test_rollup(self):
+        with freeze_time("2026-10-18 10:15:00"):
+            self.deregister("new-york-times", "the-guardian")
+            self.deregister("new-york-times")
+        with freeze_time("2026-10-18 11:05:00"):
+            self.deregister("new-york-times")
+            self.assertEqual(rollup_deregistrations(), {10: 3, 11: 1})
+
+        hour = datetime.datetime(2026, 10, 18, 10, tzinfo=datetime.timezone.utc)
+        day = timezone.localtime(hour).replace(hour=0)
+        self.assertEqual(
+            self.get_rollups(DeregistrationRollup.PERIOD_HOUR),
+            [
+                (10, hour, 2),
+                (11, hour, 1),
+                (10, hour + datetime.timedelta(hours=1), 1),
+            ],
+        )
+        self.assertEqual(
+            self.get_rollups(DeregistrationRollup.PERIOD_DAY),
+            [(10, day, 3), (11, day, 1)],
+        )
+        self.assertEqual(Subscription.objects.get(id=10).amount_used, 9)
+        self.assertEqual(Subscription.objects.get(id=11).amount_used, 2)
+
+    def test_rollup_again(self):
+        with freeze_time("2026-10-18 10:15:00"):
+            self.deregister("new-york-times")
+            rollup_deregistrations()
+            self.assertEqual(rollup_deregistrations(), {})
+        # An event of a transaction that committed after the previous rollup
+        DeregistrationEvent.objects.create(
+            subscription_id=10,
+            created=datetime.datetime(
+                2026, 10, 18, 10, 10, tzinfo=datetime.timezone.utc
+            ),
+        )
+        with freeze_time("2026-10-18 10:20:00"):
+            self.assertEqual(rollup_deregistrations(), {10: 1})
+        self.assertEqual(Subscription.objects.get(id=10).amount_used, 8)
+        self.assertEqual(
+            [
+                count
+                for _, _, count in self.get_rollups(DeregistrationRollup.PERIOD_DAY)
+            ],
+            [2],
+        )
+
+    def test_retention(self):
+        with freeze_time("2026-10-01 10:15:00"):
+            self.deregister("new-york-times")
+            rollup_deregistrations()
+        with freeze_time("2026-10-18 10:15:00"):
+            self.deregister("new-york-times")
+            self.assertEqual(rollup_deregistrations(), {10: 1})
+        self.assertEqual(DeregistrationEvent.objects.count(), 1)
+        self.assertEqual(len(self.get_rollups(DeregistrationRollup.PERIOD_HOUR)), 1)
+        self.assertEqual(len(self.get_rollups(DeregistrationRollup.PERIOD_DAY)), 2)
+        self.assertEqual(Subscription.objects.get(id=10).amount_used, 8)
+
+    def test_trending(self):
+        with freeze_time("2026-10-10 10:15:00"):
+            self.deregister("new-york-times", "basic-fit-belgie")
+            self.deregister("new-york-times")
+            rollup_deregistrations()
+        with freeze_time("2026-10-17 10:15:00"):
+            self.deregister("the-guardian", "basic-fit-belgie")
+            self.deregister("the-guardian")
+            rollup_deregistrations()
+        with freeze_time("2026-10-18 10:15:00"):
+            self.deregister("basic-fit-belgie")
+            rollup_deregistrations()
+            self.assertEqual(
+                [(entry.id, entry.deregistrations) for entry in get_trending()],
+                [(7, 2), (11, 2)],
+            )
+            fitness = SubscriptionCategory.objects.get(slug="fitness")
+            self.assertEqual(
+                [entry.id for entry in get_trending(fitness.id, limit=1)], [7]
+            )
+            with self.assertNumQueries(0):
+                get_trending()
+
+            response = self.client.get(
+                reverse("v1:subscription_trending"), data={"limit": 1}
+            )
+            self.assertEqual(
+                response.json()["results"],
+                [
+                    {
+                        "id": 7,
+                        "name": "Basic Fit Belgie",
+                        "slug": "basic-fit-belgie",
+                        "category": 8,
+                        "deregistrations": 2,
+                    }
+                ],
+            )
+            self.assertContains(
+                self.client.get(reverse("subscriptions:details_search")),
+                "Trending deze week",
+            )
+
+            # Rolling up new deregistrations invalidates the cached rankings
+            self.deregister("the-guardian")
+            rollup_deregistrations()
+            self.assertEqual(
+                [(entry.id, entry.deregistrations) for entry in get_trending()],
+                [(11, 3), (7, 2)],
+            )
+
+    def test_command_updates_popular_pages(self):
+        url = reverse("subscriptions:details_search")
+        with freeze_time("2026-10-18 10:15:00"):
+            self.client.get(url)
+            for _ in range(6):
+                self.deregister("basic-fit-belgie")
+            out = StringIO()
+            call_command("rollup_deregistrations", stdout=out)
+            self.assertEqual(
+                out.getvalue(), "Rolled up 6 deregistration(s) of 1 subscription(s).\n"
+            )
+            response = self.client.get(url)
+        self.assertEqual(response.context["top_subscriptions"][0].id, 7)
+        self.assertEqual(response.context["trending_subscriptions"][0].id, 7)
@@ -0,0 +1,181 @@
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from io import StringIO
+from mock import patch
+
+from subscriptions.models import (
+    Subscription,
+    SubscriptionSearchDocument,
+    SubscriptionSearchTerm,
+)
+from subscriptions.search import (
+    get_query_tokens,
+    get_search_backend,
+    search_subscriptions,
+    SEARCH_BACKEND_SQLITE_FTS5,
+)
+
+
+class SubscriptionSearchDocumentTest(TestCase):
+    fixtures = ["subscriptions.json"]
+
+    def _document(self, subscription_id):
+        return SubscriptionSearchDocument.objects.get(subscription_id=subscription_id)
+
+    def test_documents_are_created(self):
+        self.assertEqual(
+            SubscriptionSearchDocument.objects.count(), Subscription.objects.count()
+        )
+        self.assertEqual(self._document(10).name, "New York Times")
+        self.assertEqual(self._document(10).terms, "")
+
+    def test_subscription_renamed(self):
+        subscription = Subscription.objects.get(id=10)
+        subscription.name = "NY Times"
+        subscription.save()
+        self.assertEqual(self._document(10).name, "NY Times")
+
+    def test_search_terms_changed(self):
+        term = SubscriptionSearchTerm.objects.create(name="newspaper")
+        term.subscription.add(10, 11)
+        self.assertEqual(self._document(10).terms, "newspaper")
+        self.assertEqual(self._document(11).terms, "newspaper")
+
+        Subscription.objects.get(id=11).subscriptionsearchterm_set.add(
+            SubscriptionSearchTerm.objects.create(name="british")
+        )
+        self.assertEqual(self._document(11).terms, "british newspaper")
+
+        term.name = "paper"
+        term.save()
+        self.assertEqual(self._document(10).terms, "paper")
+
+        term.subscription.remove(10)
+        self.assertEqual(self._document(10).terms, "")
+
+        term.subscription.clear()
+        self.assertEqual(self._document(11).terms, "british")
+
+        term.subscription.add(10)
+        term.delete()
+        self.assertEqual(self._document(10).terms, "")
+
+    def test_subscription_deleted(self):
+        Subscription.objects.get(id=10).delete()
+        self.assertFalse(
+            SubscriptionSearchDocument.objects.filter(subscription_id=10).exists()
+        )
+        self.assertEqual(list(search_subscriptions("york")), [])
+
+    def test_rebuild_command(self):
+        SubscriptionSearchDocument.objects.all().delete()
+        out = StringIO()
+        call_command("rebuild_search_index", stdout=out)
+        self.assertEqual(out.getvalue(), "Rebuilt {} search document(s).\n".format(13))
+        self.assertEqual(
+            [subscription.id for subscription in search_subscriptions("york")], [10]
+        )
+
+
+class SearchSubscriptionsTest(TestCase):
+    fixtures = ["subscriptions.json"]
+
+    def _search(self, query, queryset=None):
+        return [
+            subscription.name for subscription in search_subscriptions(query, queryset)
+        ]
+
+    def test_backend(self):
+        self.assertEqual(
+            get_search_backend(Subscription.objects.all()), SEARCH_BACKEND_SQLITE_FTS5
+        )
+
+    def test_query_tokens(self):
+        self.assertEqual(get_query_tokens('AT&T "data" OR'), ["at", "t", "data", "or"])
+        self.assertEqual(get_query_tokens("* - ()"), [])
+
+    def test_search(self):
+        self.assertEqual(self._search("fit netherlands belgium"), [])
+        self.assertEqual(
+            self._search("free fit"),
+            [
+                "Fit for free Belgium",
+                "Fit for free France",
+                "Fit for free Netherlands",
+            ],
+        )
+        self.assertEqual(
+            self._search("nether"),
+            ["Basic fit Netherlands", "Fit for free Netherlands"],
+        )
+        self.assertEqual(self._search("AT&T data"), ["AT&T data"])
+        self.assertEqual(self._search("belgië"), ["Basic Fit Belgie"])
+        self.assertEqual(self._search("-"), [])
+
+    def test_search_terms(self):
+        SubscriptionSearchTerm.objects.create(name="Krant").subscription.add(10, 11)
+        self.assertEqual(self._search("kran"), ["New York Times", "The Guardian"])
+
+    def test_name_ranks_above_search_terms(self):
+        SubscriptionSearchTerm.objects.create(name="Lottery").subscription.add(10)
+        self.assertEqual(
+            self._search("lottery"),
+            ["Lottery USA", "Green card lottery", "New York Times"],
+        )
+
+    def test_popularity(self):
+        Subscription.objects.filter(id=5).update(amount_used=1000)
+        self.assertEqual(self._search("fit for free")[0], "Fit for free France")
+
+    def test_queryset(self):
+        self.assertEqual(
+            self._search("fit", Subscription.objects.filter(category=8)),
+            ["Basic Fit Belgie", "Basic fit Netherlands"],
+        )
+
+    @override_settings(SEARCH_MAX_RESULTS=1)
+    def test_results_are_limited_after_filtering_and_ranking(self):
+        results = self._search("fit", Subscription.objects.exclude(category=8))
+        self.assertEqual(len(results), 1)
+        self.assertTrue(results[0].startswith("Fit for free"))
+        SubscriptionSearchTerm.objects.create(name="Lottery").subscription.add(10)
+        Subscription.objects.filter(id=10).update(amount_used=100000)
+        self.assertEqual(self._search("lottery"), ["New York Times"])
+
+    def test_fallback(self):
+        Subscription.objects.filter(id=1).update(amount_used=10)
+        with patch("subscriptions.search.get_search_backend", return_value=None):
+            self.assertEqual(
+                self._search("lott"), ["Lottery USA", "Green card lottery"]
+            )
+            self.assertEqual(
+                self._search("fit free"),
+                [
+                    "Fit for free Belgium",
+                    "Fit for free France",
+                    "Fit for free Netherlands",
+                ],
+            )
+
+
+class SubscriptionSearchAPITest(TestCase):
+    fixtures = ["subscriptions.json"]
+
+    def _names(self, params):
+        response = self.client.get(reverse("v1:subscription_list"), params)
+        self.assertEqual(response.status_code, 200)
+        return [subscription["name"] for subscription in response.json()["results"]]
+
+    def test_search(self):
+        Subscription.objects.filter(id=9).update(amount_used=100)
+        self.assertEqual(self._names({"q": "data"}), ["T-Mobile data", "AT&T data"])
+        self.assertEqual(
+            self._names({"q": "data", "ordering": "name"}),
+            ["AT&T data", "T-Mobile data"],
+        )
+        self.assertEqual(
+            self._names({"q": "fit", "category": 8}),
+            ["Basic Fit Belgie", "Basic fit Netherlands"],
+        )
+        self.assertEqual(len(self._names({"q": " "})), 13)
@@ -1,4 +1,5 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.template import Context
 from django.template.exceptions import TemplateSyntaxError
 from subscriptions.services import (
     render_string,
@@ -10,14 +11,32 @@ from subscriptions.services import (
     send_summary_email,
     create_deregister_letters,
     get_file_contents,
+    run_deregister_jobs,
+    get_compiled_template,
+    clear_compiled_templates,
+    render_deregister_email,
+    get_deregister_artifact,
+    get_deregister_artifact_digest,
+    ARTIFACT_FORMAT_PDF,
+    ARTIFACT_FORMAT_TEXT,
+    render_deregister_letter_docx,
+    handle_deregister_request,
 )
-from subscriptions.models import Subscription, QueuedMailList
+from subscriptions.models import Subscription, QueuedMailList, DeregisterJob
+from subscriptions.docx_rendering import convert_pdf_to_docx
+from subscriptions.archives import stream_zip
+import zipfile
 from PyPDF2 import PdfFileReader
 from io import BytesIO
 from freezegun import freeze_time
 import datetime
+import os
 import tempfile
 from django.core import mail
+from outbox.services import send_queued_messages
+from django.core.cache import caches
+from mock import patch
+from docx import Document
 
 
 class SubscriptionServices(TestCase):
@@ -108,6 +127,7 @@ class SubscriptionServices(TestCase):
         self.assertTrue(
             send_verification_email(test_name, test_email, test_verification_url)
         )
+        send_queued_messages()
         self.assertEqual(len(mail.outbox), 1)
         self.assertCountEqual(mail.outbox[0].to, ["test@test.com"])
 
@@ -154,6 +174,7 @@ class SubscriptionServices(TestCase):
                 queued_mail_list,
             )
         )
+        send_queued_messages()
         self.assertEqual(len(mail.outbox), 1)
         self.assertCountEqual(mail.outbox[0].to, ["test@test.com"])
         self.assertEqual(len(mail.outbox[0].attachments), 2)
@@ -199,20 +220,20 @@ class SubscriptionServices(TestCase):
                 Subscription.objects.get(slug="the-guardian").id,
             ]
         ]
-        self.assertIsInstance(
-            handle_verification_request(
-                {
-                    "first_name": "First name test",
-                    "second_name": "Second name test",
-                    "email": "test@test.com",
-                    "address": "Test address",
-                    "postal_code": "1111AA",
-                    "residence": "Test city",
-                },
-                test_deregister_subscriptions,
-            ),
-            QueuedMailList,
+        mail_list, selection = handle_verification_request(
+            {
+                "first_name": "First name test",
+                "second_name": "Second name test",
+                "email": "test@test.com",
+                "address": "Test address",
+                "postal_code": "1111AA",
+                "residence": "Test city",
+            },
+            test_deregister_subscriptions + [{"id": 999999}],
         )
+        self.assertIsInstance(mail_list, QueuedMailList)
+        self.assertEqual(selection.unknown_ids, [999999])
+        self.assertEqual(selection.truncated_ids, [])
         self.assertFalse(
             handle_verification_request(
                 {
@@ -223,7 +244,7 @@ class SubscriptionServices(TestCase):
                     "residence": "Test city",
                 },
                 test_deregister_subscriptions,
-            )
+            )[0]
         )
         self.assertFalse(
             handle_verification_request(
@@ -235,7 +256,7 @@ class SubscriptionServices(TestCase):
                     "residence": "Test city",
                 },
                 test_deregister_subscriptions,
-            )
+            )[0]
         )
 
     def test_store_subscription_list(self):
@@ -246,10 +267,32 @@ class SubscriptionServices(TestCase):
         ]
         test_subscription_items_list = [{"id": x.id} for x in test_subscription_list]
         self.assertCountEqual(
-            store_subscription_list(test_subscription_items_list),
+            store_subscription_list(test_subscription_items_list).subscriptions,
             set(test_subscription_list),
         )
 
+    def test_store_subscription_list_queries(self):
+        subscriptions = list(Subscription.objects.order_by("id")[:3])
+        items = [{"id": x.id} for x in subscriptions]
+        items += [{"id": str(subscriptions[0].id)}, {"id": 999999}, {"id": "a"}, {}]
+        with self.assertNumQueries(1), self.assertLogs(
+            "subscriptions.services", level="WARNING"
+        ) as logs:
+            selection = store_subscription_list(items)
+        self.assertEqual(selection.subscriptions, set(subscriptions))
+        self.assertEqual(selection.unknown_ids, [999999])
+        self.assertEqual(selection.truncated_ids, [])
+        self.assertIn("999999", logs.output[0])
+        self.assertEqual(store_subscription_list("not a list"), (set(), [], []))
+
+    @override_settings(MAX_SUBSCRIPTIONS_PER_REQUEST=2)
+    def test_store_subscription_list_maximum(self):
+        subscriptions = list(Subscription.objects.order_by("id")[:3])
+        selection = store_subscription_list([{"id": x.id} for x in subscriptions])
+        self.assertEqual(selection.subscriptions, set(subscriptions[:2]))
+        self.assertEqual(selection.unknown_ids, [])
+        self.assertEqual(selection.truncated_ids, [subscriptions[2].id])
+
     def test_get_file_contents(self):
         test_content = "This is test content for a file."
         temporary_file = tempfile.NamedTemporaryFile(mode="w")
@@ -258,3 +301,275 @@ class SubscriptionServices(TestCase):
 
         read_content = get_file_contents(temporary_file.name)
         self.assertEqual(test_content, read_content)
+
+    def test_get_compiled_template(self):
+        clear_compiled_templates()
+        temporary_file = tempfile.NamedTemporaryFile(mode="w", suffix=".txt")
+        temporary_file.write("Hello {{ name }}")
+        temporary_file.flush()
+
+        with patch(
+            "subscriptions.services.get_file_contents", wraps=get_file_contents
+        ) as get_file_contents_mock:
+            template = get_compiled_template(temporary_file.name)
+            self.assertIs(get_compiled_template(temporary_file.name), template)
+            get_file_contents_mock.assert_called_once()
+
+            temporary_file.seek(0)
+            temporary_file.write("Goodbye {{ name }}")
+            temporary_file.flush()
+            stat = os.stat(temporary_file.name)
+            os.utime(
+                temporary_file.name, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9)
+            )
+            recompiled = get_compiled_template(temporary_file.name)
+            self.assertIsNot(recompiled, template)
+            self.assertEqual(get_file_contents_mock.call_count, 2)
+
+            clear_compiled_templates()
+            self.assertIsNot(get_compiled_template(temporary_file.name), recompiled)
+            self.assertEqual(get_file_contents_mock.call_count, 3)
+
+    def test_get_compiled_template_missing_file(self):
+        self.assertEqual(
+            get_compiled_template("/non/existing/template.txt").render(Context({})),
+            "There was an error rendering the template file",
+        )
+
+    def test_render_deregister_email_uses_compiled_template(self):
+        clear_compiled_templates()
+        subscription = Subscription.objects.get(slug="basic-fit-belgie")
+        with patch(
+            "subscriptions.services.get_file_contents", wraps=get_file_contents
+        ) as get_file_contents_mock:
+            first = render_deregister_email({"firstname": "Test"}, subscription)
+            second = render_deregister_email({"firstname": "Test"}, subscription)
+        self.assertEqual(first, second)
+        get_file_contents_mock.assert_called_once()
+
+    def test_get_deregister_artifact_digest(self):
+        subscription = Subscription.objects.get(slug="basic-fit-belgie")
+        context = {"firstname": "Test", "lastname": "Name"}
+        digest = get_deregister_artifact_digest(
+            context, subscription, ARTIFACT_FORMAT_PDF
+        )
+        self.assertEqual(
+            digest,
+            get_deregister_artifact_digest(
+                {"lastname": "Name", "firstname": "Test"},
+                subscription,
+                ARTIFACT_FORMAT_PDF,
+            ),
+        )
+        self.assertNotEqual(
+            digest,
+            get_deregister_artifact_digest(context, subscription, ARTIFACT_FORMAT_TEXT),
+        )
+        self.assertNotEqual(
+            digest,
+            get_deregister_artifact_digest(
+                {"firstname": "Other", "lastname": "Name"},
+                subscription,
+                ARTIFACT_FORMAT_PDF,
+            ),
+        )
+        subscription.support_reply_number = ""
+        subscription.correspondence_address = "Other address 1"
+        self.assertNotEqual(
+            digest,
+            get_deregister_artifact_digest(context, subscription, ARTIFACT_FORMAT_PDF),
+        )
+
+    def test_get_deregister_artifact(self):
+        caches["rendered_artifacts"].clear()
+        subscription = Subscription.objects.get(slug="basic-fit-belgie")
+        with patch(
+            "subscriptions.services.render_deregister_letter_pdf",
+            return_value=b"%PDF-rendered",
+        ) as render_mock:
+            self.assertEqual(
+                get_deregister_artifact(
+                    {"firstname": "Test"}, subscription, ARTIFACT_FORMAT_PDF
+                ),
+                b"%PDF-rendered",
+            )
+            self.assertEqual(
+                get_deregister_artifact(
+                    {"firstname": "Test"}, subscription, ARTIFACT_FORMAT_PDF
+                ),
+                b"%PDF-rendered",
+            )
+            render_mock.assert_called_once()
+            with override_settings(RENDERED_ARTIFACT_MAX_SIZE=1):
+                get_deregister_artifact(
+                    {"firstname": "Other"}, subscription, ARTIFACT_FORMAT_PDF
+                )
+                get_deregister_artifact(
+                    {"firstname": "Other"}, subscription, ARTIFACT_FORMAT_PDF
+                )
+            self.assertEqual(render_mock.call_count, 3)
+
+    def test_render_deregister_letter_docx(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(DOCX_SCRATCH_DIRECTORY=directory):
+                docx = render_deregister_letter_docx(
+                    {"firstname": "Test", "lastname": "Name"},
+                    Subscription.objects.get(slug="basic-fit-belgie"),
+                )
+            self.assertEqual(os.listdir(directory), [])
+        text = " ".join(
+            paragraph.text for paragraph in Document(BytesIO(docx)).paragraphs
+        )
+        self.assertIn("Test", text)
+
+    def test_convert_pdf_to_docx_cleans_up_on_failure(self):
+        pdf = render_string_to_pdf("<p>Test</p>", {})
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(DOCX_SCRATCH_DIRECTORY=directory), patch(
+                "subscriptions.docx_rendering.Converter.convert",
+                side_effect=Exception("Conversion failed"),
+            ):
+                with self.assertRaises(Exception):
+                    convert_pdf_to_docx(pdf)
+            self.assertEqual(os.listdir(directory), [])
+
+    def test_handle_deregister_request_uses_one_connection(self):
+        Subscription.objects.filter(
+            slug__in=["basic-fit-belgie", "new-york-times"]
+        ).update(support_email="support@test.com")
+        queued_mail_list = QueuedMailList.generate(
+            "Test",
+            "Name",
+            "test@test.com",
+            "Test address 1",
+            "1111AA",
+            "Test city",
+            [
+                Subscription.objects.get(slug="basic-fit-belgie"),
+                Subscription.objects.get(slug="new-york-times"),
+                Subscription.objects.get(slug="the-guardian"),
+            ],
+        )
+        with patch(
+            "kanikervanaf.mail.get_connection", wraps=mail.get_connection
+        ) as get_connection:
+            self.assertTrue(handle_deregister_request(queued_mail_list))
+        get_connection.assert_called_once()
+        self.assertEqual(len(mail.outbox), 2)
+        send_queued_messages()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[-1].subject, "Kanikervanaf.nl: Mails verzonden")
+
+    def test_stream_zip(self):
+        def files():
+            yield "first.txt", b"First"
+            yield "second.txt", b"Second"
+
+        chunks = list(stream_zip(files()))
+        self.assertEqual(len(chunks), 3)
+        self.assertTrue(chunks[0].startswith(b"PK"))
+        archive = zipfile.ZipFile(BytesIO(b"".join(chunks)))
+        self.assertEqual(archive.read("first.txt"), b"First")
+        self.assertEqual(archive.read("second.txt"), b"Second")
+
+    def test_run_deregister_jobs(self):
+        queued_mail_list = QueuedMailList.generate(
+            "Test",
+            "Name",
+            "test@test.com",
+            "Test address 1",
+            "1111AA",
+            "Test city",
+            [
+                Subscription.objects.get(slug="basic-fit-belgie"),
+                Subscription.objects.get(slug="new-york-times"),
+            ],
+        )
+        job = DeregisterJob.enqueue(queued_mail_list)
+        self.assertEqual(DeregisterJob.enqueue(queued_mail_list), job)
+        self.assertEqual(run_deregister_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, DeregisterJob.STATUS_SUCCEEDED)
+        self.assertIsNotNone(job.duration)
+        self.assertIsNone(job.mail_list)
+        self.assertFalse(QueuedMailList.objects.filter(pk=queued_mail_list.pk).exists())
+        self.assertEqual(run_deregister_jobs(), 0)
+
+    @override_settings(DEREGISTER_JOB_MAX_ATTEMPTS=2, DEREGISTER_JOB_RETRY_DELAY=0)
+    def test_run_deregister_jobs_retries(self):
+        queued_mail_list = QueuedMailList.generate(
+            "Test",
+            "Name",
+            "test@test.com",
+            "Test address 1",
+            "1111AA",
+            "Test city",
+            [Subscription.objects.get(slug="basic-fit-belgie")],
+        )
+        job = DeregisterJob.enqueue(queued_mail_list)
+        with patch(
+            "subscriptions.services.handle_deregister_request",
+            side_effect=Exception("Connection refused"),
+        ):
+            self.assertEqual(run_deregister_jobs(max_jobs=1), 1)
+            job.refresh_from_db()
+            self.assertEqual(job.status, DeregisterJob.STATUS_QUEUED)
+            self.assertEqual(job.last_error, "Connection refused")
+            self.assertEqual(run_deregister_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, DeregisterJob.STATUS_FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(len(mail.outbox), 0)
+
+    @override_settings(DEREGISTER_JOB_RETRY_DELAY=0)
+    def test_run_deregister_jobs_does_not_resend_emails(self):
+        Subscription.objects.filter(slug="new-york-times").update(
+            support_email="support@nyt.com"
+        )
+        queued_mail_list = QueuedMailList.generate(
+            "Test",
+            "Name",
+            "test@test.com",
+            "Test address 1",
+            "1111AA",
+            "Test city",
+            [
+                Subscription.objects.get(slug="att-data"),
+                Subscription.objects.get(slug="new-york-times"),
+            ],
+        )
+        job = DeregisterJob.enqueue(queued_mail_list)
+        with patch(
+            "subscriptions.services.send_summary_email",
+            side_effect=Exception("Database is locked"),
+        ):
+            self.assertEqual(run_deregister_jobs(max_jobs=1), 1)
+        self.assertEqual(len(mail.outbox), 2)
+        job.refresh_from_db()
+        self.assertEqual(job.status, DeregisterJob.STATUS_QUEUED)
+        self.assertEqual(job.sent_items.count(), 2)
+        self.assertTrue(QueuedMailList.objects.filter(pk=queued_mail_list.pk).exists())
+
+        self.assertEqual(run_deregister_jobs(), 1)
+        self.assertEqual(len(mail.outbox), 2)
+        job.refresh_from_db()
+        self.assertEqual(job.status, DeregisterJob.STATUS_SUCCEEDED)
+        send_queued_messages()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertIn("New York Times", mail.outbox[2].body)
+
+    @override_settings(DEREGISTER_JOB_MAX_ATTEMPTS=2, DEREGISTER_JOB_TIMEOUT=60)
+    def test_abandoned_jobs_are_claimed_until_out_of_attempts(self):
+        queued_mail_list = QueuedMailList.generate(
+            "Test", "", "test@test.com", "", "", "", []
+        )
+        with freeze_time("2022-01-01 12:00"):
+            job = DeregisterJob.enqueue(queued_mail_list)
+            self.assertEqual(DeregisterJob.claim_next(), job)
+        with freeze_time("2022-01-01 12:01:01"):
+            self.assertEqual(DeregisterJob.claim_next(), job)
+        with freeze_time("2022-01-01 12:02:02"):
+            self.assertIsNone(DeregisterJob.claim_next())
+        job.refresh_from_db()
+        self.assertEqual(job.status, DeregisterJob.STATUS_FAILED)
+        self.assertEqual(job.attempts, 2)
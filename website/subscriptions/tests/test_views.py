@@ -1,10 +1,23 @@
+import json
 import urllib.parse
+import zipfile
+from io import BytesIO
+from io import StringIO
 
 from django.urls import reverse
 from django.core import mail
-from django.test import TestCase
+from outbox.services import send_queued_messages
+from django.core.cache import caches
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
-from subscriptions.models import SubscriptionCategory, Subscription, QueuedMailList
+from django.core.management import call_command
+from mock import patch
+from subscriptions.models import (
+    SubscriptionCategory,
+    Subscription,
+    QueuedMailList,
+    DeregisterJob,
+)
 
 User = get_user_model()
 
@@ -83,6 +96,27 @@ class SubscriptionViews(TestCase):
             response_accepted.url, reverse("subscriptions:verification_send_succeeded")
         )
 
+    @override_settings(MAX_SUBSCRIPTIONS_PER_REQUEST=2)
+    def test_send_view_reports_ignored_subscriptions(self):
+        self.client.cookies["subscription_details"] = urllib.parse.quote(
+            '{"first_name": "something", "email": "something@something.com"}'
+        )
+        first = Subscription.objects.get(slug="basic-fit-belgie")
+        second = Subscription.objects.get(slug="new-york-times")
+        self.client.cookies["subscription_items"] = urllib.parse.quote(
+            json.dumps([{"id": first.id}, {"id": 999999}, {"id": second.id}])
+        )
+        response = self.client.get(reverse("subscriptions:send"), follow=True)
+        self.assertEqual(
+            response.redirect_chain[-1][0],
+            reverse("subscriptions:verification_send_succeeded"),
+        )
+        self.assertContains(response, "niet opgezegd: 999999.")
+        self.assertContains(
+            response, "maximaal 2 abonnementen tegelijk opgezegd worden"
+        )
+        self.assertContains(response, "niet opgezegd: {}.".format(second.id))
+
     def test_request_view(self):
         response = self.client.get(reverse("subscriptions:request"), follow=True)
         self.assertEqual(response.status_code, 200)
@@ -95,6 +129,7 @@ class SubscriptionViews(TestCase):
             },
         )
         self.assertEqual(response_post.status_code, 200)
+        send_queued_messages()
         self.assertEqual(len(mail.outbox), 1)
 
     def test_details_search_view(self):
@@ -146,6 +181,173 @@ class SubscriptionViews(TestCase):
         )
         self.assertEqual(response_exists.status_code, 200)
 
+    def test_verify_view_queues_job(self):
+        generated_mail_list = QueuedMailList.generate(
+            "First name",
+            "Second name",
+            "something@something.com",
+            "Test address 1",
+            "1111AA",
+            "Somewhere",
+            [Subscription.objects.get(slug="basic-fit-netherlands")],
+        )
+        verify_url = reverse(
+            "subscriptions:verify", kwargs={"token": generated_mail_list.token}
+        )
+        status_url = reverse(
+            "subscriptions:verify_status", kwargs={"token": generated_mail_list.token}
+        )
+        response = self.client.get(verify_url)
+        self.assertTemplateUsed(response, "subscriptions/deregister_status.html")
+        self.assertEqual(len(mail.outbox), 0)
+        self.client.get(verify_url)
+        self.assertEqual(DeregisterJob.objects.count(), 1)
+        self.assertEqual(
+            self.client.get(status_url).json(),
+            {"status": DeregisterJob.STATUS_QUEUED, "finished": False, "attempts": 0},
+        )
+
+        call_command("run_deregister_worker", "--once", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 0)
+        call_command("run_outbox_worker", "--once", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(
+            self.client.get(status_url).json(),
+            {
+                "status": DeregisterJob.STATUS_SUCCEEDED,
+                "finished": True,
+                "attempts": 1,
+            },
+        )
+        response_finished = self.client.get(verify_url)
+        self.assertTemplateUsed(response_finished, "subscriptions/mails_send.html")
+        self.assertTrue(response_finished.context["succeeded"])
+
+    def test_verify_status_view(self):
+        response = self.client.get(
+            reverse("subscriptions:verify_status", kwargs={"token": "abcd"})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_render_email_api_view_etag(self):
+        caches["rendered_artifacts"].clear()
+        subscription = Subscription.objects.get(slug="basic-fit-belgie")
+        url = reverse("v1:subscription_render_email", kwargs={"pk": subscription.pk})
+        response = self.client.post(
+            url, {"context": {"firstname": "Test"}}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        with patch("subscriptions.services.render_deregister_email") as render_mock:
+            cached_response = self.client.post(
+                url, {"context": {"firstname": "Test"}}, content_type="application/json"
+            )
+            self.assertEqual(cached_response.content, response.content)
+            self.assertEqual(cached_response["ETag"], etag)
+
+            precondition_failed_response = self.client.post(
+                url,
+                {"context": {"firstname": "Test"}},
+                content_type="application/json",
+                HTTP_IF_NONE_MATCH=etag,
+            )
+            self.assertEqual(precondition_failed_response.status_code, 412)
+            self.assertEqual(precondition_failed_response["ETag"], etag)
+            self.assertEqual(precondition_failed_response.content, b"")
+            render_mock.assert_not_called()
+
+        other_response = self.client.post(
+            url,
+            {"context": {"firstname": "Other"}},
+            content_type="application/json",
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(other_response.status_code, 200)
+        self.assertNotEqual(other_response["ETag"], etag)
+
+    def test_render_letters_api_view(self):
+        first = Subscription.objects.get(slug="basic-fit-belgie")
+        second = Subscription.objects.get(slug="new-york-times")
+        response = self.client.post(
+            reverse("v1:subscription_render_letters"),
+            {
+                "subscriptions": [first.pk, 999999, second.pk, first.pk],
+                "context": {"firstname": "Test"},
+            },
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/zip")
+        archive = zipfile.ZipFile(BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(
+            archive.namelist(),
+            [
+                "001-basic-fit-belgie.pdf",
+                "002-999999.error.txt",
+                "003-new-york-times.pdf",
+                "manifest.json",
+            ],
+        )
+        self.assertTrue(archive.read("001-basic-fit-belgie.pdf").startswith(b"%PDF"))
+        manifest = json.loads(archive.read("manifest.json"))
+        self.assertEqual(
+            [(item["subscription"], item["status"]) for item in manifest],
+            [(first.pk, "succeeded"), (999999, "failed"), (second.pk, "succeeded")],
+        )
+        self.assertEqual(manifest[1]["error"], "Subscription does not exist.")
+
+    def test_render_letters_api_view_docx(self):
+        subscription = Subscription.objects.get(slug="basic-fit-belgie")
+        response = self.client.post(
+            reverse("v1:subscription_render_letters"),
+            {"subscriptions": [subscription.pk], "format": "docx"},
+            content_type="application/json",
+        )
+        archive = zipfile.ZipFile(BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(
+            archive.namelist(), ["001-basic-fit-belgie.docx", "manifest.json"]
+        )
+
+    def test_render_letters_api_view_accept(self):
+        subscription = Subscription.objects.get(slug="basic-fit-belgie")
+        for accept, status_code, content_type in [
+            ("*/*", 200, "application/zip"),
+            ("application/zip", 200, "application/zip"),
+            ("application/json", 406, "application/json"),
+        ]:
+            with self.subTest(accept=accept):
+                response = self.client.post(
+                    reverse("v1:subscription_render_letters"),
+                    {"subscriptions": [subscription.pk]},
+                    content_type="application/json",
+                    HTTP_ACCEPT=accept,
+                )
+                self.assertEqual(response.status_code, status_code)
+                self.assertEqual(response["Content-Type"], content_type)
+        self.assertIn("detail", response.json())
+
+    @override_settings(RENDER_LETTERS_MAX_BATCH_SIZE=2)
+    def test_render_letters_api_view_invalid(self):
+        for data in [
+            {},
+            {"subscriptions": []},
+            {"subscriptions": ["1"]},
+            {"subscriptions": [1, 2, 3]},
+            {"subscriptions": [1], "format": "txt"},
+            {"subscriptions": [1], "context": ["firstname"]},
+            {"subscriptions": [1], "context": "firstname"},
+        ]:
+            with self.subTest(data=data):
+                response = self.client.post(
+                    reverse("v1:subscription_render_letters"),
+                    data,
+                    content_type="application/json",
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("detail", response.json())
+
     def test_verification_send_succeeded_view(self):
         response = self.client.get(reverse("subscriptions:verification_send_succeeded"))
         self.assertEqual(response.status_code, 200)
@@ -13,6 +13,7 @@ from .views import (
     verification_send,
     VerificationSendSucceeded,
     verify,
+    verify_status,
     VerificationSendFailed,
     AdminTemplateInformationView,
     BasicUserInformation,
@@ -75,6 +76,11 @@ urlpatterns = [
         verify,
         name="verify",
     ),
+    path(
+        "verify/<str:token>/status",
+        verify_status,
+        name="verify_status",
+    ),
     path(
         "verification-request/succeeded",
         VerificationSendSucceeded.as_view(),
@@ -1,21 +1,37 @@
 import urllib.parse
 import json
+from types import SimpleNamespace
 
+from django.conf import settings
+from django.contrib import messages
 from django.core.paginator import Paginator
 from django.http import (
     HttpResponseRedirect,
     Http404,
     HttpResponseForbidden,
+    JsonResponse,
 )
 
 from django.shortcuts import render
+from django.utils.functional import SimpleLazyObject
 from django.views.generic import TemplateView
 
-from .models import Subscription, SubscriptionCategory, QueuedMailList
-from .services import (
-    handle_verification_request,
-    handle_deregister_request,
+from .models import (
+    Subscription,
+    SubscriptionCategory,
+    QueuedMailList,
+    DeregisterJob,
 )
+from .catalog import get_catalog, TOP_SUBSCRIPTIONS
+from .leaderboard import get_leaderboard
+from .rollups import get_trending
+from .page_cache import (
+    CachedCatalogPageMixin,
+    CATEGORIES_TAG,
+    get_category_tag,
+    get_subscription_tag,
+)
+from .services import handle_verification_request
 from django.urls import reverse
 from subscriptions.services import send_verification_email, send_request_email
 from .forms import RequestForm, EnterUserInformationForm
@@ -67,7 +83,7 @@ class BasicUserInformation(TemplateView):
             )
 
 
-class SubscriptionDetailsSearchView(TemplateView):
+class SubscriptionDetailsSearchView(CachedCatalogPageMixin, TemplateView):
     """View for searching subscription details."""
 
     template_name = "subscriptions/subscription_details.html"
@@ -80,17 +96,31 @@ class SubscriptionDetailsSearchView(TemplateView):
         :param kwargs: keyword arguments
         :return: a render of the subscription_details page
         """
-        top_subscriptions = Subscription.objects.all().order_by("-amount_used")[:20]
+        top_subscriptions = get_leaderboard().top(TOP_SUBSCRIPTIONS)
         return render(
-            request, self.template_name, {"top_subscriptions": top_subscriptions}
+            request,
+            self.template_name,
+            {
+                "top_subscriptions": top_subscriptions,
+                "trending_subscriptions": SimpleLazyObject(get_trending),
+            },
         )
 
 
-class SubscriptionDetailsView(TemplateView):
+class SubscriptionDetailsView(CachedCatalogPageMixin, TemplateView):
     """View for displaying the details of a subscription."""
 
     template_name = "subscriptions/subscription_details.html"
 
+    def get_cache_tags(self, **kwargs):
+        """
+        Get the tags of the page.
+
+        :param kwargs: keyword arguments
+        :return: the tag of the subscription
+        """
+        return [get_subscription_tag(kwargs.get("subscription").id)]
+
     def get(self, request, **kwargs):
         """
         GET request for Subscriptions details search view.
@@ -100,55 +130,93 @@ class SubscriptionDetailsView(TemplateView):
         :return: a render of the subscription_details page with details of a subscription
         """
         subscription = kwargs.get("subscription")
-        top_subscriptions = Subscription.objects.all().order_by("-amount_used")[:20]
+        top_subscriptions = get_leaderboard().top(TOP_SUBSCRIPTIONS)
         return render(
             request,
             self.template_name,
-            {"top_subscriptions": top_subscriptions, "subscription": subscription},
+            {
+                "top_subscriptions": top_subscriptions,
+                "trending_subscriptions": SimpleLazyObject(get_trending),
+                "subscription": subscription,
+            },
         )
 
 
-class SubscriptionListView(TemplateView):
+class SubscriptionListView(CachedCatalogPageMixin, TemplateView):
     """List view for subscriptions."""
 
     template_name = "subscriptions/subscription_select.html"
 
+    def get_cache_tags(self, **kwargs):
+        """
+        Get the tags of the page.
+
+        :param kwargs: keyword arguments
+        :return: the tag of the list of top level categories
+        """
+        return [CATEGORIES_TAG]
+
     def get(self, request, **kwargs):
         """
         GET request function for list view.
 
-        Creates a list of top-level categories and their top five used subscription items.
+        Creates a list of top-level categories and their top five used subscription items. The categories are taken from
+        the catalog snapshot, the tops are only queried when a category block is not in the fragment cache.
         :param request: the request
         :param kwargs: keyword arguments
         :return: the subscription_select.html page with a top five of all top-level categories
         """
-        top_level_categories = SubscriptionCategory.get_top_level_categories().order_by(
-            "order"
-        )
-        for category in top_level_categories:
-            category.top = Subscription.top_category(category, order_by="-amount_used")
+        catalog = get_catalog()
+        tops = SimpleLazyObject(Subscription.top_per_top_level_category)
+        top_level_categories = [
+            SimpleNamespace(
+                id=category.id,
+                name=category.name,
+                slug=category.slug,
+                top=lambda category_id=category.id: tops.get(category_id, []),
+            )
+            for category in (
+                catalog.categories[category_id]
+                for category_id in catalog.category_children.get(None, ())
+            )
+        ]
         return render(request, self.template_name, {"categories": top_level_categories})
 
 
-class ListCategoryView(TemplateView):
+class ListCategoryView(CachedCatalogPageMixin, TemplateView):
     """List view for subscriptions of a specific category."""
 
     template_name = "subscriptions/subscription_category.html"
 
+    def get_cache_tags(self, **kwargs):
+        """
+        Get the tags of the page.
+
+        :param kwargs: keyword arguments
+        :return: the tag of the category
+        """
+        return [get_category_tag(kwargs.get("category").id)]
+
     def get(self, request, **kwargs):
         """
         GET request function for list category view.
 
+        The path, subcategories and subscriptions of the category are only queried when the category block is not in
+        the fragment cache.
         :param request: the request
         :param kwargs: keyword arguments
         :return: the subscription_category.html page with all subscriptions belonging to a specific category
         """
         category = kwargs.get("category")
-        category_path = category.get_path_to_me()
-        subcategories = category.get_subcategories()
-        if subcategories.count() > 0:
-            category.subcategories = subcategories
-        category.top = Subscription.top_category(category, max_items=0, order_by="name")
+        category_path = SimpleLazyObject(category.get_path_to_me)
+        category.subcategories = SimpleLazyObject(
+            lambda: list(category.get_subcategories())
+        )
+        category.top = SimpleLazyObject(
+            lambda: list(
+                Subscription.top_category(category, max_items=0, order_by="name")
+            )
+        )
         return render(
             request,
             self.template_name,
@@ -177,37 +245,52 @@ class ListCategoryRedirectView(TemplateView):
         )
 
 
-class ListCategoryPageView(TemplateView):
+class ListCategoryPageView(CachedCatalogPageMixin, TemplateView):
     """Category view with pages."""
 
     template_name = "subscriptions/subscription_category_page.html"
     paginate_by = 50
 
+    def get_cache_tags(self, **kwargs):
+        """
+        Get the tags of the page.
+
+        :param kwargs: keyword arguments
+        :return: the tag of the category
+        """
+        return [get_category_tag(kwargs.get("category").id)]
+
     def get(self, request, **kwargs):
         """
         GET request function for list category view.
 
+        The page number is checked against the catalog snapshot, the path, subcategories and subscriptions of the
+        category are only queried when the category block is not in the fragment cache.
         :param request: the request
         :param kwargs: keyword arguments
         :return: the subscription_category.html page with all subscriptions belonging to a specific category
         """
         category = kwargs.get("category")
-        category_path = category.get_path_to_me()
-        subcategories = category.get_subcategories()
-        if subcategories.count() > 0:
-            category.subcategories = subcategories
-        subscriptions = Subscription.top_category(
-            category, max_items=0, order_by="name"
-        )
         page = kwargs.get("page")
-        paginator = Paginator(subscriptions, self.paginate_by)
+        paginator = Paginator(
+            get_catalog().get_category_subscriptions(category.id), self.paginate_by
+        )
         if page not in paginator.page_range:
             raise Http404("Page not found")
-        category.top = paginator.get_page(page)
+        category_path = SimpleLazyObject(category.get_path_to_me)
+        category.subcategories = SimpleLazyObject(
+            lambda: list(category.get_subcategories())
+        )
+        category.top = SimpleLazyObject(
+            lambda: Paginator(
+                Subscription.top_category(category, max_items=0, order_by="name"),
+                self.paginate_by,
+            ).get_page(page)
+        )
         return render(
             request,
             self.template_name,
-            {"category": category, "category_path": category_path},
+            {"category": category, "category_path": category_path, "page": page},
         )
 
 
@@ -246,6 +329,8 @@ def verification_send(request):
     """
     Send a verification request.
 
+    Selected subscriptions that do not exist or that exceed the maximum number of subscriptions per request are
+    reported on the succeeded page.
     :param request: the verification request
     :return: either a HttpResponseRedirect redirecting to a succeeded or failed page or a HttpResponse 500 if a COOKIE
     could not be parsed or the QueuedMailList couldn't be constructed
@@ -260,7 +345,7 @@ def verification_send(request):
     except Exception:
         return HttpResponseRedirect(reverse("subscriptions:verification_send_failed"))
 
-    mail_list = handle_verification_request(details, items)
+    mail_list, selection = handle_verification_request(details, items)
     if mail_list:
         verification_url = request.build_absolute_uri(
             reverse("subscriptions:verify", kwargs={"token": mail_list.token})
@@ -270,6 +355,22 @@ def verification_send(request):
             mail_list.email_address,
             verification_url,
         ):
+            if selection.unknown_ids:
+                messages.warning(
+                    request,
+                    "De volgende geselecteerde abonnementen bestaan niet (meer) en worden niet opgezegd: {}.".format(
+                        ", ".join(str(x) for x in selection.unknown_ids)
+                    ),
+                )
+            if selection.truncated_ids:
+                messages.warning(
+                    request,
+                    "Er kunnen maximaal {} abonnementen tegelijk opgezegd worden, de volgende abonnementen worden "
+                    "niet opgezegd: {}.".format(
+                        settings.MAX_SUBSCRIPTIONS_PER_REQUEST,
+                        ", ".join(str(x) for x in selection.truncated_ids),
+                    ),
+                )
             response = HttpResponseRedirect(
                 reverse("subscriptions:verification_send_succeeded")
             )
@@ -361,20 +462,52 @@ def verify(request, **kwargs):
     """
     Verify a verification request.
 
+    Verifying queues a DeregisterJob for the mail list, the deregister emails and letters are sent by a worker. While
+    the job is not finished a status page is shown that polls the status of the job.
     :param request: the request to verify
     :param kwargs: keyword arguments
-    :return: a rendered page with either a succeeded message or failed message regarding the verification
+    :return: a rendered page with either the status of the job, a succeeded message or failed message regarding the
+    verification
     """
     token = kwargs.get("token", "")
     try:
-        mail_list = QueuedMailList.objects.get(token=token)
-    except QueuedMailList.DoesNotExist:
-        raise Http404()
+        job = DeregisterJob.objects.get(idempotency_key=token)
+    except DeregisterJob.DoesNotExist:
+        try:
+            mail_list = QueuedMailList.unexpired().get(token=token)
+        except QueuedMailList.DoesNotExist:
+            raise Http404()
+        job = DeregisterJob.enqueue(mail_list)
 
-    if handle_deregister_request(mail_list):
-        return render(request, "subscriptions/mails_send.html", {"succeeded": True})
+    if job.is_finished:
+        return render(
+            request,
+            "subscriptions/mails_send.html",
+            {"succeeded": job.status == DeregisterJob.STATUS_SUCCEEDED},
+        )
     else:
-        return render(request, "subscriptions/mails_send.html", {"succeeded": False})
+        return render(request, "subscriptions/deregister_status.html", {"job": job})
+
+
+def verify_status(request, **kwargs):
+    """
+    Get the status of a verified request.
+
+    :param request: the request
+    :param kwargs: keyword arguments
+    :return: a JSON response with the status of the DeregisterJob of the request
+    """
+    try:
+        job = DeregisterJob.objects.get(idempotency_key=kwargs.get("token", ""))
+    except DeregisterJob.DoesNotExist:
+        raise Http404()
+    return JsonResponse(
+        {
+            "status": job.status,
+            "finished": job.is_finished,
+            "attempts": job.attempts,
+        }
+    )
 
 
 class VerificationSendSucceeded(TemplateView):
@@ -169,12 +169,13 @@ class BackendUserCreationForm(forms.ModelForm):
         }
         help_texts = {
             "email": "Let op! Er zal na het aanmaken van het account direct een email worden verstuurd naar "
-            "het email adres wat hier is opgegeven met daarin het wachtwoord en de gebruikersnaam."
+            "het email adres wat hier is opgegeven met daarin de gebruikersnaam. De gebruiker stelt zelf een wachtwoord in "
+            "via wachtwoord vergeten."
         }
 
     def save(self, commit=True):
         """
-        Generate a random password and send an email.
+        Generate a random password and send an email without the password.
 
         :param commit whether to commit or not
         :return: the created user
@@ -182,7 +183,7 @@ class BackendUserCreationForm(forms.ModelForm):
         user = super().save(commit=False)
         password = self.generate_random_password()
         user.set_password(password)
-        send_new_account(user, password)
+        send_new_account(user)
         if commit:
             user.save()
 
@@ -0,0 +1,23 @@
+# Generated by Django 4.0.6 on 2026-10-18 10:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0007_alter_emailupdate_id_alter_passwordreset_id_and_more"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="emailupdate",
+            name="created",
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name="passwordreset",
+            name="created",
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
@@ -1,9 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 import secrets
-import pytz
 import datetime
-from django.conf import settings
+from django.utils import timezone
 
 
 class UserManager(BaseUserManager):
@@ -125,11 +124,13 @@ class User(AbstractUser):
 class PasswordReset(models.Model):
     """Queued password resets object."""
 
+    EXPIRES_AFTER = datetime.timedelta(minutes=15)
+
     user = models.ForeignKey(
         User, related_name="password_resets", on_delete=models.CASCADE
     )
     token = models.CharField(max_length=64, unique=True)
-    created = models.DateTimeField(auto_now_add=True)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
 
     def __str__(self):
         """
@@ -151,31 +152,40 @@ class PasswordReset(models.Model):
         reset = PasswordReset.objects.create(token=random_token, user=user)
         return reset
 
+    @staticmethod
+    def unexpired():
+        """
+        Get all PasswordReset objects that are not expired.
+
+        :return: a QuerySet of PasswordReset objects created less than EXPIRES_AFTER ago
+        """
+        return PasswordReset.objects.filter(
+            created__gt=timezone.now() - PasswordReset.EXPIRES_AFTER
+        )
+
     @staticmethod
     def remove_expired():
         """
         Remove all expired PasswordReset objects.
 
-        :return: None
+        :return: the amount of removed PasswordReset objects
         """
-        password_resets = PasswordReset.objects.all()
-        timezone = pytz.timezone(settings.TIME_ZONE)
-        remove_after = timezone.localize(
-            datetime.datetime.now() - datetime.timedelta(minutes=15)
-        )
-        for password_reset in password_resets:
-            if password_reset.created <= remove_after:
-                password_reset.delete()
+        deleted, _ = PasswordReset.objects.filter(
+            created__lte=timezone.now() - PasswordReset.EXPIRES_AFTER
+        ).delete()
+        return deleted
 
 
 class EmailUpdate(models.Model):
     """Queued email update model."""
 
+    EXPIRES_AFTER = datetime.timedelta(minutes=60)
+
     user = models.ForeignKey(
         User, related_name="email_updates", on_delete=models.CASCADE
     )
     token = models.CharField(max_length=64, unique=True)
-    created = models.DateTimeField(auto_now_add=True)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
     email_address = models.EmailField(max_length=512)
 
     def __str__(self):
@@ -210,21 +220,28 @@ class EmailUpdate(models.Model):
         self.user.email = self.email_address
         self.user.save()
 
+    @staticmethod
+    def unexpired():
+        """
+        Get all EmailUpdate objects that are not expired.
+
+        :return: a QuerySet of EmailUpdate objects created less than EXPIRES_AFTER ago
+        """
+        return EmailUpdate.objects.filter(
+            created__gt=timezone.now() - EmailUpdate.EXPIRES_AFTER
+        )
+
     @staticmethod
     def remove_expired():
         """
         Remove all expired EmailUpdate objects.
 
-        :return: None
+        :return: the amount of removed EmailUpdate objects
         """
-        email_updates = EmailUpdate.objects.all()
-        timezone = pytz.timezone(settings.TIME_ZONE)
-        remove_after = timezone.localize(
-            datetime.datetime.now() - datetime.timedelta(minutes=60)
-        )
-        for email_update in email_updates:
-            if email_update.created <= remove_after:
-                email_update.delete()
+        deleted, _ = EmailUpdate.objects.filter(
+            created__lte=timezone.now() - EmailUpdate.EXPIRES_AFTER
+        ).delete()
+        return deleted
 
 
 class Profile(models.Model):
@@ -1,6 +1,5 @@
-from smtplib import SMTPException
-
 from django.core.mail import EmailMultiAlternatives
+from outbox.services import queue_email
 from django.template.loader import get_template
 
 from .models import PasswordReset
@@ -8,16 +7,18 @@ from django.urls import reverse
 from django.conf import settings
 
 
-def send_new_account(user, password):
+def send_new_account(user):
     """
     Send a new account notification.
 
+    The password is not sent, mail is kept in the outbox until it is sent. The user sets a password with the forgot
+    password form.
     :param user: the newly created user
-    :return: True if the mail was sent successfully, False otherwise
+    :return: True if the mail was queued in the outbox
     """
     template_text = get_template("email/new_account.txt")
 
-    context = {"user": user, "password": password}
+    context = {"user": user}
 
     text_content = template_text.render(context)
 
@@ -27,11 +28,7 @@ def send_new_account(user, password):
         settings.EMAIL_HOST_USER,
         [user.email],
     )
-    try:
-        msg.send()
-    except SMTPException as e:
-        print(e)
-        return False
+    queue_email(msg)
     return True
 
 
@@ -41,7 +38,7 @@ def send_reset_password(reset, request):
 
     :param reset: a PasswordReset object with a linked User object
     :param request: the request
-    :return: True if the mail was sent successfully, False otherwise
+    :return: True if the mail was queued in the outbox
     """
     template = get_template("email/password_reset.html")
     template_text = get_template("email/password_reset.txt")
@@ -67,12 +64,7 @@ def send_reset_password(reset, request):
     )
     msg.attach_alternative(html_content, "text/html")
 
-    try:
-        msg.send()
-    except SMTPException as e:
-        print(e)
-        return False
-
+    queue_email(msg)
     return True
 
 
@@ -93,7 +85,7 @@ def send_update_email(update, request):
 
     :param update: an EmailUpdate object with the email update
     :param request: the request
-    :return: True if the mail was sent successfully, False otherwise
+    :return: True if the mail was queued in the outbox
     """
     template = get_template("email/email_confirmation.html")
     template_text = get_template("email/email_confirmation.txt")
@@ -119,10 +111,5 @@ def send_update_email(update, request):
     )
     msg.attach_alternative(html_content, "text/html")
 
-    try:
-        msg.send()
-    except SMTPException as e:
-        print(e)
-        return False
-
+    queue_email(msg)
     return True
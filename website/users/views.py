@@ -204,9 +204,13 @@ class ResetView(TemplateView):
         if form.is_valid():
             new_password = form.cleaned_data.get("password")
             token = kwargs.get("token")
-            PasswordReset.remove_expired()
-            if PasswordReset.objects.filter(token=token).exists():
-                reset = PasswordReset.objects.get(token=token)
+            reset = (
+                PasswordReset.unexpired()
+                .select_related("user")
+                .filter(token=token)
+                .first()
+            )
+            if reset is not None:
                 reset.user.set_password(new_password)
                 reset.user.save()
                 reset.delete()
@@ -232,9 +236,10 @@ class EmailConfirmView(TemplateView):
         :return: a render of the email confirmation page
         """
         token = kwargs.get("token")
-        EmailUpdate.remove_expired()
-        if EmailUpdate.objects.filter(token=token).exists():
-            update = EmailUpdate.objects.get(token=token)
+        update = (
+            EmailUpdate.unexpired().select_related("user").filter(token=token).first()
+        )
+        if update is not None:
             update.update_user()
             update.delete()
             return render(request, self.template_name)